@@ -1,20 +1,75 @@
-from fastapi import APIRouter
-from app.services.avl_service import avl_tree
+from contextlib import contextmanager
+from typing import List, Optional
 
-router = APIRouter(prefix="/avl", tags=["AVL Tree"])
+from fastapi import APIRouter, Body, Depends, Query
+from fastapi.responses import JSONResponse
+from app.controllers.pagination import paginate
+from app.controllers.write_responses import ResponseMode, apply_write_batch, write_data
+from app.controllers.named_trees import create_named_router, get_avl_tree
+from app.controllers.metrics_controller import TimedRoute
+from app.services import bulk_build
+from app.services.write_queue import write_queue_for
+
+router = APIRouter(prefix="/avl", tags=["AVL Tree"], route_class=TimedRoute)
+
+
+@contextmanager
+def _reading(avl_tree, version: Optional[int]):
+    """Árbol a leer: el actual, o la versión publicada pedida con ?version=
+    
+    El árbol actual se lee con el candado de lectura. Una versión publicada
+    nunca cambia, así que se lee sin esperar a las escrituras.
+    Lanza ValueError si el árbol no es persistente o la versión no se conserva.
+    """
+    if version is None:
+        with avl_tree.lock.read():
+            yield avl_tree
+    else:
+        yield avl_tree.snapshot(version)
 
 
 @router.post("/insert")
-def insert_value(value: int):
-    """Inserta un valor en el árbol AVL (balancea automáticamente)"""
-    success = avl_tree.insert(value)
+def insert_value(value: int, response: ResponseMode = "full", avl_tree=Depends(get_avl_tree)):
+    """Inserta un valor en el árbol AVL (balancea automáticamente)
     
-    if success:
+    ?response=none|summary|delta|full elige qué se retorna: nada, un resumen,
+    solo los nodos modificados y rotaciones, o la estructura completa.
+    
+    Con WRITE_COALESCE_MS > 0 summary y full muestran el árbol después de
+    todo el lote en el que se aplicó la escritura, que puede incluir
+    escrituras de otras peticiones que llegaron a la vez.
+    """
+    # Con WRITE_COALESCE_MS se aplica en un lote junto con las escrituras que
+    # llegan a la vez; el modo delta no, porque describe una sola escritura
+    queue = write_queue_for(avl_tree, apply_write_batch) if response != "delta" else None
+    try:
+        if queue is not None:
+            success, data = queue.submit(("insert", (value,), response))
+        else:
+            # Las escrituras son exclusivas: ninguna lectura ve un subárbol a medio rotar
+            with avl_tree.lock.write():
+                if response == "delta":
+                    avl_tree.begin_delta()
+                try:
+                    success = avl_tree.insert(value)
+                finally:
+                    delta = avl_tree.end_delta() if response == "delta" else None
+                data = write_data(avl_tree, response, delta) if success else None
+    except ValueError as error:
+        # El almacenamiento en arena solo acepta enteros de 64 bits
         return {
+            "message": str(error),
+            "success": False
+        }
+    
+    if success:
+        # JSONResponse serializa directo con json.dumps, sin que FastAPI
+        # recorra toda la estructura con jsonable_encoder
+        return JSONResponse({
             "message": f"Value {value} inserted and tree balanced successfully",
             "success": True,
-            "data": {"structure": avl_tree.get_structure()}
-        }
+            "data": data
+        })
     else:
         return {
             "message": f"Value {value} already exists in the tree",
@@ -22,10 +77,55 @@ def insert_value(value: int):
         }
 
 
+@router.post("/insert/batch")
+def insert_batch(values: List[int] = Body(...), avl_tree=Depends(get_avl_tree)):
+    """Inserta un lote de valores (arreglo JSON) en el árbol AVL
+    
+    No retorna la estructura completa, solo cuántos valores se insertaron.
+    Un lote grande sobre un árbol vacío (p. ej. la carga inicial) se ordena y
+    se arma repartido en varios procesos (ver app/services/bulk_build.py).
+    """
+    try:
+        with avl_tree.lock.write():
+            inserted = None
+            if not avl_tree.saved_data and len(values) >= bulk_build.PARALLEL_MIN_VALUES:
+                try:
+                    inserted = bulk_build.bulk_build(avl_tree, values)
+                except ValueError:
+                    # Enteros fuera de 64 bits: AVLNode los acepta insertando
+                    # el lote normalmente (la arena vuelve a rechazarlos)
+                    pass
+            if inserted is None:
+                inserted = avl_tree.insert_many(values)
+            size = len(avl_tree.saved_data)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
+    
+    return {
+        "message": f"{inserted} values inserted, {len(values) - inserted} already existed",
+        "success": True,
+        "data": {
+            "inserted": inserted,
+            "duplicates": len(values) - inserted,
+            "size": size
+        }
+    }
+
+
 @router.post("/search")
-def search_value(value: int):
-    """Busca un valor en el árbol AVL"""
-    found = avl_tree.search(value)
+def search_value(value: int, version: Optional[int] = None, avl_tree=Depends(get_avl_tree)):
+    """Busca un valor en el árbol AVL (?version=N busca en una versión publicada)"""
+    try:
+        with _reading(avl_tree, version) as tree:
+            found = tree.search(value)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
     
     return {
         "message": f"Value {value} {'found' if found else 'not found'}",
@@ -35,17 +135,31 @@ def search_value(value: int):
 
 
 @router.delete("/prune")
-def prune_value(value: int):
-    """Elimina un valor del árbol AVL (poda y rebalancea automáticamente)"""
-    exists = avl_tree.search(value)
+def prune_value(value: int, response: ResponseMode = "full", avl_tree=Depends(get_avl_tree)):
+    """Elimina un valor del árbol AVL (poda y rebalancea automáticamente)
+    
+    ?response=none|summary|delta|full elige qué se retorna (ver /insert).
+    """
+    queue = write_queue_for(avl_tree, apply_write_batch) if response != "delta" else None
+    if queue is not None:
+        exists, data = queue.submit(("prune", (value,), response))
+    else:
+        with avl_tree.lock.write():
+            # prune() ya dice si el valor estaba: una sola bajada por el árbol
+            if response == "delta":
+                avl_tree.begin_delta()
+            try:
+                exists = avl_tree.prune(value)
+            finally:
+                delta = avl_tree.end_delta() if response == "delta" else None
+            data = write_data(avl_tree, response, delta) if exists else None
     
     if exists:
-        avl_tree.prune(value)
-        return {
+        return JSONResponse({
             "message": f"Value {value} pruned and tree rebalanced successfully",
             "success": True,
-            "data": {"structure": avl_tree.get_structure()}
-        }
+            "data": data
+        })
     else:
         return {
             "message": f"Value {value} does not exist in the tree",
@@ -53,27 +167,80 @@ def prune_value(value: int):
         }
 
 
-@router.post("/balance")
-def balance_tree():
-    """Fuerza un rebalanceo completo del árbol AVL"""
-    if avl_tree.root is None:
+@router.delete("/prune-range")
+def prune_range(lo: int, hi: int, response: ResponseMode = "full", avl_tree=Depends(get_avl_tree)):
+    """Elimina todos los valores del intervalo cerrado [lo, hi] de una vez
+    
+    El árbol se parte y se vuelve a unir una sola vez en lugar de podar y
+    rebalancear por cada valor. ?response=none|summary|delta|full elige qué
+    más se retorna junto a la cantidad de valores eliminados (ver /insert).
+    """
+    with avl_tree.lock.write():
+        if response == "delta":
+            avl_tree.begin_delta()
+        try:
+            removed = avl_tree.prune_range(lo, hi)
+        finally:
+            delta = avl_tree.end_delta() if response == "delta" else None
+        data = write_data(avl_tree, response, delta) if removed else None
+    
+    if removed:
+        return JSONResponse({
+            "message": f"{removed} values between {lo} and {hi} pruned and tree rebalanced successfully",
+            "success": True,
+            "data": {"removed": removed, **data}
+        })
+    else:
         return {
-            "message": "The tree is empty, nothing to balance",
-            "success": False
+            "message": f"No values between {lo} and {hi} in the tree",
+            "success": False,
+            "data": {"removed": 0}
         }
+
+
+@router.post("/balance")
+def balance_tree(response: ResponseMode = "full", avl_tree=Depends(get_avl_tree)):
+    """Fuerza un rebalanceo completo del árbol AVL
     
-    avl_tree.balance_tree()
-    return {
+    ?response=none|summary|delta|full elige qué se retorna. Como el árbol se
+    reconstruye completo, el modo delta incluye la estructura entera.
+    """
+    with avl_tree.lock.write():
+        if avl_tree.root is None:
+            return {
+                "message": "The tree is empty, nothing to balance",
+                "success": False
+            }
+        
+        if response == "delta":
+            avl_tree.begin_delta()
+        try:
+            avl_tree.balance_tree()
+        finally:
+            delta = avl_tree.end_delta() if response == "delta" else None
+        data = write_data(avl_tree, response, delta)
+    
+    return JSONResponse({
         "message": "Tree balanced successfully",
         "success": True,
-        "data": {"structure": avl_tree.get_structure()}
-    }
+        "data": data
+    })
 
 
 @router.get("/structure")
-def get_structure():
-    """Muestra la estructura completa del árbol AVL con alturas y balance"""
-    structure = avl_tree.get_structure()
+def get_structure(version: Optional[int] = None, avl_tree=Depends(get_avl_tree)):
+    """Muestra la estructura completa del árbol AVL con alturas y balance
+    
+    ?version=N muestra la estructura de una versión publicada (modo persistente).
+    """
+    try:
+        with _reading(avl_tree, version) as tree:
+            structure = tree.get_structure()
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
     
     if structure is None:
         return {
@@ -82,68 +249,276 @@ def get_structure():
             "data": {"structure": None}
         }
     
-    return {
+    return JSONResponse({
         "message": "AVL tree structure obtained",
         "success": True,
         "data": {"structure": structure}
-    }
+    })
 
 
 @router.get("/traversal/inorder")
-def inorder_traversal():
-    """Recorrido inorden: izquierda -> raíz -> derecha"""
-    result = avl_tree.inorder()
+def inorder_traversal(after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1),
+                      version: Optional[int] = None, avl_tree=Depends(get_avl_tree)):
+    """Recorrido inorden: izquierda -> raíz -> derecha
+    
+    Paginación opcional: ?after=<último valor recibido>&limit=N
+    ?version=N recorre una versión publicada (modo persistente), así todas
+    las páginas leen el mismo árbol aunque lleguen escrituras entre ellas.
+    """
+    try:
+        with _reading(avl_tree, version) as tree:
+            result, next_cursor = paginate(tree.iter_inorder, after, limit)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
     
     return {
         "message": "Inorder traversal",
         "success": True,
-        "data": {"traversal": result}
+        "data": {"traversal": result, "next_cursor": next_cursor}
     }
 
 
 @router.get("/traversal/preorder")
-def preorder_traversal():
-    """Recorrido preorden: raíz -> izquierda -> derecha"""
-    result = avl_tree.preorder()
+def preorder_traversal(after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1),
+                       version: Optional[int] = None, avl_tree=Depends(get_avl_tree)):
+    """Recorrido preorden: raíz -> izquierda -> derecha
+    
+    Paginación opcional: ?after=<último valor recibido>&limit=N
+    ?version=N recorre una versión publicada (ver /traversal/inorder)
+    """
+    try:
+        with _reading(avl_tree, version) as tree:
+            result, next_cursor = paginate(tree.iter_preorder, after, limit)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
     
     return {
         "message": "Preorder traversal",
         "success": True,
-        "data": {"traversal": result}
+        "data": {"traversal": result, "next_cursor": next_cursor}
     }
 
 
 @router.get("/traversal/postorder")
-def postorder_traversal():
-    """Recorrido postorden: izquierda -> derecha -> raíz"""
-    result = avl_tree.postorder()
+def postorder_traversal(after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1),
+                        version: Optional[int] = None, avl_tree=Depends(get_avl_tree)):
+    """Recorrido postorden: izquierda -> derecha -> raíz
+    
+    Paginación opcional: ?after=<último valor recibido>&limit=N
+    ?version=N recorre una versión publicada (ver /traversal/inorder)
+    """
+    try:
+        with _reading(avl_tree, version) as tree:
+            result, next_cursor = paginate(tree.iter_postorder, after, limit)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
     
     return {
         "message": "Postorder traversal",
         "success": True,
-        "data": {"traversal": result}
+        "data": {"traversal": result, "next_cursor": next_cursor}
+    }
+
+
+@router.get("/range")
+def range_values(lo: int, hi: int, limit: Optional[int] = None, avl_tree=Depends(get_avl_tree)):
+    """Valores en el intervalo cerrado [lo, hi] en orden (máximo limit valores)"""
+    with avl_tree.lock.read():
+        values = avl_tree.range(lo, hi, limit)
+    
+    return {
+        "message": f"{len(values)} values between {lo} and {hi}",
+        "success": True,
+        "data": {"lo": lo, "hi": hi, "values": values}
+    }
+
+
+@router.get("/rank")
+def rank_value(value: int, avl_tree=Depends(get_avl_tree)):
+    """Cantidad de valores menores que value (posición que ocuparía en inorden)"""
+    with avl_tree.lock.read():
+        rank = avl_tree.rank(value)
+    
+    return {
+        "message": f"{rank} values are lower than {value}",
+        "success": True,
+        "data": {"value": value, "rank": rank}
+    }
+
+
+@router.get("/select")
+def select_value(k: int, avl_tree=Depends(get_avl_tree)):
+    """Retorna el k-ésimo menor valor del árbol (k empieza en 0)"""
+    try:
+        with avl_tree.lock.read():
+            value = avl_tree.select(k)
+    except IndexError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
+    
+    return {
+        "message": f"Value at position {k} obtained",
+        "success": True,
+        "data": {"k": k, "value": value}
+    }
+
+
+@router.get("/count-between")
+def count_between(lo: int, hi: int, avl_tree=Depends(get_avl_tree)):
+    """Cantidad de valores en el intervalo cerrado [lo, hi]"""
+    with avl_tree.lock.read():
+        count = avl_tree.count_between(lo, hi)
+    
+    return {
+        "message": f"{count} values between {lo} and {hi}",
+        "success": True,
+        "data": {"lo": lo, "hi": hi, "count": count}
+    }
+
+
+@router.get("/median")
+def get_median(avl_tree=Depends(get_avl_tree)):
+    """Mediana de los valores del árbol"""
+    try:
+        with avl_tree.lock.read():
+            median = avl_tree.median()
+    except IndexError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
+    
+    return {
+        "message": "Median obtained",
+        "success": True,
+        "data": {"median": median}
+    }
+
+
+@router.get("/percentile")
+def get_percentile(p: float, avl_tree=Depends(get_avl_tree)):
+    """Valor en el percentil p (0-100), por ejemplo p=99 para el percentil 99"""
+    try:
+        with avl_tree.lock.read():
+            value = avl_tree.percentile(p)
+    except (IndexError, ValueError) as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
+    
+    return {
+        "message": f"Percentile {p} obtained",
+        "success": True,
+        "data": {"p": p, "value": value}
+    }
+
+
+@router.get("/versions")
+def get_versions(avl_tree=Depends(get_avl_tree)):
+    """Versiones publicadas que se pueden leer con ?version= (modo persistente)"""
+    if not avl_tree.persistent:
+        return {
+            "message": "Versioned reads need a persistent tree (AVL_PERSISTENT=1)",
+            "success": False
+        }
+    
+    with avl_tree.lock.read():
+        current, versions = avl_tree.version, avl_tree.versions()
+    
+    return {
+        "message": "Available versions",
+        "success": True,
+        "data": {"current": current, "versions": versions}
     }
 
 
 @router.get("/saved-data")
-def get_saved_data():
-    """Muestra todos los datos guardados en el árbol AVL"""
-    data = avl_tree.get_saved_data()
+def get_saved_data(after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1),
+                   avl_tree=Depends(get_avl_tree)):
+    """Muestra todos los datos guardados en el árbol AVL
+    
+    Paginación opcional: ?after=<último valor recibido>&limit=N
+    """
+    try:
+        with avl_tree.lock.read():
+            data, next_cursor = paginate(avl_tree.iter_saved_data, after, limit)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
     
     return {
         "message": "Saved data in the AVL tree",
         "success": True,
-        "data": {"values": data}
+        "data": {"values": data, "next_cursor": next_cursor}
+    }
+
+
+@router.get("/stats")
+def get_stats(avl_tree=Depends(get_avl_tree)):
+    """Contadores del camino caliente: nodos visitados y comparaciones por
+    operación, distribución de profundidades y rotaciones simples y dobles
+    
+    Se activan con POST /stats?enabled=true o al arrancar con TREE_STATS=1.
+    """
+    with avl_tree.lock.read():
+        stats = avl_tree.get_stats()
+    
+    if stats is None:
+        return {
+            "message": "Hot path stats are disabled (POST /stats?enabled=true or TREE_STATS=1)",
+            "success": False
+        }
+    
+    return {
+        "message": "Hot path stats of the AVL tree",
+        "success": True,
+        "data": stats
+    }
+
+
+@router.post("/stats")
+def set_stats(enabled: bool = True, avl_tree=Depends(get_avl_tree)):
+    """Activa (con los contadores en cero) o desactiva los contadores del camino caliente"""
+    # Con el candado de escritura ninguna operación en curso ve el cambio a la mitad
+    with avl_tree.lock.write():
+        if enabled:
+            avl_tree.enable_stats()
+        else:
+            avl_tree.disable_stats()
+    
+    return {
+        "message": "Hot path stats " + ("enabled" if enabled else "disabled"),
+        "success": True,
+        "data": {"enabled": enabled}
     }
 
 
 @router.delete("/clear")
-def clear_tree():
+def clear_tree(avl_tree=Depends(get_avl_tree)):
     """Limpia todo el árbol AVL (poda completa)"""
-    avl_tree.clear()
+    with avl_tree.lock.write():
+        avl_tree.clear()
     
     return {
         "message": "AVL tree cleared successfully",
         "success": True,
         "data": {"structure": None}
     }
+
+
+# Las mismas rutas para árboles con nombre: /avl/{tree_name}/...
+named_router = create_named_router(router, tags=["AVL Tree (named)"])
@@ -0,0 +1,45 @@
+import time
+
+from fastapi import APIRouter, HTTPException
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+from app.services.metrics import render_metrics, route_latency
+
+router = APIRouter(tags=["Metrics"])
+
+
+class TimedRoute(APIRoute):
+    """
+    Ruta que registra la duración de cada petición para /metrics.
+    
+    Mide el manejador completo de FastAPI (dependencias, endpoint en el pool
+    de hilos y serialización de la respuesta) y lo agrupa por la plantilla
+    de la ruta (p. ej. /avl/{tree_name}/insert), no por la URL.
+    """
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        
+        async def timed_handler(request):
+            start = time.perf_counter()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+                return response
+            except HTTPException as error:
+                status = error.status_code
+                raise
+            except RequestValidationError:
+                status = 422
+                raise
+            finally:
+                route_latency.observe((request.method, self.path, str(status)), time.perf_counter() - start)
+        
+        return timed_handler
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métricas en formato de texto de Prometheus (latencias y medidas de los árboles)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
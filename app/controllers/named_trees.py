@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+
+from app.services.avl_service import avl_tree as global_avl_tree
+from app.services.tree_registry import tree_registry
+from app.services.tree_service import tree as global_tree
+
+
+def _named_tree(kind, request: Request, global_instance):
+    """Árbol de la petición: el global, o el árbol con nombre de la ruta
+    
+    Las rutas /avl/... y /tree/... usan los árboles globales; las rutas
+    /avl/{tree_name}/... y /tree/{tree_name}/... usan el árbol con ese nombre
+    del registro, que no se desaloja hasta que termina la petición.
+    """
+    name = request.path_params.get("tree_name")
+    if name is None:
+        yield global_instance
+        return
+    
+    try:
+        named_tree = tree_registry.acquire(kind, name)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    try:
+        yield named_tree
+    finally:
+        tree_registry.release(kind, name)
+
+
+def get_avl_tree(request: Request):
+    """Dependencia: árbol AVL de la petición (ver _named_tree)"""
+    yield from _named_tree("avl", request, global_avl_tree)
+
+
+def get_tree(request: Request):
+    """Dependencia: árbol BST de la petición (ver _named_tree)"""
+    yield from _named_tree("tree", request, global_tree)
+
+
+def _tree_name(tree_name: str = Path(..., description="Tree name (letters, digits, '-' and '_')")):
+    """Documenta el parámetro {tree_name} de las rutas con nombre"""
+    return tree_name
+
+
+def create_named_router(router: APIRouter, tags):
+    """Copia todas las rutas de router bajo <prefijo>/{tree_name}
+    
+    Los endpoints son los mismos: reciben el árbol con la dependencia
+    get_avl_tree o get_tree, que elige el árbol según la ruta.
+    """
+    named = APIRouter(prefix=router.prefix + "/{tree_name}", tags=tags,
+                      dependencies=[Depends(_tree_name)], route_class=router.route_class)
+    for route in router.routes:
+        named.add_api_route(
+            route.path[len(router.prefix):],
+            route.endpoint,
+            methods=list(route.methods),
+            name=f"{route.name}_named"
+        )
+    return named
@@ -0,0 +1,28 @@
+from itertools import islice
+
+
+def paginate(iterate, after=None, limit=None):
+    """Obtiene una página de un recorrido perezoso (generador)
+    
+    Args:
+        iterate: Función que recibe el cursor y retorna un generador
+                 (por ejemplo tree.iter_inorder)
+        after: Último valor de la página anterior (None para empezar)
+        limit: Tamaño máximo de la página (None para traer todo)
+    
+    Returns:
+        Tupla (página, siguiente cursor). El cursor es None cuando no quedan
+        más valores.
+    
+    Lanza ValueError si el cursor no es válido.
+    """
+    items = iterate(after)
+    if limit is None:
+        return list(items), None
+    
+    # Se pide un valor de más para saber si existe una página siguiente
+    page = list(islice(items, limit + 1))
+    if len(page) > limit:
+        page.pop()
+        return page, page[-1]
+    return page, None
@@ -0,0 +1,334 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, Query
+from fastapi.responses import JSONResponse
+from app.controllers.metrics_controller import TimedRoute
+from app.controllers.write_responses import ResponseMode
+from app.services import sharding
+
+# Con AVL_SHARDS el servidor atiende /avl con este router en lugar de
+# avl_controller: el árbol vive repartido en procesos shard (ver
+# app/services/sharding.py). No hay preorden, postorden, balanceo,
+# versiones, datos guardados, contadores, árboles con nombre ni ?response=delta,
+# porque no existe un único árbol que recorrer, balancear o versionar: esas
+# rutas responden con un error explícito en lugar de un 404 o de ignorarse.
+router = APIRouter(prefix="/avl", tags=["AVL Tree (sharded)"], route_class=TimedRoute)
+
+
+def get_sharded_tree():
+    """Dependencia: el árbol particionado global (creado al iniciar el servidor)"""
+    return sharding.sharded_tree
+
+
+def _unsupported(feature):
+    """Respuesta de una función del AVL normal que no existe con shards"""
+    return {
+        "message": f"{feature} is not supported in sharded mode (AVL_SHARDS)",
+        "success": False
+    }
+
+
+def _write_data(avl_tree, mode):
+    """Parte "data" de una escritura según ?response= (ver write_responses.write_data)
+    
+    full retorna la estructura de cada shard, como GET /avl/structure.
+    """
+    if mode == "none":
+        return {}
+    if mode == "summary":
+        return {"summary": avl_tree.summary()}
+    return {"shards": avl_tree.get_structure()}
+
+
+@router.post("/insert")
+def insert_value(value: int, response: ResponseMode = "full", avl_tree=Depends(get_sharded_tree)):
+    """Inserta un valor en el shard que contiene su rango
+    
+    ?response=none|summary|full elige qué se retorna (delta no existe con shards).
+    """
+    if response == "delta":
+        return _unsupported("?response=delta")
+    try:
+        success = avl_tree.insert(value)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
+    
+    if success:
+        return {
+            "message": f"Value {value} inserted and tree balanced successfully",
+            "success": True,
+            "data": _write_data(avl_tree, response)
+        }
+    else:
+        return {
+            "message": f"Value {value} already exists in the tree",
+            "success": False
+        }
+
+
+@router.post("/insert/batch")
+def insert_batch(values: List[int] = Body(...), avl_tree=Depends(get_sharded_tree)):
+    """Inserta un lote de valores: cada shard inserta su parte en paralelo"""
+    try:
+        inserted = avl_tree.insert_many(values)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
+    
+    return {
+        "message": f"{inserted} values inserted, {len(values) - inserted} already existed",
+        "success": True,
+        "data": {
+            "inserted": inserted,
+            "duplicates": len(values) - inserted,
+            "size": avl_tree.size()
+        }
+    }
+
+
+@router.post("/search")
+def search_value(value: int, version: Optional[int] = None, avl_tree=Depends(get_sharded_tree)):
+    """Busca un valor en el shard que contiene su rango"""
+    if version is not None:
+        return _unsupported("?version=")
+    found = avl_tree.search(value)
+    return {
+        "message": f"Value {value} {'found' if found else 'not found'}",
+        "success": found,
+        "data": {"found": found}
+    }
+
+
+@router.delete("/prune")
+def prune_value(value: int, response: ResponseMode = "full", avl_tree=Depends(get_sharded_tree)):
+    """Elimina un valor del shard que contiene su rango
+    
+    ?response=none|summary|full elige qué se retorna (ver /insert).
+    """
+    if response == "delta":
+        return _unsupported("?response=delta")
+    if avl_tree.prune(value):
+        return {
+            "message": f"Value {value} pruned and tree rebalanced successfully",
+            "success": True,
+            "data": _write_data(avl_tree, response)
+        }
+    else:
+        return {
+            "message": f"Value {value} does not exist in the tree",
+            "success": False
+        }
+
+
+@router.delete("/prune-range")
+def prune_range(lo: int, hi: int, response: ResponseMode = "full", avl_tree=Depends(get_sharded_tree)):
+    """Elimina los valores de [lo, hi]: cada shard del intervalo poda su parte
+    
+    ?response=none|summary|full elige qué se retorna (ver /insert).
+    """
+    if response == "delta":
+        return _unsupported("?response=delta")
+    removed = avl_tree.prune_range(lo, hi)
+    if removed:
+        return {
+            "message": f"{removed} values between {lo} and {hi} pruned and tree rebalanced successfully",
+            "success": True,
+            "data": {"removed": removed, **_write_data(avl_tree, response)}
+        }
+    else:
+        return {
+            "message": f"No values between {lo} and {hi} in the tree",
+            "success": False,
+            "data": {"removed": 0}
+        }
+
+
+@router.get("/structure")
+def get_structure(version: Optional[int] = None, avl_tree=Depends(get_sharded_tree)):
+    """Estructura del AVL de cada shard, con su rango de valores"""
+    if version is not None:
+        return _unsupported("?version=")
+    return JSONResponse({
+        "message": "AVL tree structure obtained",
+        "success": True,
+        "data": {"shards": avl_tree.get_structure()}
+    })
+
+
+@router.get("/shards")
+def get_shards(avl_tree=Depends(get_sharded_tree)):
+    """Rango, cantidad de valores y proceso de cada shard"""
+    return {
+        "message": "Shards of the AVL tree",
+        "success": True,
+        "data": {"shards": avl_tree.describe(), "splits": avl_tree.splits}
+    }
+
+
+@router.get("/traversal/inorder")
+def inorder_traversal(after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1),
+                      version: Optional[int] = None, avl_tree=Depends(get_sharded_tree)):
+    """Recorrido inorden de todos los shards, en orden
+    
+    Paginación opcional: ?after=<último valor recibido>&limit=N
+    """
+    if version is not None:
+        return _unsupported("?version=")
+    result, next_cursor = avl_tree.inorder_page(after, limit)
+    return {
+        "message": "Inorder traversal",
+        "success": True,
+        "data": {"traversal": result, "next_cursor": next_cursor}
+    }
+
+
+@router.get("/range")
+def range_values(lo: int, hi: int, limit: Optional[int] = None, avl_tree=Depends(get_sharded_tree)):
+    """Valores en el intervalo cerrado [lo, hi] en orden (máximo limit valores)"""
+    values = avl_tree.range(lo, hi, limit)
+    return {
+        "message": f"{len(values)} values between {lo} and {hi}",
+        "success": True,
+        "data": {"lo": lo, "hi": hi, "values": values}
+    }
+
+
+@router.get("/rank")
+def rank_value(value: int, avl_tree=Depends(get_sharded_tree)):
+    """Cantidad de valores menores que value"""
+    rank = avl_tree.rank(value)
+    return {
+        "message": f"{rank} values are lower than {value}",
+        "success": True,
+        "data": {"value": value, "rank": rank}
+    }
+
+
+@router.get("/select")
+def select_value(k: int, avl_tree=Depends(get_sharded_tree)):
+    """Retorna el k-ésimo menor valor (k empieza en 0)"""
+    try:
+        value = avl_tree.select(k)
+    except IndexError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
+    
+    return {
+        "message": f"Value at position {k} obtained",
+        "success": True,
+        "data": {"k": k, "value": value}
+    }
+
+
+@router.get("/count-between")
+def count_between(lo: int, hi: int, avl_tree=Depends(get_sharded_tree)):
+    """Cantidad de valores en el intervalo cerrado [lo, hi]"""
+    count = avl_tree.count_between(lo, hi)
+    return {
+        "message": f"{count} values between {lo} and {hi}",
+        "success": True,
+        "data": {"lo": lo, "hi": hi, "count": count}
+    }
+
+
+@router.get("/median")
+def get_median(avl_tree=Depends(get_sharded_tree)):
+    """Mediana de los valores de todos los shards"""
+    try:
+        median = avl_tree.median()
+    except IndexError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
+    
+    return {
+        "message": "Median obtained",
+        "success": True,
+        "data": {"median": median}
+    }
+
+
+@router.get("/percentile")
+def get_percentile(p: float, avl_tree=Depends(get_sharded_tree)):
+    """Valor en el percentil p (0-100)"""
+    try:
+        value = avl_tree.percentile(p)
+    except (IndexError, ValueError) as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
+    
+    return {
+        "message": f"Percentile {p} obtained",
+        "success": True,
+        "data": {"p": p, "value": value}
+    }
+
+
+@router.delete("/clear")
+def clear_tree(avl_tree=Depends(get_sharded_tree)):
+    """Vacía todos los shards"""
+    avl_tree.clear()
+    return {
+        "message": "AVL tree cleared successfully",
+        "success": True,
+        "data": {"structure": None}
+    }
+
+
+# Funciones del AVL normal sin equivalente con shards
+@router.get("/traversal/preorder")
+def preorder_traversal():
+    """El preorden depende de la forma de un único árbol"""
+    return _unsupported("Preorder traversal")
+
+
+@router.get("/traversal/postorder")
+def postorder_traversal():
+    """El postorden depende de la forma de un único árbol"""
+    return _unsupported("Postorder traversal")
+
+
+@router.post("/balance")
+def balance_tree():
+    """Cada shard ya es un AVL balanceado y no hay un único árbol que reconstruir"""
+    return _unsupported("Balancing the whole tree")
+
+
+@router.get("/versions")
+def get_versions():
+    """Las versiones publicadas (AVL_PERSISTENT) son de un único árbol"""
+    return _unsupported("Versioned reads")
+
+
+@router.get("/saved-data")
+def get_saved_data():
+    """El orden de inserción se conserva solo dentro de cada shard"""
+    return _unsupported("Saved data")
+
+
+@router.get("/stats")
+def get_stats():
+    """Los contadores del camino caliente viven en cada proceso shard"""
+    return _unsupported("Hot path stats")
+
+
+@router.post("/stats")
+def set_stats():
+    """Los contadores del camino caliente viven en cada proceso shard"""
+    return _unsupported("Hot path stats")
+
+
+@router.api_route("/{tree_name}/{path:path}", methods=["GET", "POST", "DELETE"])
+def named_tree(tree_name: str, path: str):
+    """Los árboles AVL con nombre (/avl/{tree_name}/...) no existen con shards"""
+    return _unsupported("Named AVL trees")
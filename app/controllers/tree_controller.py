@@ -1,25 +1,62 @@
-from fastapi import APIRouter
-from app.services.tree_service import tree
+from typing import Optional
 
-router = APIRouter(prefix="/tree", tags=["Binary Search Tree"])
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse
+from app.controllers.pagination import paginate
+from app.controllers.write_responses import ResponseMode, apply_write_batch, write_data
+from app.controllers.named_trees import create_named_router, get_tree
+from app.controllers.metrics_controller import TimedRoute
+from app.services.write_queue import write_queue_for
+
+router = APIRouter(prefix="/tree", tags=["Binary Search Tree"], route_class=TimedRoute)
 
 
 @router.post("/insert")
-def insert_kid(kid_id: int, name: str = "", age: int = 0):
+def insert_kid(kid_id: int, name: str = "", age: int = 0, response: ResponseMode = "full",
+               tree=Depends(get_tree)):
     """Inserta un Kid en el árbol con ID, nombre y edad
     
     Args:
         kid_id: Identificador único del Kid (requerido)
         name: Nombre del Kid (opcional)
         age: Edad del Kid (opcional)
+        response: Qué se retorna del árbol: none, summary, delta (solo los
+                  nodos modificados) o full (estructura completa, por defecto)
     
     El árbol decide automáticamente si el Kid va a la izquierda o derecha
     comparando su ID con los IDs de otros Kids en el árbol.
+    
+    Con WRITE_COALESCE_MS > 0 summary y full muestran el árbol después de
+    todo el lote en el que se aplicó la escritura, que puede incluir
+    escrituras de otras peticiones que llegaron a la vez.
     """
-    success = tree.insert(kid_id, name, age)
+    # Con WRITE_COALESCE_MS se aplica en un lote junto con las escrituras que
+    # llegan a la vez; el modo delta no, porque describe una sola escritura
+    queue = write_queue_for(tree, apply_write_batch) if response != "delta" else None
+    try:
+        if queue is not None:
+            success, data = queue.submit(("insert", (kid_id, name, age), response))
+        else:
+            # Las escrituras son exclusivas: ninguna lectura ve el árbol a medio modificar
+            with tree.lock.write():
+                if response == "delta":
+                    tree.begin_delta()
+                try:
+                    success = tree.insert(kid_id, name, age)
+                finally:
+                    delta = tree.end_delta() if response == "delta" else None
+                data = write_data(tree, response, delta) if success else None
+    except ValueError as error:
+        # El almacén columnar guarda IDs de 64 bits y edades de 32 bits
+        return {
+            "message": str(error),
+            "success": False
+        }
     
     if success:
-        return {
+        # JSONResponse serializa directo con json.dumps, sin que FastAPI
+        # recorra toda la estructura con jsonable_encoder
+        return JSONResponse({
             "message": f"Kid inserted successfully",
             "success": True,
             "data": {
@@ -28,9 +65,9 @@ def insert_kid(kid_id: int, name: str = "", age: int = 0):
                     "name": name,
                     "age": age
                 },
-                "structure": tree.get_structure()
+                **data
             }
-        }
+        })
     else:
         return {
             "message": f"Kid {kid_id} already exists in the tree",
@@ -39,7 +76,7 @@ def insert_kid(kid_id: int, name: str = "", age: int = 0):
 
 
 @router.post("/kidsbyagerange")
-def kids_by_age_range(min_age: int):
+def kids_by_age_range(min_age: int, tree=Depends(get_tree)):
     """Obtiene todos los Kids con edad mayor o igual a min_age
     
     Args:
@@ -49,7 +86,8 @@ def kids_by_age_range(min_age: int):
     Returns:
         Lista de Kids ordenados por ID que cumplen con el rango de edad
     """
-    kids = tree.get_kids_by_age_range(min_age)
+    with tree.lock.read():
+        kids = tree.get_kids_by_age_range(min_age)
     
     if len(kids) == 0:
         return {
@@ -74,7 +112,7 @@ def kids_by_age_range(min_age: int):
 
 
 @router.post("/kidsbygroupedages")
-def kids_by_grouped_ages(range_size: int):
+def kids_by_grouped_ages(range_size: int, tree=Depends(get_tree)):
     """Agrupa los Kids por rangos de edad y muestra la cantidad en cada rango
     
     Args:
@@ -93,7 +131,8 @@ def kids_by_grouped_ages(range_size: int):
             "data": {"ranges": []}
         }
     
-    ranges = tree.get_kids_grouped_by_age_ranges(range_size)
+    with tree.lock.read():
+        ranges = tree.get_kids_grouped_by_age_ranges(range_size)
     
     total_kids = sum(r['quantity'] for r in ranges)
     
@@ -109,9 +148,10 @@ def kids_by_grouped_ages(range_size: int):
 
 
 @router.post("/search")
-def search_kid(kid_id: int):
+def search_kid(kid_id: int, tree=Depends(get_tree)):
     """Busca un Kid por ID en el árbol"""
-    found = tree.search(kid_id)
+    with tree.lock.read():
+        found = tree.search(kid_id)
     
     return {
         "message": f"Kid {kid_id} {'found' if found else 'not found'}",
@@ -121,18 +161,31 @@ def search_kid(kid_id: int):
 
 
 @router.delete("/prune")
-def prune_kid(kid_id: int):
-    """Elimina un Kid del árbol por ID (poda un nodo)"""
-    # First check if it exists
-    exists = tree.search(kid_id)
+def prune_kid(kid_id: int, response: ResponseMode = "full", tree=Depends(get_tree)):
+    """Elimina un Kid del árbol por ID (poda un nodo)
+    
+    ?response=none|summary|delta|full elige qué se retorna (ver /insert).
+    """
+    queue = write_queue_for(tree, apply_write_batch) if response != "delta" else None
+    if queue is not None:
+        exists, data = queue.submit(("prune", (kid_id,), response))
+    else:
+        with tree.lock.write():
+            # prune() ya dice si el Kid estaba: una sola bajada por el árbol
+            if response == "delta":
+                tree.begin_delta()
+            try:
+                exists = tree.prune(kid_id)
+            finally:
+                delta = tree.end_delta() if response == "delta" else None
+            data = write_data(tree, response, delta) if exists else None
     
     if exists:
-        tree.prune(kid_id)
-        return {
+        return JSONResponse({
             "message": f"Kid {kid_id} pruned successfully",
             "success": True,
-            "data": {"structure": tree.get_structure()}
-        }
+            "data": data
+        })
     else:
         return {
             "message": f"Kid {kid_id} does not exist in the tree",
@@ -141,9 +194,10 @@ def prune_kid(kid_id: int):
 
 
 @router.get("/structure")
-def get_structure():
+def get_structure(tree=Depends(get_tree)):
     """Muestra la estructura completa del árbol"""
-    structure = tree.get_structure()
+    with tree.lock.read():
+        structure = tree.get_structure()
     
     if structure is None:
         return {
@@ -152,68 +206,157 @@ def get_structure():
             "data": {"structure": None}
         }
     
-    return {
+    return JSONResponse({
         "message": "Tree structure obtained",
         "success": True,
         "data": {"structure": structure}
-    }
+    })
 
 
 @router.get("/traversal/inorder")
-def inorder_traversal():
-    """Recorrido inorden: izquierda -> raíz -> derecha"""
-    result = tree.inorder()
+def inorder_traversal(after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1),
+                      tree=Depends(get_tree)):
+    """Recorrido inorden: izquierda -> raíz -> derecha
+    
+    Paginación opcional: ?after=<último valor recibido>&limit=N
+    """
+    try:
+        with tree.lock.read():
+            result, next_cursor = paginate(tree.iter_inorder, after, limit)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
     
     return {
         "message": "Inorder traversal",
         "success": True,
-        "data": {"traversal": result}
+        "data": {"traversal": result, "next_cursor": next_cursor}
     }
 
 
 @router.get("/traversal/preorder")
-def preorder_traversal():
-    """Recorrido preorden: raíz -> izquierda -> derecha"""
-    result = tree.preorder()
+def preorder_traversal(after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1),
+                       tree=Depends(get_tree)):
+    """Recorrido preorden: raíz -> izquierda -> derecha
+    
+    Paginación opcional: ?after=<último valor recibido>&limit=N
+    """
+    try:
+        with tree.lock.read():
+            result, next_cursor = paginate(tree.iter_preorder, after, limit)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
     
     return {
         "message": "Preorder traversal",
         "success": True,
-        "data": {"traversal": result}
+        "data": {"traversal": result, "next_cursor": next_cursor}
     }
 
 
 @router.get("/traversal/postorder")
-def postorder_traversal():
-    """Recorrido postorden: izquierda -> derecha -> raíz"""
-    result = tree.postorder()
+def postorder_traversal(after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1),
+                        tree=Depends(get_tree)):
+    """Recorrido postorden: izquierda -> derecha -> raíz
+    
+    Paginación opcional: ?after=<último valor recibido>&limit=N
+    """
+    try:
+        with tree.lock.read():
+            result, next_cursor = paginate(tree.iter_postorder, after, limit)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
     
     return {
         "message": "Postorder traversal",
         "success": True,
-        "data": {"traversal": result}
+        "data": {"traversal": result, "next_cursor": next_cursor}
     }
 
 
 @router.get("/saved-data")
-def get_saved_data():
-    """Muestra todos los IDs de Kids guardados en el árbol"""
-    data = tree.get_saved_data()
+def get_saved_data(after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1),
+                   tree=Depends(get_tree)):
+    """Muestra todos los IDs de Kids guardados en el árbol
+    
+    Paginación opcional: ?after=<último valor recibido>&limit=N
+    """
+    try:
+        with tree.lock.read():
+            data, next_cursor = paginate(tree.iter_saved_data, after, limit)
+    except ValueError as error:
+        return {
+            "message": str(error),
+            "success": False
+        }
     
     return {
         "message": "Saved Kid IDs in the tree",
         "success": True,
-        "data": {"kid_ids": data}
+        "data": {"kid_ids": data, "next_cursor": next_cursor}
+    }
+
+
+@router.get("/stats")
+def get_stats(tree=Depends(get_tree)):
+    """Contadores del camino caliente: nodos visitados y comparaciones por
+    operación, distribución de profundidades
+    
+    Se activan con POST /stats?enabled=true o al arrancar con TREE_STATS=1.
+    """
+    with tree.lock.read():
+        stats = tree.get_stats()
+    
+    if stats is None:
+        return {
+            "message": "Hot path stats are disabled (POST /stats?enabled=true or TREE_STATS=1)",
+            "success": False
+        }
+    
+    return {
+        "message": "Hot path stats of the tree",
+        "success": True,
+        "data": stats
+    }
+
+
+@router.post("/stats")
+def set_stats(enabled: bool = True, tree=Depends(get_tree)):
+    """Activa (con los contadores en cero) o desactiva los contadores del camino caliente"""
+    # Con el candado de escritura ninguna operación en curso ve el cambio a la mitad
+    with tree.lock.write():
+        if enabled:
+            tree.enable_stats()
+        else:
+            tree.disable_stats()
+    
+    return {
+        "message": "Hot path stats " + ("enabled" if enabled else "disabled"),
+        "success": True,
+        "data": {"enabled": enabled}
     }
 
 
 @router.delete("/clear")
-def clear_tree():
+def clear_tree(tree=Depends(get_tree)):
     """Limpia todo el árbol (poda completa)"""
-    tree.clear()
+    with tree.lock.write():
+        tree.clear()
     
     return {
         "message": "Tree cleared successfully",
         "success": True,
         "data": {"structure": None}
     }
+
+
+# Las mismas rutas para árboles con nombre: /tree/{tree_name}/...
+named_router = create_named_router(router, tags=["Binary Search Tree (named)"])
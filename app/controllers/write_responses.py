@@ -0,0 +1,99 @@
+from contextlib import nullcontext
+from itertools import groupby
+from typing import Literal
+
+# Modos de respuesta de los endpoints de escritura (?response=...)
+#   none:    solo el mensaje
+#   summary: cantidad de valores, raíz (y altura en el AVL)
+#   delta:   nodos modificados, rotaciones y nuevas alturas
+#   full:    estructura completa del árbol (comportamiento original)
+ResponseMode = Literal["none", "summary", "delta", "full"]
+
+
+def write_data(tree, mode, delta=None):
+    """Arma la parte "data" de la respuesta de una escritura según el modo
+    
+    Args:
+        tree: Árbol que se modificó
+        mode: Uno de los valores de ResponseMode
+        delta: Resultado de tree.end_delta() (solo para el modo "delta")
+    """
+    if mode == "none":
+        return {}
+    if mode == "summary":
+        return {"summary": tree.summary()}
+    if mode == "delta" and not delta["rebuilt"]:
+        return {"delta": delta}
+    
+    # Un árbol reconstruido cambia por completo: el delta sería toda la estructura
+    data = {"structure": tree.get_structure()}
+    if mode == "delta":
+        data["delta"] = delta
+    return data
+
+
+def apply_write_batch(tree, entries):
+    """Aplica un lote de escrituras agrupadas (ver app/services/write_queue.py)
+    
+    Args:
+        tree: AVLTree, ArenaAVLTree o BinarySearchTree
+        entries: Tuplas (operación, argumentos, modo) en orden de llegada, con
+                 operación "insert" o "prune" y modo distinto de "delta"
+    
+    Todo el lote se aplica con un solo candado de escritura y un solo flush
+    del WAL. En el AVL cada racha de inserciones seguidas se aplica con un
+    solo insert_many (ordenado y con una sola decisión de reconstruir). En el
+    BST no: su forma depende del orden de inserción, así que se inserta en
+    orden de llegada.
+    
+    "data" se arma una sola vez por modo de respuesta, con el árbol como
+    quedó después de todo el lote: cada escritura ve también las demás
+    escrituras de su lote, no el estado justo después de la suya.
+    
+    Retorna por escritura (éxito, data), o la ValueError de esa escritura.
+    """
+    results = [None] * len(entries)
+    with tree.lock.write():
+        with tree.wal.group() if tree.wal is not None else nullcontext():
+            for operation, run in groupby(enumerate(entries), key=lambda item: item[1][0]):
+                run = [(index, args) for index, (_, args, _) in run]
+                if operation == "insert":
+                    _apply_inserts(tree, run, results)
+                else:
+                    for index, (key,) in run:
+                        results[index] = tree.prune(key)
+        
+        rendered = {}
+        for index, (_, _, mode) in enumerate(entries):
+            if results[index] is True:
+                if mode not in rendered:
+                    rendered[mode] = write_data(tree, mode)
+                results[index] = (True, rendered[mode])
+            elif results[index] is False:
+                results[index] = (False, None)
+    return results
+
+
+def _apply_inserts(tree, run, results):
+    """Aplica una racha de inserciones de apply_write_batch"""
+    if hasattr(tree, "insert_many"):
+        # Una inserción tiene éxito si el valor no está en el árbol ni lo
+        # insertó antes otra escritura de la misma racha
+        new_values = {}
+        for index, (value,) in run:
+            results[index] = value not in tree.saved_data and value not in new_values
+            new_values[value] = None
+        try:
+            tree.insert_many(list(new_values))
+            return
+        except ValueError:
+            # Algún valor no entra en la arena: insert_many no insertó
+            # ninguno, así que se insertan de a uno y cada escritura recibe
+            # su propio error
+            pass
+    
+    for index, args in run:
+        try:
+            results[index] = tree.insert(*args)
+        except ValueError as error:
+            results[index] = error
@@ -1,5 +1,6 @@
 from app.models.kid_model import Kid
 from app.models.tree_model import Node
 from app.models.avl_model import AVLNode
+from app.models.kid_store import KidStore
 
-__all__ = ['Kid', 'Node', 'AVLNode']
\ No newline at end of file
+__all__ = ['Kid', 'Node', 'AVLNode', 'KidStore']
\ No newline at end of file
@@ -6,8 +6,14 @@ class AVLNode:
         value: El valor del nodo
         children: Lista de 2 elementos [izquierdo, derecho]
         height: Altura del nodo (usado para balanceo)
+        size: Cantidad de nodos del subárbol que empieza en este nodo
+              (usado para rank/select en O(log n))
+        cache: Diccionario serializado del subárbol, o None si hay que
+               reconstruirlo porque el subárbol cambió
     """
     def __init__(self, value):
         self.value = value
         self.children = [None, None]  # children[0] = izquierdo, children[1] = derecho
         self.height = 1  # La altura inicial de un nodo es 1
+        self.size = 1  # Un nodo nuevo solo se cuenta a sí mismo
+        self.cache = None  # Se calcula la primera vez que se pide la estructura
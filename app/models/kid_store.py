@@ -0,0 +1,98 @@
+from array import array
+
+from app.models.kid_model import Kid
+
+
+class KidStore:
+    """
+    Almacén columnar de Kids.
+    
+    En lugar de un objeto Kid por niño (cada uno con su __dict__, su str y sus
+    enteros), los datos se guardan por columnas en arreglos tipados y cada Kid
+    se identifica por su posición (slot):
+        ids[slot]        -> ID del Kid
+        ages[slot]       -> Edad del Kid
+        name_codes[slot] -> Código del nombre en la lista names
+    
+    Los nombres se codifican con un diccionario: cada nombre distinto se
+    guarda una sola vez y los Kids que se llaman igual comparten el código.
+    Cada código cuenta cuántos Kids lo usan; cuando el último se elimina el
+    nombre se olvida y el código se reutiliza, así la lista de nombres no
+    crece con nombres que ya no tiene ningún Kid.
+    Los slots de los Kids eliminados se reutilizan mediante una lista libre.
+    """
+    def __init__(self):
+        self.ids = array('q')
+        self.ages = array('i')
+        self.name_codes = array('i')
+        self.names = []  # código -> nombre ("" si el código está libre)
+        self._codes_by_name = {}  # nombre -> código
+        self._name_counts = array('q')  # código -> Kids que usan el nombre
+        self._free_codes = array('i')  # Códigos sin Kids para reutilizar
+        self._free = array('q')
+    
+    def add(self, kid_id: int, name: str = "", age: int = 0):
+        """Guarda un Kid y retorna el slot asignado
+        
+        Lanza ValueError si el ID no cabe en 64 bits o la edad en 32 bits.
+        """
+        if not -2 ** 63 <= kid_id < 2 ** 63:
+            raise ValueError(f"Kid ID {kid_id} is outside the 64-bit integer range")
+        if not -2 ** 31 <= age < 2 ** 31:
+            raise ValueError(f"Age {age} is outside the 32-bit integer range")
+        
+        code = self._codes_by_name.get(name)
+        if code is None:
+            if self._free_codes:
+                code = self._free_codes.pop()
+                self.names[code] = name
+            else:
+                code = len(self.names)
+                self.names.append(name)
+                self._name_counts.append(0)
+            self._codes_by_name[name] = code
+        self._name_counts[code] += 1
+        
+        if self._free:
+            slot = self._free.pop()
+            self.ids[slot] = kid_id
+            self.ages[slot] = age
+            self.name_codes[slot] = code
+            return slot
+        
+        self.ids.append(kid_id)
+        self.ages.append(age)
+        self.name_codes.append(code)
+        return len(self.ids) - 1
+    
+    def release(self, slot: int):
+        """Libera el slot de un Kid eliminado para que pueda reutilizarse
+        
+        Si era el último Kid con ese nombre, también se libera el código.
+        """
+        code = self.name_codes[slot]
+        self._name_counts[code] -= 1
+        if self._name_counts[code] == 0:
+            del self._codes_by_name[self.names[code]]
+            self.names[code] = ""
+            self._free_codes.append(code)
+        self._free.append(slot)
+    
+    def name(self, slot: int):
+        """Nombre del Kid guardado en slot"""
+        return self.names[self.name_codes[slot]]
+    
+    def get(self, slot: int):
+        """Reconstruye el Kid guardado en slot"""
+        return Kid(self.ids[slot], self.name(slot), self.ages[slot])
+    
+    def to_dict(self, slot: int):
+        """Diccionario del Kid en slot (igual que Kid.to_dict())"""
+        return {
+            "id": self.ids[slot],
+            "name": self.names[self.name_codes[slot]],
+            "age": self.ages[slot]
+        }
+    
+    def __len__(self):
+        return len(self.ids) - len(self._free)
@@ -1,14 +1,33 @@
-from app.models.kid_model import Kid
-
-
 class Node:
     """
     Clase simple que representa un nodo del árbol.
     
     Atributos:
-        kid: El Kid almacenado en el nodo
+        slot: Posición del Kid en el KidStore del árbol (ver KidStore)
         children: Lista de 2 elementos [izquierdo, derecho] - nodos hijos en el árbol
+        cache: Diccionario serializado del subárbol, o None si hay que
+               reconstruirlo porque el subárbol cambió
+    
+    El nodo no guarda un objeto Kid, solo su slot: los datos del Kid viven en
+    las columnas del KidStore. __slots__ evita el __dict__ de cada nodo.
     """
-    def __init__(self, kid: Kid):
-        self.kid = kid
+    __slots__ = ('slot', 'children', 'cache')
+    
+    def __init__(self, slot: int):
+        self.slot = slot
         self.children = [None, None]  # children[0] = izquierdo, children[1] = derecho
+        self.cache = None  # Se calcula la primera vez que se pide la estructura
+
+
+class SizedNode(Node):
+    """
+    Nodo que además guarda el tamaño de su subárbol (lo usa ScapegoatTree).
+    
+    Atributos:
+        size: Cantidad de nodos del subárbol con raíz en este nodo
+    """
+    __slots__ = ('size',)
+    
+    def __init__(self, slot: int):
+        super().__init__(slot)
+        self.size = 1
@@ -0,0 +1,667 @@
+# Servicio AVL con almacenamiento en arena (arreglos paralelos)
+# En lugar de un objeto AVLNode por valor, cada nodo es una posición (slot) en
+# varios arreglos tipados de enteros: valor, hijo izquierdo, hijo derecho,
+# altura y tamaño del subárbol. Esto evita el __dict__, la lista children y
+# los enteros "boxeados" de cada nodo, reduciendo mucho la memoria por nodo.
+#
+# El slot 0 es un centinela que representa "sin nodo" (altura 0, tamaño 0),
+# así los cálculos de altura y tamaño no necesitan preguntar por None.
+# Los slots de los nodos podados se reutilizan mediante una lista libre.
+
+from array import array
+from bisect import bisect_left
+
+from app.services.avl_service import AVLTree
+
+INT64_MIN = -(2 ** 63)
+INT64_MAX = 2 ** 63 - 1
+
+# Subárboles que _rebuild reparte entre los procesos de un executor
+PARALLEL_SUBTREES = 64
+
+
+def fill_balanced_layout(ranges, left, right, sizes, heights, offset=0, stop_at=None):
+    """Llena las columnas de un árbol balanceado nivel por nivel
+    
+    Cada rango (start, end) de slots es un subárbol cuya raíz es el slot del
+    medio; los datos del slot s se escriben en la posición s - offset de las
+    columnas. Con stop_at se detiene en el primer nivel que tenga al menos
+    stop_at rangos y los retorna sin llenar; si no, retorna una lista vacía.
+    """
+    while ranges:
+        if stop_at is not None and len(ranges) >= stop_at:
+            return ranges
+        next_ranges = []
+        for start, end in ranges:
+            mid = (start + end) >> 1
+            size = end - start + 1
+            sizes[mid - offset] = size
+            heights[mid - offset] = size.bit_length()
+            if start < mid:
+                left[mid - offset] = (start + mid - 1) >> 1
+                next_ranges.append((start, mid - 1))
+            if mid < end:
+                right[mid - offset] = (mid + 1 + end) >> 1
+                next_ranges.append((mid + 1, end))
+        ranges = next_ranges
+    return ranges
+
+
+def balanced_layout(start, end):
+    """Columnas (left, right, sizes, heights) del subárbol balanceado de los
+    slots start..end, para armarlo en otro proceso (ver ArenaAVLTree._rebuild)"""
+    count = end - start + 1
+    left = array('q', bytes(8 * count))
+    right = array('q', bytes(8 * count))
+    sizes = array('q', bytes(8 * count))
+    heights = array('b', bytes(count))
+    fill_balanced_layout([(start, end)], left, right, sizes, heights, offset=start)
+    return left, right, sizes, heights
+
+
+class ArenaAVLTree(AVLTree):
+    """Árbol AVL de enteros guardado en arreglos, con la misma API que AVLTree"""
+    
+    BYTES_PER_VALUE = 100
+    
+    def __init__(self):
+        super().__init__()
+        self._reset_storage()
+    
+    def _reset_storage(self):
+        """Vacía los arreglos dejando solo el centinela del slot 0"""
+        self._values = array('q', [0])  # Valor de cada nodo
+        self._left = array('q', [0])  # Slot del hijo izquierdo (0 = ninguno)
+        self._right = array('q', [0])  # Slot del hijo derecho (0 = ninguno)
+        self._heights = array('b', [0])  # Altura (un AVL de 2^63 nodos mide < 127)
+        self._sizes = array('q', [0])  # Cantidad de nodos del subárbol
+        self._free = array('q')  # Slots liberados para reutilizar
+        self._cache = [None]  # Diccionario serializado de cada subárbol (None = inválido)
+        self._root = 0
+    
+    @property
+    def root(self):
+        """Slot de la raíz, o None si el árbol está vacío"""
+        return self._root or None
+    
+    @root.setter
+    def root(self, slot):
+        self._root = slot or 0
+    
+    # ============================================
+    # MANEJO DE SLOTS
+    # ============================================
+    
+    def _allocate(self, value):
+        """Reserva un slot para un nuevo nodo hoja y retorna su índice"""
+        if self._free:
+            slot = self._free.pop()
+            self._values[slot] = value
+            self._left[slot] = 0
+            self._right[slot] = 0
+            self._heights[slot] = 1
+            self._sizes[slot] = 1
+            self._cache[slot] = None
+            return slot
+        
+        self._values.append(value)
+        self._left.append(0)
+        self._right.append(0)
+        self._heights.append(1)
+        self._sizes.append(1)
+        self._cache.append(None)
+        return len(self._values) - 1
+    
+    def _check_value(self, value):
+        """Los arreglos solo guardan enteros de 64 bits con signo"""
+        if not INT64_MIN <= value <= INT64_MAX:
+            raise ValueError(f"Value {value} is outside the 64-bit integer range")
+    
+    def memory_usage(self):
+        """Bytes ocupados por los arreglos de la arena (incluye slots libres)"""
+        arrays = (self._values, self._left, self._right, self._heights, self._sizes, self._free)
+        return sum(len(a) * a.itemsize for a in arrays)
+    
+    # ============================================
+    # ALTURAS, TAMAÑOS Y ROTACIONES
+    # ============================================
+    
+    def _get_height(self, slot):
+        """Obtiene la altura de un nodo (0 para el centinela)"""
+        return self._heights[slot or 0]
+    
+    def _get_balance(self, slot):
+        """Factor de balance: altura izquierda - altura derecha"""
+        return self._heights[self._left[slot]] - self._heights[self._right[slot]]
+    
+    def _get_size(self, slot):
+        """Cantidad de nodos del subárbol (0 para el centinela)"""
+        return self._sizes[slot or 0]
+    
+    def _update_height(self, slot):
+        """Actualiza la altura y el tamaño del subárbol de un nodo"""
+        left = self._left[slot]
+        right = self._right[slot]
+        self._heights[slot] = 1 + max(self._heights[left], self._heights[right])
+        self._sizes[slot] = 1 + self._sizes[left] + self._sizes[right]
+    
+    def _rotate_right(self, y):
+        """Rotación simple a la derecha (ver AVLTree._rotate_right)"""
+        x = self._left[y]  # x es el hijo izquierdo de y
+        self._left[y] = self._right[x]  # T2 pasa a ser hijo izquierdo de y
+        self._right[x] = y  # y se convierte en hijo derecho de x
+        self._update_height(y)
+        self._update_height(x)
+        self._cache[y] = self._cache[x] = None
+        self.rotations += 1
+        if self._delta is not None:
+            self._delta.rotation("right", self._values[y], self._values[x])
+            self._delta.touch(y)
+            self._delta.touch(x)
+        return x
+    
+    def _rotate_left(self, x):
+        """Rotación simple a la izquierda (ver AVLTree._rotate_left)"""
+        y = self._right[x]  # y es el hijo derecho de x
+        self._right[x] = self._left[y]  # T2 pasa a ser hijo derecho de x
+        self._left[y] = x  # x se convierte en hijo izquierdo de y
+        self._update_height(x)
+        self._update_height(y)
+        self._cache[x] = self._cache[y] = None
+        self.rotations += 1
+        if self._delta is not None:
+            self._delta.rotation("left", self._values[x], self._values[y])
+            self._delta.touch(x)
+            self._delta.touch(y)
+        return y
+    
+    def _rebalance(self, slot):
+        """Aplica la rotación necesaria (mismos 4 casos que AVLTree._rebalance)"""
+        balance = self._get_balance(slot)
+        
+        if balance > 1:
+            # Left-Right: primero rotar el hijo izquierdo a la izquierda
+            double = self._get_balance(self._left[slot]) < 0
+            if double:
+                self._left[slot] = self._rotate_left(self._left[slot])
+            if self._stats is not None:
+                self._stats.rebalance(double)
+            # Left-Left
+            return self._rotate_right(slot)
+        
+        if balance < -1:
+            # Right-Left: primero rotar el hijo derecho a la derecha
+            double = self._get_balance(self._right[slot]) > 0
+            if double:
+                self._right[slot] = self._rotate_right(self._right[slot])
+            if self._stats is not None:
+                self._stats.rebalance(double)
+            # Right-Right
+            return self._rotate_left(slot)
+        
+        return slot
+    
+    def _set_child(self, slot, direction, child):
+        """Cuelga child como hijo izquierdo (0) o derecho (1) de slot"""
+        if direction == 0:
+            self._left[slot] = child
+        else:
+            self._right[slot] = child
+    
+    def _retrace(self, path):
+        """Sube por el camino actualizando alturas, tamaños y rebalanceando"""
+        heights, cache = self._heights, self._cache
+        if self._delta is not None:
+            for slot, _ in path:
+                self._delta.touch(slot)
+        
+        while path:
+            slot, _ = path.pop()
+            cache[slot] = None
+            old_height = heights[slot]
+            self._update_height(slot)
+            subtree = self._rebalance(slot)
+            
+            if path:
+                self._set_child(path[-1][0], path[-1][1], subtree)
+            else:
+                self._root = subtree
+            
+            if subtree == slot and heights[slot] == old_height:
+                break
+        
+        # Los ancestros restantes mantienen su altura pero cambian de tamaño
+        sizes, left, right = self._sizes, self._left, self._right
+        for slot, _ in reversed(path):
+            sizes[slot] = 1 + sizes[left[slot]] + sizes[right[slot]]
+            cache[slot] = None
+    
+    # ============================================
+    # INSERTAR, BUSCAR Y PODAR
+    # ============================================
+    
+    def insert(self, value):
+        """Inserta un valor en el árbol y lo balancea automáticamente"""
+        if value in self.saved_data:
+            return False
+        self._check_value(value)
+        self.saved_data[value] = None
+        
+        if self._root == 0:
+            self._root = self._allocate(value)
+            if self._delta is not None:
+                self._delta.touch(self._root)
+        else:
+            self._insert_iterative(value)
+        
+        self._log("insert", value)
+        return True
+    
+    def insert_many(self, values):
+        """Inserta muchos valores de una vez (ver AVLTree.insert_many)"""
+        values = list(values)
+        for value in values:
+            self._check_value(value)
+        return super().insert_many(values)
+    
+    def _insert_iterative(self, value):
+        """Inserta un valor bajando con una pila explícita de (slot, dirección)"""
+        values, left, right = self._values, self._left, self._right
+        path = []
+        slot = self._root
+        while slot:
+            current = values[slot]
+            if value < current:
+                path.append((slot, 0))
+                slot = left[slot]
+            elif value > current:
+                path.append((slot, 1))
+                slot = right[slot]
+            else:
+                return False
+        
+        if self._stats is not None:
+            self._stats.record("insert", len(path))
+        parent, direction = path[-1]
+        slot = self._allocate(value)
+        self._set_child(parent, direction, slot)
+        if self._delta is not None:
+            self._delta.touch(slot)
+        self._retrace(path)
+        return True
+    
+    def search(self, value):
+        """Busca un valor en el árbol"""
+        if self._stats is not None:
+            return self._search_counted(value)
+        values, left, right = self._values, self._left, self._right
+        slot = self._root
+        while slot:
+            current = values[slot]
+            if value == current:
+                return True
+            slot = left[slot] if value < current else right[slot]
+        return False
+    
+    def _search_counted(self, value):
+        """search() contando nodos visitados y comparaciones (ver AVLTree._search_counted)"""
+        values, left, right = self._values, self._left, self._right
+        nodes = comparisons = 0
+        found = False
+        slot = self._root
+        while slot:
+            current = values[slot]
+            nodes += 1
+            comparisons += 1
+            if value == current:
+                found = True
+                break
+            comparisons += 1
+            slot = left[slot] if value < current else right[slot]
+        self._stats.record("search", nodes, comparisons)
+        return found
+    
+    def _prune_iterative(self, value):
+        """Poda un valor y libera su slot para reutilizarlo"""
+        values, left, right = self._values, self._left, self._right
+        path = []
+        slot = self._root
+        while slot and values[slot] != value:
+            direction = 0 if value < values[slot] else 1
+            path.append((slot, direction))
+            slot = left[slot] if direction == 0 else right[slot]
+        
+        if self._stats is not None:
+            self._stats.record("prune", len(path) + bool(slot))
+        if not slot:
+            return False
+        
+        # Nodo con dos hijos: se copia el sucesor inorden y se poda el sucesor
+        if left[slot] and right[slot]:
+            path.append((slot, 1))
+            successor = right[slot]
+            while left[successor]:
+                path.append((successor, 0))
+                successor = left[successor]
+            values[slot] = values[successor]
+            slot = successor
+        
+        replacement = left[slot] or right[slot]
+        if path:
+            self._set_child(path[-1][0], path[-1][1], replacement)
+        else:
+            self._root = replacement
+        self._free.append(slot)
+        self._cache[slot] = None
+        
+        self._retrace(path)
+        return True
+    
+    def prune_range(self, lo, hi):
+        """Poda todos los valores de [lo, hi] de una vez (ver AVLTree.prune_range)
+        
+        Cada slot podado vuelve a la lista libre, así que en lugar de partir y
+        unir se elige lo más barato, como en insert_many: pocos valores se
+        podan uno por uno, O(k log n); muchos se descartan reconstruyendo
+        el resto, O(n), que además compacta la arena.
+        """
+        removed = self.range(lo, hi)
+        if not removed:
+            return 0
+        for value in removed:
+            del self.saved_data[value]
+        
+        total = self.size()
+        if len(removed) * total.bit_length() >= total:
+            self._rebuild(self.range(INT64_MIN, lo - 1) + self.range(hi + 1, INT64_MAX))
+        else:
+            for value in removed:
+                self._prune_iterative(value)
+            if self._delta is not None:
+                # Los slots podados volvieron a la lista libre: ya no son
+                # nodos del árbol, así que no se reportan como modificados
+                for slot in self._free[-len(removed):]:
+                    self._delta.nodes.pop(slot, None)
+        self._log("prune_range", lo, hi)
+        return len(removed)
+    
+    def _rebuild(self, values, executor=None):
+        """Reemplaza el árbol por uno balanceado, compactando la arena
+        
+        Es la misma forma que arma _build_balanced_tree (la raíz de cada
+        rango es su elemento del medio), pero sin recursión ni un slot
+        asignado por nodo: el valor i-ésimo (en orden) va en el slot i + 1,
+        así los valores se copian de una vez y el resto de las columnas se
+        llena recorriendo los rangos nivel por nivel. En un subárbol armado
+        así la altura es el número de bits de su tamaño.
+        
+        Con un executor (p. ej. un ProcessPoolExecutor) aquí se llenan solo
+        los primeros niveles; los PARALLEL_SUBTREES subárboles de abajo
+        ocupan rangos de slots contiguos e independientes, así que cada
+        proceso arma las columnas de uno y aquí se copian de una vez.
+        """
+        if self._delta is not None:
+            self._delta.rebuilt = True
+        self._reset_storage()
+        
+        n = len(values)
+        self._values.extend(values)
+        left = self._left = array('q', bytes(8 * (n + 1)))
+        right = self._right = array('q', bytes(8 * (n + 1)))
+        sizes = self._sizes = array('q', bytes(8 * (n + 1)))
+        heights = self._heights = array('b', bytes(n + 1))
+        self._cache = [None] * (n + 1)
+        
+        ranges = [(1, n)] if n else []
+        if executor is None:
+            fill_balanced_layout(ranges, left, right, sizes, heights)
+        else:
+            pending = fill_balanced_layout(ranges, left, right, sizes, heights,
+                                           stop_at=PARALLEL_SUBTREES)
+            starts = [start for start, _ in pending]
+            ends = [end for _, end in pending]
+            for start, end, columns in zip(starts, ends, executor.map(balanced_layout, starts, ends)):
+                subtree = slice(start, end + 1)
+                left[subtree], right[subtree], sizes[subtree], heights[subtree] = columns
+        self._root = (1 + n) >> 1
+    
+    # ============================================
+    # ESTADÍSTICAS DE ORDEN Y RANGOS
+    # ============================================
+    
+    def _count_below(self, value, inclusive):
+        """Cuenta los valores < value (o <= value si inclusive es True)"""
+        values, left, right, sizes = self._values, self._left, self._right, self._sizes
+        count = 0
+        slot = self._root
+        while slot:
+            current = values[slot]
+            if current < value or (inclusive and current == value):
+                count += 1 + sizes[left[slot]]
+                slot = right[slot]
+            else:
+                slot = left[slot]
+        return count
+    
+    def select(self, k):
+        """Retorna el k-ésimo menor valor (k empieza en 0), en O(log n)"""
+        if k < 0 or k >= self.size():
+            raise IndexError(f"k must be between 0 and {self.size() - 1}")
+        
+        left, right, sizes = self._left, self._right, self._sizes
+        slot = self._root
+        while True:
+            left_size = sizes[left[slot]]
+            if k < left_size:
+                slot = left[slot]
+            elif k == left_size:
+                return self._values[slot]
+            else:
+                k -= left_size + 1
+                slot = right[slot]
+    
+    def range(self, lo, hi, limit=None):
+        """Valores en el intervalo cerrado [lo, hi] en orden, en O(log n + k)"""
+        result = []
+        if limit is not None and limit <= 0:
+            return result
+        
+        values, left, right = self._values, self._left, self._right
+        stack = []
+        slot = self._root
+        while True:
+            while slot:
+                if values[slot] < lo:
+                    slot = right[slot]
+                else:
+                    stack.append(slot)
+                    slot = left[slot]
+            if not stack:
+                return result
+            slot = stack.pop()
+            if values[slot] > hi:
+                return result
+            result.append(values[slot])
+            if limit is not None and len(result) >= limit:
+                return result
+            slot = right[slot]
+    
+    # ============================================
+    # RECORRIDOS
+    # ============================================
+    
+    def inorder(self):
+        """Recorrido inorden: izquierda -> raíz -> derecha"""
+        return list(self.iter_inorder())
+    
+    def preorder(self):
+        """Recorrido preorden: raíz -> izquierda -> derecha"""
+        return list(self.iter_preorder())
+    
+    def postorder(self):
+        """Recorrido postorden: izquierda -> derecha -> raíz"""
+        return list(self.iter_postorder())
+    
+    def _path_to(self, key):
+        """Camino (slot, dirección) hasta key y el slot de key (ValueError si no está)"""
+        values, left, right = self._values, self._left, self._right
+        path = []
+        slot = self._root
+        while slot and values[slot] != key:
+            direction = 0 if key < values[slot] else 1
+            path.append((slot, direction))
+            slot = left[slot] if direction == 0 else right[slot]
+        if not slot:
+            raise ValueError(f"Cursor {key} is not in the tree")
+        return path, slot
+    
+    def iter_inorder(self, after=None):
+        """Generador del recorrido inorden (ver AVLTree.iter_inorder)"""
+        values, left, right = self._values, self._left, self._right
+        stack = []
+        slot = self._root
+        if after is not None:
+            while slot:
+                if values[slot] > after:
+                    stack.append(slot)
+                    slot = left[slot]
+                else:
+                    slot = right[slot]
+        while True:
+            while slot:
+                stack.append(slot)
+                slot = left[slot]
+            if not stack:
+                return
+            slot = stack.pop()
+            yield values[slot]
+            slot = right[slot]
+    
+    def iter_preorder(self, after=None):
+        """Generador del recorrido preorden (ver AVLTree.iter_preorder)"""
+        values, left, right = self._values, self._left, self._right
+        if after is None:
+            stack = [self._root] if self._root else []
+        else:
+            path, slot = self._path_to(after)
+            stack = [right[ancestor] for ancestor, direction in path
+                     if direction == 0 and right[ancestor]]
+            if right[slot]:
+                stack.append(right[slot])
+            if left[slot]:
+                stack.append(left[slot])
+        while stack:
+            slot = stack.pop()
+            yield values[slot]
+            if right[slot]:
+                stack.append(right[slot])
+            if left[slot]:
+                stack.append(left[slot])
+    
+    def iter_postorder(self, after=None):
+        """Generador del recorrido postorden (ver AVLTree.iter_postorder)"""
+        values, left, right = self._values, self._left, self._right
+        if after is None:
+            stack = [(self._root, False)] if self._root else []
+        else:
+            path, _ = self._path_to(after)
+            stack = []
+            for ancestor, direction in path:
+                stack.append((ancestor, True))
+                if direction == 0 and right[ancestor]:
+                    stack.append((right[ancestor], False))
+        while stack:
+            slot, children_ready = stack.pop()
+            if children_ready:
+                yield values[slot]
+                continue
+            stack.append((slot, True))
+            if right[slot]:
+                stack.append((right[slot], False))
+            if left[slot]:
+                stack.append((left[slot], False))
+    
+    def _describe_node(self, slot):
+        """Datos de un solo nodo; los hijos se indican por su valor"""
+        left, right = self._left[slot], self._right[slot]
+        return {
+            "value": self._values[slot],
+            "height": self._heights[slot],
+            "balance": self._heights[left] - self._heights[right],
+            "size": self._sizes[slot],
+            "children": [
+                self._values[left] if left else None,
+                self._values[right] if right else None
+            ]
+        }
+    
+    def _node_to_dict(self, slot):
+        """Convierte un subárbol a diccionarios reutilizando la caché por slot"""
+        if not slot:
+            return None
+        
+        values, left, right, heights, cache = (
+            self._values, self._left, self._right, self._heights, self._cache)
+        if cache[slot] is not None:
+            return cache[slot]
+        
+        stack = [(slot, False)]
+        while stack:
+            current, children_ready = stack.pop()
+            left_slot, right_slot = left[current], right[current]
+            if not children_ready:
+                stack.append((current, True))
+                if right_slot and cache[right_slot] is None:
+                    stack.append((right_slot, False))
+                if left_slot and cache[left_slot] is None:
+                    stack.append((left_slot, False))
+                continue
+            cache[current] = {
+                "value": values[current],
+                "height": heights[current],
+                "balance": heights[left_slot] - heights[right_slot],
+                "children": [cache[left_slot], cache[right_slot]]
+            }
+        return cache[slot]
+    
+    # ============================================
+    # SPLIT Y JOIN
+    # ============================================
+    
+    def split(self, key):
+        """Parte el árbol en (valores < key, valores >= key), ver AVLTree.split
+        
+        Cada árbol en arena tiene sus propios arreglos, así que los nodos no
+        pueden pasar de un árbol a otro: cada mitad se copia a una arena
+        nueva con una construcción balanceada, O(n).
+        """
+        values = self.inorder()
+        middle = bisect_left(values, key)
+        left, right = ArenaAVLTree(), ArenaAVLTree()
+        left.load_sorted(values[:middle], [value for value in self.saved_data if value < key])
+        right.load_sorted(values[middle:], [value for value in self.saved_data if value >= key])
+        self.clear()
+        return left, right
+    
+    @classmethod
+    def join(cls, left, pivot, right):
+        """Une dos árboles y un pivote en un árbol nuevo, ver AVLTree.join
+        
+        Igual que split, copia los valores a una arena nueva, O(n).
+        """
+        left_values, right_values = left.inorder(), right.inorder()
+        if (left_values and left_values[-1] >= pivot) or (right_values and right_values[0] <= pivot):
+            raise ValueError("join needs every value of left < pivot < every value of right")
+        tree = cls()
+        tree._check_value(pivot)
+        tree.load_sorted(left_values + [pivot] + right_values,
+                         list(left.saved_data) + [pivot] + list(right.saved_data))
+        left.clear()
+        right.clear()
+        return tree
+    
+    def clear(self):
+        """Limpia todo el árbol y libera los arreglos"""
+        self._reset_storage()
+        self.saved_data = {}
+        self._log("clear")
@@ -4,15 +4,45 @@
 # garantizando operaciones de inserción, búsqueda y eliminación en tiempo O(log n).
 # El balanceo se logra mediante rotaciones simples (izquierda/derecha) y dobles (LR/RL).
 
+import os
+
 from app.models.avl_model import AVLNode
+from app.services.hot_path_stats import HotPathStats
+from app.services.locking import RWLock
+from app.services.tree_delta import TreeDelta
 
 
 class AVLTree:
     """Clase para manejar el Árbol AVL (Árbol de Altura Balanceada)"""
     
-    def __init__(self):
+    # Memoria aproximada por valor (nodo + saved_data), medida con tracemalloc;
+    # la usa el registro de árboles con nombre para su presupuesto de memoria
+    BYTES_PER_VALUE = 240
+    
+    def __init__(self, persistent=False, max_versions=100):
         self.root = None  # La raíz del árbol
-        self.saved_data = []  # Lista para guardar todos los valores insertados
+        # Valores insertados: el dict conserva el orden de inserción y permite
+        # comprobar si un valor existe y borrarlo en O(1)
+        self.saved_data = {}
+        # Registro de cambios de la escritura en curso (None = no se registra)
+        self._delta = None
+        # Lecturas en paralelo y escrituras exclusivas (lo usan los controladores)
+        self.lock = RWLock()
+        # Registro de escrituras en disco (ver app/services/wal.py); None = sin registro
+        self.wal = None
+        # Cola que agrupa escrituras concurrentes (ver app/services/write_queue.py)
+        self.write_queue = None
+        # Rotaciones hechas desde que se creó el árbol (las expone /metrics)
+        self.rotations = 0
+        # Contadores del camino caliente (None = desactivados, ver enable_stats)
+        self._stats = None
+        # Modo persistente (path copying): una escritura nunca modifica un nodo
+        # ya publicado, copia el camino desde la raíz y publica una raíz nueva
+        self.persistent = persistent
+        self.max_versions = max_versions
+        self.version = 0
+        self._versions = {0: None}  # versión -> raíz publicada (las más recientes)
+        self._fresh = set()  # Nodos creados por la escritura en curso
     
     def _get_height(self, node):
         """Obtiene la altura de un nodo"""
@@ -26,11 +56,18 @@ class AVLTree:
             return 0
         return self._get_height(node.children[0]) - self._get_height(node.children[1])
     
+    def _get_size(self, node):
+        """Obtiene la cantidad de nodos del subárbol"""
+        if node is None:
+            return 0
+        return node.size
+    
     def _update_height(self, node):
-        """Actualiza la altura de un nodo"""
+        """Actualiza la altura y el tamaño del subárbol de un nodo"""
         if node is not None:
             node.height = 1 + max(self._get_height(node.children[0]), 
                                   self._get_height(node.children[1]))
+            node.size = 1 + self._get_size(node.children[0]) + self._get_size(node.children[1])
     
     def _rotate_right(self, y):
         """
@@ -51,6 +88,10 @@ class AVLTree:
         4. y baja y se convierte en hijo derecho de x
         5. T2 pasa a ser hijo izquierdo de y
         """
+        if self.persistent:
+            # En la poda se puede rotar un hermano que no está en el camino copiado
+            y = self._own(y)
+            y.children[0] = self._own(y.children[0])
         x = y.children[0]  # x es el hijo izquierdo de y
         T2 = x.children[1]  # T2 es el subárbol derecho de x
         
@@ -62,6 +103,16 @@ class AVLTree:
         self._update_height(y)
         self._update_height(x)
         
+        # Sus diccionarios serializados ya no son válidos
+        y.cache = None
+        x.cache = None
+        
+        self.rotations += 1
+        if self._delta is not None:
+            self._delta.rotation("right", y.value, x.value)
+            self._delta.touch(y)
+            self._delta.touch(x)
+        
         return x  # x es la nueva raíz
     
     def _rotate_left(self, x):
@@ -83,6 +134,9 @@ class AVLTree:
         4. x baja y se convierte en hijo izquierdo de y
         5. T2 pasa a ser hijo derecho de x
         """
+        if self.persistent:
+            x = self._own(x)
+            x.children[1] = self._own(x.children[1])
         y = x.children[1]  # y es el hijo derecho de x
         T2 = y.children[0]  # T2 es el subárbol izquierdo de y
         
@@ -94,45 +148,240 @@ class AVLTree:
         self._update_height(x)
         self._update_height(y)
         
+        # Sus diccionarios serializados ya no son válidos
+        x.cache = None
+        y.cache = None
+        
+        self.rotations += 1
+        if self._delta is not None:
+            self._delta.rotation("left", x.value, y.value)
+            self._delta.touch(x)
+            self._delta.touch(y)
+        
         return y  # y es la nueva raíz
     
     def insert(self, value):
         """Inserta un valor en el árbol AVL y lo balancea automáticamente"""
-        # Guardar el valor en la lista
-        if value not in self.saved_data:
-            self.saved_data.append(value)
+        # Los datos guardados reflejan el contenido del árbol, así que sirven
+        # para rechazar duplicados sin recorrerlo
+        if value in self.saved_data:
+            return False
+        self.saved_data[value] = None
         
         # Si el árbol está vacío, crear la raíz
         if self.root is None:
             self.root = AVLNode(value)
-            return True
-        
-        # Verificar si el valor ya existe
-        if self.search(value):
-            return False
+            if self._delta is not None:
+                self._delta.touch(self.root)
+        else:
+            # Insertar y balancear
+            self._insert_iterative(value)
         
-        # Insertar y balancear
-        self.root = self._insert_recursive(self.root, value)
+        self._publish()
+        self._log("insert", value)
         return True
     
-    def _insert_recursive(self, node, value):
-        """Función recursiva para insertar un valor y balancear"""
-        # Si llegamos a None, crear el nuevo nodo
-        if node is None:
-            return AVLNode(value)
+    def _log(self, *record):
+        """Agrega la escritura al registro en disco (WAL), si hay uno"""
+        if self.wal is not None:
+            self.wal.append(record)
+    
+    def insert_many(self, values):
+        """Inserta muchos valores de una sola vez
+        
+        El lote se ordena y se le quitan los duplicados. Después se elige la
+        estrategia más barata:
+        - Lote pequeño frente al árbol: insertar uno por uno, O(k log n).
+        - Lote grande: mezclar con el inorden actual y reconstruir el árbol
+          completo con _build_balanced_tree, O(n + k).
+        
+        Retorna la cantidad de valores nuevos insertados.
+        """
+        saved_data = self.saved_data
+        current_size = len(saved_data)
+        
+        # Guardar solo los valores nuevos, respetando el orden del lote
+        new_values = []
+        for value in values:
+            if value not in saved_data:
+                saved_data[value] = None
+                new_values.append(value)
         
-        # Insertar recursivamente
-        if value < node.value:
-            node.children[0] = self._insert_recursive(node.children[0], value)
-        elif value > node.value:
-            node.children[1] = self._insert_recursive(node.children[1], value)
+        if not new_values:
+            return 0
+        # El WAL guarda el lote en su orden original (el de saved_data)
+        batch = new_values
+        new_values = sorted(new_values)
+        
+        # Reconstruir sale más barato cuando k * log(n) supera a n + k
+        total = current_size + len(new_values)
+        if len(new_values) * total.bit_length() >= total:
+            # sorted() detecta las dos secuencias ya ordenadas y las mezcla en O(n + k)
+            self._rebuild(sorted(self.inorder() + new_values))
         else:
-            # El valor ya existe, no insertar
+            for value in new_values:
+                self._insert_iterative(value)
+        self._publish()
+        # Después de aplicarlo: si el registro dispara una compactación, el
+        # snapshot ya ve el lote en el árbol y no solo en saved_data
+        self._log("insert_many", batch)
+        
+        return len(new_values)
+    
+    def _insert_iterative(self, value):
+        """Inserta un valor sin recursión y rebalancea subiendo por el camino
+        
+        En lugar de usar la pila de llamadas de Python, se guarda en una pila
+        explícita (path) cada nodo visitado junto con la dirección tomada
+        (0 = izquierda, 1 = derecha). Así no existe límite de profundidad.
+        """
+        path = []
+        node = self.root
+        
+        # Bajar hasta encontrar el lugar del nuevo nodo
+        while node is not None:
+            if value < node.value:
+                direction = 0
+            elif value > node.value:
+                direction = 1
+            else:
+                # El valor ya existe, no insertar
+                return False
+            path.append((node, direction))
+            node = node.children[direction]
+        
+        if self._stats is not None:
+            self._stats.record("insert", len(path))
+        if self.persistent:
+            path = self._copy_path(path)
+        
+        # Colgar el nuevo nodo del último nodo visitado
+        parent, direction = path[-1]
+        parent.children[direction] = new_node = AVLNode(value)
+        if self.persistent:
+            self._fresh.add(new_node)
+        if self._delta is not None:
+            self._delta.touch(new_node)
+        
+        # Subir actualizando alturas y rebalanceando
+        self._retrace(path)
+        return True
+    
+    def _own(self, node):
+        """Retorna una versión del nodo que la escritura en curso puede modificar
+        
+        Los nodos creados por esta escritura se modifican directamente; los
+        demás pertenecen a versiones publicadas y se copian. La copia empieza
+        sin cache, el nodo original conserva la suya.
+        """
+        if node in self._fresh:
             return node
+        copy = AVLNode(node.value)
+        copy.children = node.children[:]
+        copy.height = node.height
+        copy.size = node.size
+        self._fresh.add(copy)
+        return copy
+    
+    def _copy_path(self, path):
+        """Copia los nodos del camino (path copying) y los enlaza entre sí
         
-        # Actualizar la altura del nodo actual
-        self._update_height(node)
+        La raíz pasa a ser la copia del primer nodo del camino. Retorna el
+        camino con las copias, listo para modificarse y rebalancearse.
+        """
+        copied = []
+        for node, direction in path:
+            node = self._own(node)
+            if copied:
+                parent, parent_direction = copied[-1]
+                parent.children[parent_direction] = node
+            else:
+                self.root = node
+            copied.append((node, direction))
+        return copied
+    
+    def _publish(self):
+        """Publica la raíz actual como una nueva versión (solo en modo persistente)
+        
+        Se conservan las últimas max_versions versiones.
+        """
+        if not self.persistent:
+            return
+        self.version += 1
+        self._versions[self.version] = self.root
+        if len(self._versions) > self.max_versions:
+            del self._versions[next(iter(self._versions))]
+        self._fresh = set()
+    
+    def versions(self):
+        """Versiones publicadas que todavía se pueden leer (de la más antigua a la actual)"""
+        return list(self._versions) if self.persistent else []
+    
+    def snapshot(self, version=None):
+        """Vista de solo lectura del árbol tal como quedó en una versión publicada
         
+        Sin version se usa la última publicada. Los nodos publicados nunca se
+        modifican, así que la vista se puede recorrer mientras llegan
+        escrituras. Lanza ValueError si el árbol no es persistente o la
+        versión ya no se conserva.
+        """
+        if not self.persistent:
+            raise ValueError("Versioned reads need a persistent tree (AVL_PERSISTENT=1)")
+        if version is None:
+            version = self.version
+        try:
+            root = self._versions[version]
+        except KeyError:
+            raise ValueError(f"Version {version} is not available") from None
+        
+        view = AVLTree()
+        view.root = root
+        view.version = version
+        return view
+    
+    def _retrace(self, path):
+        """Sube por el camino guardado actualizando alturas y rebalanceando
+        
+        Las alturas y rotaciones se detienen en cuanto un nodo no cambia de
+        altura ni necesita rotación; a partir de ahí solo se corrige el tamaño
+        de los ancestros. Todos los nodos del camino pierden su diccionario
+        serializado (cache), porque cambió algo dentro de su subárbol.
+        """
+        if self._delta is not None:
+            for node, _ in path:
+                self._delta.touch(node)
+        
+        while path:
+            node, _ = path.pop()
+            node.cache = None
+            old_height = node.height
+            
+            # Actualizar la altura del nodo actual
+            self._update_height(node)
+            
+            # Rebalancear si es necesario
+            subtree = self._rebalance(node)
+            
+            # Volver a colgar el subárbol (puede tener nueva raíz tras rotar)
+            if path:
+                parent, direction = path[-1]
+                parent.children[direction] = subtree
+            else:
+                self.root = subtree
+            
+            if subtree is node and node.height == old_height:
+                break
+        
+        # Los ancestros restantes mantienen su altura pero cambian de tamaño
+        for node, _ in reversed(path):
+            node.size = 1 + self._get_size(node.children[0]) + self._get_size(node.children[1])
+            node.cache = None
+    
+    def _rebalance(self, node):
+        """Aplica la rotación necesaria a un nodo desbalanceado
+        
+        Retorna la nueva raíz del subárbol (el mismo nodo si no hubo rotación).
+        """
         # Obtener el factor de balance (balance > 1 = izquierda pesada, balance < -1 = derecha pesada)
         balance = self._get_balance(node)
         
@@ -140,138 +389,186 @@ class AVLTree:
         # 4 CASOS DE BALANCEO EN ÁRBOL AVL
         # ============================================
         
-        # CASO 1: Rotación simple derecha (Left-Left Case)
-        # Ocurre cuando se inserta en el subárbol izquierdo del hijo izquierdo
-        # El árbol está "cargado" hacia la izquierda-izquierda
-        #     z                y
-        #    / \              / \
-        #   y   T4    →      x   z
-        #  / \              / \ / \
-        # x  T3            T1 T2 T3 T4
-        if balance > 1 and value < node.children[0].value:
+        if balance > 1:
+            # CASO 3: Rotación doble izquierda-derecha (Left-Right Case)
+            # Ocurre cuando el hijo izquierdo está cargado a la derecha
+            # Primero rotamos el hijo izquierdo a la izquierda, luego el nodo a la derecha
+            #     z              z                x
+            #    / \            / \              / \
+            #   y   T4   →     x   T4    →      y   z
+            #  / \            / \              / \ / \
+            # T1  x          y  T3            T1 T2 T3 T4
+            #    / \        / \
+            #   T2 T3      T1 T2
+            double = self._get_balance(node.children[0]) < 0
+            if double:
+                node.children[0] = self._rotate_left(node.children[0])  # Primera rotación
+            if self._stats is not None:
+                self._stats.rebalance(double)
+            
+            # CASO 1: Rotación simple derecha (Left-Left Case)
+            # El árbol está "cargado" hacia la izquierda-izquierda
+            #     z                y
+            #    / \              / \
+            #   y   T4    →      x   z
+            #  / \              / \ / \
+            # x  T3            T1 T2 T3 T4
             return self._rotate_right(node)
         
-        # CASO 2: Rotación simple izquierda (Right-Right Case)
-        # Ocurre cuando se inserta en el subárbol derecho del hijo derecho
-        # El árbol está "cargado" hacia la derecha-derecha
-        #   z                  y
-        #  / \                / \
-        # T1  y      →       z   x
-        #    / \            / \ / \
-        #   T2  x          T1 T2 T3 T4
-        if balance < -1 and value > node.children[1].value:
+        if balance < -1:
+            # CASO 4: Rotación doble derecha-izquierda (Right-Left Case)
+            # Ocurre cuando el hijo derecho está cargado a la izquierda
+            # Primero rotamos el hijo derecho a la derecha, luego el nodo a la izquierda
+            #   z                z                 x
+            #  / \              / \               / \
+            # T1  y      →     T1  x      →      z   y
+            #    / \              / \            / \ / \
+            #   x  T4            T2  y          T1 T2 T3 T4
+            #  / \                  / \
+            # T2 T3                T3 T4
+            double = self._get_balance(node.children[1]) > 0
+            if double:
+                node.children[1] = self._rotate_right(node.children[1])  # Primera rotación
+            if self._stats is not None:
+                self._stats.rebalance(double)
+            
+            # CASO 2: Rotación simple izquierda (Right-Right Case)
+            # El árbol está "cargado" hacia la derecha-derecha
+            #   z                  y
+            #  / \                / \
+            # T1  y      →       z   x
+            #    / \            / \ / \
+            #   T2  x          T1 T2 T3 T4
             return self._rotate_left(node)
         
-        # CASO 3: Rotación doble izquierda-derecha (Left-Right Case)
-        # Ocurre cuando se inserta en el subárbol derecho del hijo izquierdo
-        # Primero rotamos el hijo izquierdo a la izquierda, luego el nodo a la derecha
-        #     z              z                x
-        #    / \            / \              / \
-        #   y   T4   →     x   T4    →      y   z
-        #  / \            / \              / \ / \
-        # T1  x          y  T3            T1 T2 T3 T4
-        #    / \        / \
-        #   T2 T3      T1 T2
-        if balance > 1 and value > node.children[0].value:
-            node.children[0] = self._rotate_left(node.children[0])  # Primera rotación
-            return self._rotate_right(node)  # Segunda rotación
-        
-        # CASO 4: Rotación doble derecha-izquierda (Right-Left Case)
-        # Ocurre cuando se inserta en el subárbol izquierdo del hijo derecho
-        # Primero rotamos el hijo derecho a la derecha, luego el nodo a la izquierda
-        #   z                z                 x
-        #  / \              / \               / \
-        # T1  y      →     T1  x      →      z   y
-        #    / \              / \            / \ / \
-        #   x  T4            T2  y          T1 T2 T3 T4
-        #  / \                  / \
-        # T2 T3                T3 T4
-        if balance < -1 and value < node.children[1].value:
-            node.children[1] = self._rotate_right(node.children[1])  # Primera rotación
-            return self._rotate_left(node)  # Segunda rotación
-        
         return node
     
     def search(self, value):
         """Busca un valor en el árbol"""
-        return self._search_recursive(self.root, value)
+        if self._stats is not None:
+            return self._search_counted(value)
+        node = self.root
+        while node is not None:
+            if value == node.value:
+                return True
+            node = node.children[0] if value < node.value else node.children[1]
+        return False
     
-    def _search_recursive(self, node, value):
-        """Función recursiva para buscar un valor"""
-        if node is None:
-            return False
+    def _search_counted(self, value):
+        """search() contando nodos visitados y comparaciones de claves
         
-        if value == node.value:
-            return True
-        
-        if value < node.value:
-            return self._search_recursive(node.children[0], value)
-        else:
-            return self._search_recursive(node.children[1], value)
+        Es una copia del bucle de search() para que el bucle sin contadores
+        no pague nada mientras los contadores están desactivados.
+        """
+        nodes = comparisons = 0
+        found = False
+        node = self.root
+        while node is not None:
+            nodes += 1
+            comparisons += 1
+            if value == node.value:
+                found = True
+                break
+            comparisons += 1
+            node = node.children[0] if value < node.value else node.children[1]
+        self._stats.record("search", nodes, comparisons)
+        return found
     
     def prune(self, value):
-        """Poda (elimina) un valor del árbol y lo balancea"""
-        if value in self.saved_data:
-            self.saved_data.remove(value)
+        """Poda (elimina) un valor del árbol y lo balancea
+        
+        Retorna False si el valor no estaba: no hace falta buscarlo antes.
+        """
+        self.saved_data.pop(value, None)
         
-        self.root = self._prune_recursive(self.root, value)
+        if not self._prune_iterative(value):
+            return False
+        self._publish()
+        self._log("prune", value)
         return True
     
-    def _prune_recursive(self, node, value):
-        """Función recursiva para podar (eliminar) un valor y balancear"""
-        if node is None:
-            return None
+    def _prune_iterative(self, value):
+        """Poda un valor sin recursión y rebalancea subiendo por el camino"""
+        path = []
+        node = self.root
         
         # Buscar el nodo a eliminar
-        if value < node.value:
-            node.children[0] = self._prune_recursive(node.children[0], value)
-        elif value > node.value:
-            node.children[1] = self._prune_recursive(node.children[1], value)
-        else:
-            # Encontramos el nodo a eliminar
-            
-            # Caso 1: Nodo sin hijos o con un solo hijo
-            if node.children[0] is None:
-                return node.children[1]
-            elif node.children[1] is None:
-                return node.children[0]
-            
-            # Caso 2: Nodo con dos hijos
-            # Encontrar el sucesor inorden (el menor del subárbol derecho)
-            min_node = self._find_minimum(node.children[1])
-            node.value = min_node.value
-            node.children[1] = self._prune_recursive(node.children[1], min_node.value)
+        while node is not None and value != node.value:
+            direction = 0 if value < node.value else 1
+            path.append((node, direction))
+            node = node.children[direction]
         
-        # Si el árbol tiene un solo nodo
+        if self._stats is not None:
+            self._stats.record("prune", len(path) + (node is not None))
         if node is None:
-            return node
+            return False
         
-        # Actualizar la altura del nodo actual
-        self._update_height(node)
+        # Caso 2: Nodo con dos hijos
+        # Se copia el sucesor inorden (el menor del subárbol derecho) y se
+        # elimina el sucesor, que como máximo tiene un hijo derecho
+        target_index = None
+        if node.children[0] is not None and node.children[1] is not None:
+            path.append((node, 1))
+            target_index = len(path) - 1
+            successor = node.children[1]
+            while successor.children[0] is not None:
+                path.append((successor, 0))
+                successor = successor.children[0]
+            node = successor
         
-        # Obtener el factor de balance
-        balance = self._get_balance(node)
+        if self.persistent:
+            path = self._copy_path(path)
+        if target_index is not None:
+            path[target_index][0].value = node.value
         
-        # Rebalancear el árbol
-        # Caso 1: Left-Left
-        if balance > 1 and self._get_balance(node.children[0]) >= 0:
-            return self._rotate_right(node)
+        # Caso 1: Nodo sin hijos o con un solo hijo
+        replacement = node.children[0] if node.children[0] is not None else node.children[1]
+        if path:
+            parent, direction = path[-1]
+            parent.children[direction] = replacement
+        else:
+            self.root = replacement
         
-        # Caso 2: Right-Right
-        if balance < -1 and self._get_balance(node.children[1]) <= 0:
-            return self._rotate_left(node)
+        # Subir actualizando alturas y rebalanceando
+        self._retrace(path)
+        return True
+    
+    def prune_range(self, lo, hi):
+        """Poda todos los valores del intervalo cerrado [lo, hi] de una vez
         
-        # Caso 3: Left-Right
-        if balance > 1 and self._get_balance(node.children[0]) < 0:
-            node.children[0] = self._rotate_left(node.children[0])
-            return self._rotate_right(node)
+        En lugar de una poda (y un rebalanceo) por valor, se separan con
+        _split_nodes los valores menores que lo, los del intervalo y los
+        mayores que hi, y los de afuera se vuelven a unir con _join_nodes
+        usando como pivote el menor de la derecha: O(log n) para el árbol y
+        O(k) para quitar los k valores de saved_data.
+        Con un delta activo se registran los O(log n) nodos que las uniones
+        volvieron a enlazar o rotaron.
+        Retorna la cantidad de valores podados.
+        """
+        removed = self.range(lo, hi)
+        if not removed:
+            return 0
+        for value in removed:
+            del self.saved_data[value]
         
-        # Caso 4: Right-Left
-        if balance < -1 and self._get_balance(node.children[1]) > 0:
-            node.children[1] = self._rotate_right(node.children[1])
-            return self._rotate_left(node)
+        left, rest = self._split_nodes(self.root, lo)
+        _, right = self._split_nodes(rest, hi, inclusive=True)
+        if right is not None:
+            right, pivot = self._remove_min(right)
+            left = self._join_nodes(left, pivot, right)
+        self.root = left
+        if self._delta is not None:
+            # Al partir también se unieron los nodos del intervalo, que ya no
+            # están en el árbol: no se reportan ni sus nodos ni sus rotaciones
+            delta = self._delta
+            for node in [node for node in delta.nodes if lo <= node.value <= hi]:
+                del delta.nodes[node]
+            delta.rotations = [rotation for rotation in delta.rotations
+                               if not lo <= rotation["pivot"] <= hi]
         
-        return node
+        self._publish()
+        self._log("prune_range", lo, hi)
+        return len(removed)
     
     def _find_minimum(self, node):
         """Encuentra el nodo con el valor mínimo"""
@@ -285,11 +582,33 @@ class AVLTree:
         if self.root is None:
             return
         
-        # Obtener todos los valores en orden
-        values = self.inorder()
+        # Obtener todos los valores en orden y reconstruir el árbol balanceado
+        self._rebuild(self.inorder())
+        self._publish()
+    
+    def load_sorted(self, values, order=None, executor=None):
+        """Reemplaza el contenido del árbol en O(n), sin rotaciones
         
-        # Reconstruir el árbol balanceado
-        self.root = None
+        Args:
+            values: Valores ordenados y sin repetidos (lista, arreglo o
+                    memoryview, p. ej. leído de un snapshot binario)
+            order: Los mismos valores en orden de inserción para saved_data
+                   (por defecto, el orden de values)
+            executor: Pool de procesos para armar subárboles en paralelo
+                      (ver app/services/bulk_build.py)
+        """
+        self.saved_data = dict.fromkeys(values if order is None else order)
+        self._rebuild(values, executor)
+        self._publish()
+    
+    def _rebuild(self, values, executor=None):
+        """Reemplaza el árbol por uno perfectamente balanceado (values ordenados)
+        
+        Los AVLNode son objetos de este proceso, así que no se pueden armar en
+        otros: el executor solo lo aprovecha el almacenamiento en arena.
+        """
+        if self._delta is not None:
+            self._delta.rebuilt = True
         self.root = self._build_balanced_tree(values, 0, len(values) - 1)
     
     def _build_balanced_tree(self, values, start, end):
@@ -310,44 +629,465 @@ class AVLTree:
         
         return node
     
+    # ============================================
+    # SPLIT Y JOIN
+    # ============================================
+    
+    def _join_nodes(self, left, pivot, right):
+        """Une dos subárboles AVL colgándolos de pivot (left < pivot < right)
+        
+        Se baja por el borde interior del subárbol más alto (el derecho de
+        left o el izquierdo de right) hasta un nodo con a lo sumo un nivel
+        más que el otro subárbol; ahí se cuelga pivot con ambos y se sube
+        rebalanceando. Cuesta O(diferencia de alturas + 1).
+        Retorna la raíz del subárbol unido.
+        """
+        if self.persistent:
+            pivot = self._own(pivot)
+        height_left, height_right = self._get_height(left), self._get_height(right)
+        
+        # direction: hacia dónde se baja dentro del subárbol más alto
+        if height_left > height_right + 1:
+            direction, node, shorter = 1, left, right
+        elif height_right > height_left + 1:
+            direction, node, shorter = 0, right, left
+        else:
+            direction, node, shorter = None, None, None
+        
+        path = []
+        if direction is not None:
+            limit = self._get_height(shorter) + 1
+            while self._get_height(node) > limit:
+                path.append((node, direction))
+                node = node.children[direction]
+            if self.persistent:
+                # Los enlaces entre las copias se rehacen al subir
+                path = [(self._own(parent), parent_direction) for parent, parent_direction in path]
+            left, right = (node, shorter) if direction == 1 else (shorter, node)
+        
+        pivot.children = [left, right]
+        pivot.cache = None
+        self._update_height(pivot)
+        if self._delta is not None:
+            self._delta.touch(pivot)
+        return self._relink(path, pivot)
+    
+    def _relink(self, path, subtree):
+        """Cuelga subtree del final de path y sube rebalanceando cada nodo
+        
+        A diferencia de _retrace no se detiene antes: path es el camino
+        dentro de un subárbol suelto. Retorna la nueva raíz de ese subárbol.
+        """
+        for parent, direction in reversed(path):
+            parent.children[direction] = subtree
+            parent.cache = None
+            self._update_height(parent)
+            if self._delta is not None:
+                self._delta.touch(parent)
+            subtree = self._rebalance(parent)
+        return subtree
+    
+    def _remove_min(self, root):
+        """Saca el menor nodo de un subárbol no vacío, en O(log n)
+        
+        Retorna (nueva raíz del subárbol, nodo sacado).
+        """
+        path = []
+        node = root
+        while node.children[0] is not None:
+            path.append((node, 0))
+            node = node.children[0]
+        if self.persistent:
+            path = [(self._own(parent), direction) for parent, direction in path]
+        return self._relink(path, node.children[1]), node
+    
+    def _split_nodes(self, root, key, inclusive=False):
+        """Parte un subárbol en (valores < key, valores >= key), en O(log n)
+        
+        Con inclusive=True key queda a la izquierda: (valores <= key, valores > key).
+        Se baja buscando key y al subir se une cada nodo del camino con el
+        subárbol que quedó del lado opuesto al camino: las alturas de los
+        pedazos crecen de abajo hacia arriba, así que las uniones suman
+        O(log n) en total.
+        """
+        path = []
+        node = root
+        while node is not None:
+            goes_right = key < node.value if inclusive else key <= node.value
+            path.append((node, goes_right))
+            node = node.children[0] if goes_right else node.children[1]
+        
+        left = right = None
+        for node, goes_right in reversed(path):
+            if goes_right:
+                # El nodo y su subárbol derecho van del lado >= key
+                right = self._join_nodes(right, node, node.children[1])
+            else:
+                left = self._join_nodes(node.children[0], node, left)
+        return left, right
+    
+    def split(self, key):
+        """Parte el árbol en dos árboles AVL: (valores < key, valores >= key)
+        
+        La forma se parte en O(log n) con _split_nodes, sin inorden ni
+        reconstrucción. saved_data (orden de inserción) se reparte con una
+        pasada sobre el dict, O(n) pero mucho más barata que crear n nodos.
+        Los nodos pasan a los árboles nuevos, así que este árbol queda vacío.
+        """
+        left = AVLTree(self.persistent, self.max_versions)
+        right = AVLTree(self.persistent, self.max_versions)
+        left.root, right.root = self._split_nodes(self.root, key)
+        left.saved_data = {value: None for value in self.saved_data if value < key}
+        right.saved_data = {value: None for value in self.saved_data if value >= key}
+        left._publish()
+        right._publish()
+        self.clear()
+        return left, right
+    
+    @classmethod
+    def join(cls, left, pivot, right):
+        """Une dos árboles AVL y un valor pivote en un árbol nuevo
+        
+        Todos los valores de left deben ser menores que pivot y todos los de
+        right mayores (lanza ValueError si no). La forma se une en
+        O(diferencia de alturas + 1) con _join_nodes. saved_data queda con el
+        orden de left, luego pivot y luego el de right: se reutiliza el dict de
+        left y se le agregan los de right, O(tamaño de right).
+        Los nodos pasan al árbol nuevo, así que left y right quedan vacíos.
+        """
+        if (left.root is not None and left.select(left.size() - 1) >= pivot) or \
+                (right.root is not None and right.select(0) <= pivot):
+            raise ValueError("join needs every value of left < pivot < every value of right")
+        
+        tree = cls(left.persistent, left.max_versions)
+        pivot_node = AVLNode(pivot)
+        if tree.persistent:
+            tree._fresh.add(pivot_node)
+        tree.root = tree._join_nodes(left.root, pivot_node, right.root)
+        tree.saved_data = left.saved_data
+        tree.saved_data[pivot] = None
+        tree.saved_data.update(right.saved_data)
+        tree._publish()
+        left.clear()
+        right.clear()
+        return tree
+    
+    def size(self):
+        """Cantidad de valores en el árbol"""
+        return self._get_size(self.root)
+    
+    def height(self):
+        """Altura del árbol (0 si está vacío), en O(1)"""
+        return self._get_height(self.root)
+    
+    def rank(self, value):
+        """Cantidad de valores estrictamente menores que value, en O(log n)
+        
+        En cada nodo donde se baja a la derecha se suman el nodo y todo su
+        subárbol izquierdo, que son menores que value.
+        """
+        return self._count_below(value, inclusive=False)
+    
+    def _count_below(self, value, inclusive):
+        """Cuenta los valores < value (o <= value si inclusive es True)"""
+        count = 0
+        node = self.root
+        while node is not None:
+            if node.value < value or (inclusive and node.value == value):
+                count += 1 + self._get_size(node.children[0])
+                node = node.children[1]
+            else:
+                node = node.children[0]
+        return count
+    
+    def select(self, k):
+        """Retorna el k-ésimo menor valor (k empieza en 0), en O(log n)"""
+        if k < 0 or k >= self.size():
+            raise IndexError(f"k must be between 0 and {self.size() - 1}")
+        
+        node = self.root
+        while True:
+            left_size = self._get_size(node.children[0])
+            if k < left_size:
+                node = node.children[0]
+            elif k == left_size:
+                return node.value
+            else:
+                # Se descartan el subárbol izquierdo y el nodo actual
+                k -= left_size + 1
+                node = node.children[1]
+    
+    def count_between(self, lo, hi):
+        """Cantidad de valores en el intervalo cerrado [lo, hi], en O(log n)"""
+        if lo > hi:
+            return 0
+        return self._count_below(hi, inclusive=True) - self._count_below(lo, inclusive=False)
+    
+    def percentile(self, p):
+        """Valor en el percentil p (0-100) usando el método del rango más cercano"""
+        if p < 0 or p > 100:
+            raise ValueError("p must be between 0 and 100")
+        n = self.size()
+        if n == 0:
+            raise IndexError("The tree is empty")
+        
+        # Rango más cercano: el menor valor que cubre al menos p% de los datos
+        k = max(0, -(-p * n // 100) - 1)
+        return self.select(int(k))
+    
+    def median(self):
+        """Mediana de los valores (promedio de los dos centrales si n es par)"""
+        n = self.size()
+        if n == 0:
+            raise IndexError("The tree is empty")
+        if n % 2 == 1:
+            return self.select(n // 2)
+        return (self.select(n // 2 - 1) + self.select(n // 2)) / 2
+    
+    def range(self, lo, hi, limit=None):
+        """Valores en el intervalo cerrado [lo, hi] en orden, en O(log n + k)
+        
+        Es un inorden que solo baja a los subárboles que pueden tener valores
+        dentro del intervalo: si un nodo es menor que lo se ignora su
+        subárbol izquierdo, y al encontrar un valor mayor que hi se termina.
+        
+        Args:
+            lo: Límite inferior (inclusive)
+            hi: Límite superior (inclusive)
+            limit: Cantidad máxima de valores a retornar (opcional)
+        """
+        result = []
+        if limit is not None and limit <= 0:
+            return result
+        
+        stack = []
+        node = self.root
+        while True:
+            # Bajar por la izquierda solo mientras pueda haber valores >= lo
+            while node is not None:
+                if node.value < lo:
+                    node = node.children[1]
+                else:
+                    stack.append(node)
+                    node = node.children[0]
+            if not stack:
+                return result
+            node = stack.pop()
+            if node.value > hi:
+                return result
+            result.append(node.value)
+            if limit is not None and len(result) >= limit:
+                return result
+            node = node.children[1]
+    
     def inorder(self):
         """Recorrido inorden: izquierda -> raíz -> derecha"""
         result = []
-        self._inorder_recursive(self.root, result)
-        return result
-    
-    def _inorder_recursive(self, node, result):
-        """Función recursiva para recorrido inorden"""
-        if node is not None:
-            self._inorder_recursive(node.children[0], result)
-            result.append(node.value)
-            self._inorder_recursive(node.children[1], result)
+        stack = []
+        push, pop, emit = stack.append, stack.pop, result.append
+        node = self.root
+        while True:
+            # Bajar por la izquierda guardando los nodos pendientes
+            while node is not None:
+                push(node)
+                node = node.children[0]
+            if not stack:
+                return result
+            node = pop()
+            emit(node.value)
+            node = node.children[1]
     
     def preorder(self):
         """Recorrido preorden: raíz -> izquierda -> derecha"""
         result = []
-        self._preorder_recursive(self.root, result)
-        return result
-    
-    def _preorder_recursive(self, node, result):
-        """Función recursiva para recorrido preorden"""
-        if node is not None:
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
             result.append(node.value)
-            self._preorder_recursive(node.children[0], result)
-            self._preorder_recursive(node.children[1], result)
+            # Se apila primero el derecho para visitar antes el izquierdo
+            if node.children[1] is not None:
+                stack.append(node.children[1])
+            if node.children[0] is not None:
+                stack.append(node.children[0])
+        return result
     
     def postorder(self):
         """Recorrido postorden: izquierda -> derecha -> raíz"""
+        # Se recorre raíz -> derecha -> izquierda y se invierte el resultado
         result = []
-        self._postorder_recursive(self.root, result)
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            result.append(node.value)
+            if node.children[0] is not None:
+                stack.append(node.children[0])
+            if node.children[1] is not None:
+                stack.append(node.children[1])
+        result.reverse()
         return result
     
-    def _postorder_recursive(self, node, result):
-        """Función recursiva para recorrido postorden"""
-        if node is not None:
-            self._postorder_recursive(node.children[0], result)
-            self._postorder_recursive(node.children[1], result)
-            result.append(node.value)
+    def _path_to(self, key):
+        """Camino (nodo, dirección) desde la raíz hasta key y el nodo de key
+        
+        Lanza ValueError si key no está en el árbol.
+        """
+        path = []
+        node = self.root
+        while node is not None and node.value != key:
+            direction = 0 if key < node.value else 1
+            path.append((node, direction))
+            node = node.children[direction]
+        if node is None:
+            raise ValueError(f"Cursor {key} is not in the tree")
+        return path, node
+    
+    def iter_inorder(self, after=None):
+        """Generador del recorrido inorden (sin armar la lista completa)
+        
+        Args:
+            after: Cursor opcional. Si se indica, el recorrido continúa con el
+                   primer valor mayor que after, en O(log n) para reanudar.
+        """
+        stack = []
+        node = self.root
+        if after is not None:
+            # Reconstruir la pila como si ya se hubiera visitado hasta after
+            while node is not None:
+                if node.value > after:
+                    stack.append(node)
+                    node = node.children[0]
+                else:
+                    node = node.children[1]
+        while True:
+            while node is not None:
+                stack.append(node)
+                node = node.children[0]
+            if not stack:
+                return
+            node = stack.pop()
+            yield node.value
+            node = node.children[1]
+    
+    def iter_preorder(self, after=None):
+        """Generador del recorrido preorden
+        
+        Args:
+            after: Cursor opcional (un valor ya recibido). El recorrido continúa
+                   justo después de él; lanza ValueError si ya no está en el árbol.
+        """
+        if after is None:
+            stack = [self.root] if self.root is not None else []
+        else:
+            # Pendientes: los hijos derechos de los ancestros donde se bajó
+            # por la izquierda, y luego los hijos del propio cursor
+            path, node = self._path_to(after)
+            stack = [ancestor.children[1] for ancestor, direction in path
+                     if direction == 0 and ancestor.children[1] is not None]
+            if node.children[1] is not None:
+                stack.append(node.children[1])
+            if node.children[0] is not None:
+                stack.append(node.children[0])
+        while stack:
+            node = stack.pop()
+            yield node.value
+            if node.children[1] is not None:
+                stack.append(node.children[1])
+            if node.children[0] is not None:
+                stack.append(node.children[0])
+    
+    def iter_postorder(self, after=None):
+        """Generador del recorrido postorden
+        
+        Cada entrada de la pila es (nodo, hijos_listos): un nodo se entrega
+        cuando sus dos subárboles ya se recorrieron.
+        
+        Args:
+            after: Cursor opcional (un valor ya recibido). El recorrido continúa
+                   justo después de él; lanza ValueError si ya no está en el árbol.
+        """
+        if after is None:
+            stack = [(self.root, False)] if self.root is not None else []
+        else:
+            # Cada ancestro queda pendiente; si se bajó por su izquierda,
+            # también falta recorrer su subárbol derecho
+            path, _ = self._path_to(after)
+            stack = []
+            for ancestor, direction in path:
+                stack.append((ancestor, True))
+                if direction == 0 and ancestor.children[1] is not None:
+                    stack.append((ancestor.children[1], False))
+        while stack:
+            node, children_ready = stack.pop()
+            if children_ready:
+                yield node.value
+                continue
+            stack.append((node, True))
+            if node.children[1] is not None:
+                stack.append((node.children[1], False))
+            if node.children[0] is not None:
+                stack.append((node.children[0], False))
+    
+    def begin_delta(self):
+        """Empieza a registrar los cambios de la próxima escritura"""
+        self._delta = TreeDelta()
+    
+    def end_delta(self):
+        """Deja de registrar y retorna los cambios de la escritura
+        
+        Returns:
+            Diccionario con las rotaciones realizadas y los nodos modificados
+            con su nueva altura, balance, tamaño e hijos. Si la escritura
+            reconstruyó el árbol completo, rebuilt es True y no se listan nodos.
+        """
+        delta, self._delta = self._delta, None
+        return {
+            "rebuilt": delta.rebuilt,
+            "root": self._describe_node(self.root)["value"] if self.root is not None else None,
+            "rotations": delta.rotations,
+            "changed_nodes": [] if delta.rebuilt else [self._describe_node(node) for node in delta.nodes]
+        }
+    
+    def enable_stats(self):
+        """Activa los contadores del camino caliente (empiezan en cero)"""
+        self._stats = HotPathStats()
+    
+    def disable_stats(self):
+        """Desactiva los contadores y descarta lo contado"""
+        self._stats = None
+    
+    def get_stats(self):
+        """Contadores del camino caliente (ver HotPathStats.to_dict), None si están desactivados"""
+        if self._stats is None:
+            return None
+        return self._stats.to_dict(self.size(), self.height())
+    
+    def _describe_node(self, node):
+        """Datos de un solo nodo; los hijos se indican por su valor"""
+        left, right = node.children
+        return {
+            "value": node.value,
+            "height": node.height,
+            "balance": self._get_balance(node),
+            "size": node.size,
+            "children": [
+                left.value if left is not None else None,
+                right.value if right is not None else None
+            ]
+        }
+    
+    def summary(self):
+        """Resumen del árbol: cantidad de valores, altura y raíz
+        
+        En modo persistente incluye la versión publicada por la escritura.
+        """
+        summary = {
+            "size": self.size(),
+            "height": self._get_height(self.root),
+            "root": self._describe_node(self.root)["value"] if self.root is not None else None
+        }
+        if self.persistent:
+            summary["version"] = self.version
+        return summary
     
     def get_structure(self):
         """Obtiene la estructura del árbol en formato diccionario"""
@@ -356,29 +1096,102 @@ class AVLTree:
         return self._node_to_dict(self.root)
     
     def _node_to_dict(self, node):
-        """Convierte un nodo a diccionario con información de altura"""
+        """Convierte un nodo a diccionario con información de altura
+        
+        Cada nodo guarda su diccionario en node.cache. Las escrituras borran
+        la caché de los nodos de su camino (y de los rotados), así que aquí
+        solo se reconstruyen esos O(log n) nodos; el resto de los subárboles
+        reutiliza su diccionario ya armado.
+        """
         if node is None:
             return None
+        if node.cache is not None:
+            return node.cache
         
-        return {
-            "value": node.value,
-            "height": node.height,
-            "balance": self._get_balance(node),
-            "children": [
-                self._node_to_dict(node.children[0]),
-                self._node_to_dict(node.children[1])
-            ]
-        }
+        # Postorden con pila explícita, bajando solo a los nodos sin caché
+        stack = [(node, False)]
+        while stack:
+            current, children_ready = stack.pop()
+            left, right = current.children
+            if not children_ready:
+                stack.append((current, True))
+                if right is not None and right.cache is None:
+                    stack.append((right, False))
+                if left is not None and left.cache is None:
+                    stack.append((left, False))
+                continue
+            current.cache = {
+                "value": current.value,
+                "height": current.height,
+                "balance": self._get_balance(current),
+                "children": [
+                    left.cache if left is not None else None,
+                    right.cache if right is not None else None
+                ]
+            }
+        return node.cache
     
     def get_saved_data(self):
         """Retorna todos los datos que han sido insertados"""
-        return self.saved_data
+        return list(self.saved_data)
+    
+    def iter_saved_data(self, after=None):
+        """Generador de los valores guardados en orden de inserción
+        
+        Args:
+            after: Cursor opcional (un valor ya recibido). Lanza ValueError si
+                   ya no está guardado. El dict no permite saltar directo a
+                   una posición, así que reanudar cuesta O(posición del cursor).
+        """
+        saved = iter(self.saved_data)
+        if after is not None:
+            if after not in self.saved_data:
+                raise ValueError(f"Cursor {after} is not in the saved data")
+            for value in saved:
+                if value == after:
+                    break
+        yield from saved
     
     def clear(self):
         """Limpia todo el árbol"""
         self.root = None
-        self.saved_data = []
+        self.saved_data = {}
+        self._publish()
+        self._log("clear")
+
+
+def create_avl_tree(storage="objects", persistent=False, max_versions=100):
+    """Crea un árbol AVL con el almacenamiento indicado
+    
+    Args:
+        storage: "objects" (un AVLNode por valor) o "arena" (arreglos
+                 compactos de enteros, ver ArenaAVLTree)
+        persistent: Copiar caminos en cada escritura y conservar versiones
+                    para lecturas con ?version= (solo con "objects")
+        max_versions: Cantidad de versiones publicadas que se conservan
+    """
+    if storage == "arena":
+        if persistent:
+            raise ValueError("The arena storage does not support persistent mode")
+        from app.services.avl_arena_service import ArenaAVLTree
+        return ArenaAVLTree()
+    if storage == "objects":
+        return AVLTree(persistent, max_versions)
+    raise ValueError(f"Unknown AVL storage: {storage}")
+
+
+def create_configured_avl_tree():
+    """Crea un árbol AVL configurado con las variables de entorno
+    
+    Con AVL_STORAGE=arena se usa el almacenamiento compacto y con
+    AVL_PERSISTENT=1 cada escritura publica una versión de solo lectura.
+    """
+    return create_avl_tree(
+        os.environ.get("AVL_STORAGE", "objects"),
+        persistent=os.environ.get("AVL_PERSISTENT", "0") == "1",
+        max_versions=int(os.environ.get("AVL_MAX_VERSIONS", "100"))
+    )
 
 
 # Instancia global del árbol AVL
-avl_tree = AVLTree()
+avl_tree = create_configured_avl_tree()
@@ -0,0 +1,97 @@
+# Carga masiva de un árbol AVL usando varios núcleos
+# Ordenar millones de valores y armar el árbol balanceado en un solo proceso
+# usa un solo núcleo. La carga masiva reparte el trabajo en un
+# ProcessPoolExecutor:
+#
+#   1. Se eligen parts - 1 separadores con una muestra de la entrada.
+#   2. Cada proceso ordena un pedazo de la entrada y lo corta por los
+#      separadores.
+#   3. Cada proceso une los cortes de un mismo rango: los rangos quedan
+#      ordenados y sin solaparse, así que basta concatenarlos.
+#   4. En el almacenamiento en arena cada proceso arma además las columnas de
+#      un subárbol (rangos de slots contiguos) y aquí se copian bajo los
+#      primeros niveles del árbol (ver ArenaAVLTree._rebuild). Con AVLNode los
+#      nodos se crean en este proceso.
+#
+# Los valores viajan entre procesos como array('q'): se serializan como un
+# bloque de bytes, sin un objeto por entero. Por eso solo se aceptan enteros
+# de 64 bits.
+
+import multiprocessing
+import os
+import random
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+# Debajo de esta cantidad de valores arrancar los procesos cuesta más de lo
+# que se gana y se ordena en este proceso
+PARALLEL_MIN_VALUES = 200_000
+
+
+def _sort_and_cut(chunk, splitters):
+    """Ordena un pedazo de la entrada y lo corta en un arreglo por rango"""
+    run = array('q', sorted(chunk))
+    cuts = [0] + [bisect_left(run, splitter) for splitter in splitters] + [len(run)]
+    return [run[cuts[i]:cuts[i + 1]] for i in range(len(cuts) - 1)]
+
+
+def _merge_runs(*runs):
+    """Une los cortes ordenados de un mismo rango (sorted detecta y mezcla las corridas)"""
+    merged = array('q')
+    for run in runs:
+        merged.extend(run)
+    return array('q', sorted(merged))
+
+
+def parallel_sorted(values, executor, parts):
+    """Ordena valores distintos repartiendo el trabajo por rangos de valores
+    
+    Args:
+        values: array('q') de valores sin repetidos
+        executor: Pool de procesos
+        parts: Cantidad de pedazos y de rangos
+    """
+    sample = sorted(random.Random(len(values)).sample(values, min(len(values), parts * 64)))
+    splitters = sorted({sample[i * len(sample) // parts] for i in range(1, parts)})
+    size = -(-len(values) // parts)
+    chunks = [values[start:start + size] for start in range(0, len(values), size)]
+    cut = list(executor.map(_sort_and_cut, chunks, [splitters] * len(chunks)))
+    result = array('q')
+    for run in executor.map(_merge_runs, *cut):
+        result.extend(run)
+    return result
+
+
+def bulk_build(avl_tree, values, workers=None):
+    """Reemplaza el contenido del árbol por values, usando varios procesos
+    
+    Args:
+        avl_tree: AVLTree o ArenaAVLTree (con el candado de escritura tomado)
+        values: Enteros de 64 bits en cualquier orden; los repetidos se
+                ignoran y saved_data guarda el orden de primera aparición
+        workers: Procesos a usar (por defecto, uno por núcleo). Con 1 o con
+                 pocos valores todo se hace en este proceso.
+    
+    Retorna la cantidad de valores distintos cargados. Con un WAL conectado
+    se guarda un snapshot: el log anterior ya no describe el árbol.
+    """
+    order = dict.fromkeys(values)
+    try:
+        keys = array('q', order)
+    except OverflowError:
+        raise ValueError("Bulk build only accepts 64-bit integers")
+    
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(keys) < PARALLEL_MIN_VALUES:
+        avl_tree.load_sorted(sorted(keys), order)
+    else:
+        # spawn: procesos limpios, sin copiar los hilos ni los candados del
+        # servidor que estén tomados al momento del fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            avl_tree.load_sorted(parallel_sorted(keys, executor, workers), order, executor)
+    
+    if avl_tree.wal is not None:
+        avl_tree.wal.compact()
+    return len(keys)
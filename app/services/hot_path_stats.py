@@ -0,0 +1,80 @@
+from collections import Counter
+
+
+class HotPathStats:
+    """Contadores del camino caliente de un árbol (opcionales)
+    
+    Con enable_stats() el árbol registra aquí cada búsqueda, inserción y
+    poda con la cantidad de nodos que recorrió (la profundidad alcanzada),
+    y en el AVL cada rebalanceo con una o con dos rotaciones. Sin activar,
+    el árbol tiene _stats = None y el único costo es comprobarlo una vez
+    por operación.
+    
+    Las búsquedas corren en paralelo con el candado de lectura, así que con
+    muchas búsquedas concurrentes los contadores son aproximados.
+    
+    Atributos:
+        depths: Operación -> Counter de nodos recorridos por operación
+        comparisons: Operación -> comparaciones de claves en total (solo
+                     donde se cuentan: las búsquedas)
+        single_rotations: Rebalanceos con una rotación (casos LL y RR)
+        double_rotations: Rebalanceos con dos rotaciones (casos LR y RL)
+    """
+    def __init__(self):
+        self.depths = {}
+        self.comparisons = Counter()
+        self.single_rotations = 0
+        self.double_rotations = 0
+    
+    def record(self, operation, nodes, comparisons=None):
+        """Registra una operación que recorrió nodes nodos"""
+        depths = self.depths.get(operation)
+        if depths is None:
+            depths = self.depths[operation] = Counter()
+        depths[nodes] += 1
+        if comparisons is not None:
+            self.comparisons[operation] += comparisons
+    
+    def rebalance(self, double):
+        """Registra un rebalanceo con dos rotaciones (double) o con una"""
+        if double:
+            self.double_rotations += 1
+        else:
+            self.single_rotations += 1
+    
+    def to_dict(self, size, height):
+        """Contadores con promedios y la distribución de profundidades
+        
+        size y height son los del árbol al momento de leer los contadores;
+        min_height es la altura de un árbol perfectamente balanceado con
+        size nodos, la referencia para ver cuánto se degeneró.
+        """
+        operations = {}
+        for operation, depths in self.depths.items():
+            count = sum(depths.values())
+            visited = sum(depth * times for depth, times in depths.items())
+            summary = {
+                "count": count,
+                "nodes_visited": visited,
+                "mean_nodes_visited": visited / count,
+                "max_nodes_visited": max(depths),
+                "depth_distribution": {depth: depths[depth] for depth in sorted(depths)}
+            }
+            if operation in self.comparisons:
+                summary["comparisons"] = self.comparisons[operation]
+                summary["mean_comparisons"] = self.comparisons[operation] / count
+            operations[operation] = summary
+        
+        rebalances = self.single_rotations + self.double_rotations
+        return {
+            "size": size,
+            "height": height,
+            "min_height": size.bit_length(),
+            "operations": operations,
+            "rebalances": {
+                "single_rotations": self.single_rotations,
+                "double_rotations": self.double_rotations,
+                "rotations": self.single_rotations + 2 * self.double_rotations,
+                "double_ratio": self.double_rotations / rebalances if rebalances else 0.0
+            }
+        }
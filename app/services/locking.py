@@ -0,0 +1,79 @@
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """
+    Candado de lectores-escritor.
+    
+    FastAPI ejecuta los endpoints síncronos (def) en un pool de hilos, así que
+    varias peticiones pueden usar el mismo árbol a la vez. Este candado deja
+    que muchas lecturas (búsquedas, recorridos, estructura) corran en
+    paralelo, pero una escritura (insertar, podar, balancear, limpiar) se
+    ejecuta sola: espera a que terminen las lecturas en curso y ninguna
+    lectura ve un subárbol a medio rotar.
+    
+    Las escrituras tienen preferencia: cuando una escritura está esperando,
+    las lecturas nuevas esperan detrás de ella para que un flujo constante de
+    lecturas no la deje esperando para siempre.
+    
+    Uso:
+        with tree.lock.read():
+            tree.search(value)
+        with tree.lock.write():
+            tree.insert(value)
+    """
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0  # Lecturas en curso
+        self._writer = False  # Hay una escritura en curso
+        self._waiting_writers = 0  # Escrituras esperando turno
+    
+    def acquire_read(self):
+        """Espera a que no haya escrituras en curso ni esperando y entra a leer"""
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+    
+    def release_read(self):
+        """Termina una lectura; la última lectura despierta a las escrituras"""
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+    
+    def acquire_write(self):
+        """Espera a que no haya lecturas ni otra escritura y entra a escribir"""
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+    
+    def release_write(self):
+        """Termina la escritura y despierta a todos los que esperan"""
+        with self._condition:
+            self._writer = False
+            self._condition.notify_all()
+    
+    @contextmanager
+    def read(self):
+        """Bloque de lectura compartida (with lock.read(): ...)"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+    
+    @contextmanager
+    def write(self):
+        """Bloque de escritura exclusiva (with lock.write(): ...)"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
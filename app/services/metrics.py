@@ -0,0 +1,178 @@
+# Métricas en formato de texto de Prometheus (GET /metrics)
+# Para saber si una petición lenta se debe a la profundidad del árbol, a los
+# rebalanceos o a armar la estructura completa, se miden:
+#   - la duración de cada ruta HTTP (incluye validar y serializar la respuesta),
+#   - la duración de cada método de los servicios de árboles,
+#   - al momento de leer /metrics: nodos, altura, tamaño de saved_data y
+#     rotaciones de cada árbol.
+# No usa prometheus_client: el formato de texto es simple y así no se agrega
+# una dependencia.
+
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Límites superiores de los buckets, en segundos: desde 10 µs (una búsqueda)
+# hasta 10 s (la estructura completa de un árbol enorme)
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _label_text(names, values):
+    """{nombre="valor",...} con las comillas y barras escapadas"""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return ",".join(pairs)
+
+
+class Histogram:
+    """
+    Histograma de Prometheus con etiquetas.
+    
+    Cada combinación de etiquetas guarda una cuenta por bucket (no
+    acumulada), la suma de las observaciones y se acumula al exportar.
+    
+    Args:
+        name: Nombre de la métrica
+        description: Texto de # HELP
+        label_names: Nombres de las etiquetas, en el orden de observe()
+        buckets: Límites superiores de los buckets, ordenados
+    """
+    def __init__(self, name, description, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # etiquetas -> [cuenta por bucket..., cuenta de +Inf, suma]
+        self._lock = threading.Lock()
+    
+    def series(self, labels):
+        """Lista de cuentas de la combinación de etiquetas labels (tupla)"""
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            return series
+    
+    def observe(self, labels, seconds):
+        """Registra una duración para la combinación de etiquetas labels"""
+        self.observe_series(self.series(labels), seconds)
+    
+    def observe_series(self, series, seconds):
+        """Registra una duración en una lista obtenida con series()"""
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series[index] += 1
+            series[-1] += seconds
+    
+    def render(self):
+        """Líneas del histograma en formato de texto de Prometheus"""
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, values in series:
+            text = _label_text(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(bounds, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{text},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{text}}} {values[-1]!r}")
+            lines.append(f"{self.name}_count{{{text}}} {cumulative}")
+        return lines
+
+
+route_latency = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request, by route template (includes response serialization)",
+    ("method", "route", "status"),
+)
+service_latency = Histogram(
+    "tree_method_duration_seconds",
+    "Time spent in a tree service method",
+    ("tree", "method"),
+)
+
+# Métodos medidos de cada servicio
+AVL_METHODS = (
+    "insert", "insert_many", "prune", "prune_range", "search", "balance_tree",
+    "rank", "select", "count_between", "range", "inorder", "preorder", "postorder",
+    "summary", "get_structure", "clear",
+)
+BST_METHODS = (
+    "insert", "prune", "search", "inorder", "preorder", "postorder",
+    "get_kids_grouped_by_age_ranges", "summary", "get_structure", "clear",
+)
+
+_trees = {}  # nombre -> árbol cuyas medidas se exportan
+
+
+def _timed(method, tree_name, name):
+    """Envuelve un método para registrar su duración en service_latency
+    
+    La serie de las etiquetas se busca una sola vez: en el camino de cada
+    llamada solo quedan dos perf_counter y una cuenta en el bucket.
+    """
+    series = service_latency.series((tree_name, name))
+    observe = service_latency.observe_series
+    clock = time.perf_counter
+    
+    @wraps(method)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            observe(series, clock() - start)
+    return timed
+
+
+def instrument_tree(tree_name, tree, methods):
+    """Mide los métodos del árbol y exporta sus medidas en /metrics
+    
+    Los métodos se reemplazan en la instancia (no en la clase), así solo se
+    miden los árboles registrados y no, por ejemplo, los árboles con nombre.
+    Una llamada interna de un método medido a otro se mide en los dos.
+    """
+    for name in methods:
+        setattr(tree, name, _timed(getattr(tree, name), tree_name, name))
+    _trees[tree_name] = tree
+
+
+def _tree_lines():
+    """Medidas de los árboles registrados, leídas con su candado de lectura"""
+    gauges = {
+        "tree_nodes": ("gauge", "Nodes in the tree", {}),
+        "tree_height": ("gauge", "Height of the tree (the BST recomputes it in O(n) only after a prune)", {}),
+        "tree_saved_data_size": ("gauge", "Values kept in saved_data", {}),
+        "tree_rotations_total": ("counter", "Rotations done by the AVL tree since it was created", {}),
+    }
+    for tree_name, tree in _trees.items():
+        with tree.lock.read():
+            gauges["tree_nodes"][2][tree_name] = tree.size() if hasattr(tree, "size") else len(tree.saved_data)
+            gauges["tree_height"][2][tree_name] = tree.height()
+            gauges["tree_saved_data_size"][2][tree_name] = len(tree.saved_data)
+            if hasattr(tree, "rotations"):
+                gauges["tree_rotations_total"][2][tree_name] = tree.rotations
+    
+    lines = []
+    for name, (kind, description, values) in gauges.items():
+        if values:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for tree_name, value in values.items():
+                lines.append(f'{name}{{tree="{tree_name}"}} {value}')
+    return lines
+
+
+def render_metrics():
+    """Todas las métricas en formato de texto de Prometheus"""
+    lines = route_latency.render() + service_latency.render() + _tree_lines()
+    return "\n".join(lines) + "\n"
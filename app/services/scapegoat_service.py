@@ -0,0 +1,208 @@
+# Servicio Scapegoat Tree (Árbol Chivo Expiatorio)
+# Un ABB sin balanceo con IDs crecientes se convierte en una lista: O(n) por
+# inserción y por búsqueda. Este árbol tiene la misma API y la misma forma de
+# nodos que BinarySearchTree, pero cada nodo guarda el tamaño de su subárbol.
+# Cuando una inserción deja un nodo más profundo que log_{1/alpha}(n), se
+# busca en su camino un ancestro desbalanceado en peso (un hijo con más de
+# alpha veces el tamaño del ancestro), el "chivo expiatorio", y se
+# reconstruye solo ese subárbol perfectamente balanceado. Así la altura queda
+# en O(log n) y las operaciones cuestan O(log n) amortizado, sin rotaciones.
+
+import math
+
+from app.models.tree_model import SizedNode
+from app.services.tree_service import BinarySearchTree
+
+
+class ScapegoatTree(BinarySearchTree):
+    """Árbol Binario de Búsqueda con rebalanceo por reconstrucción parcial
+    
+    Args:
+        alpha: Balance en peso exigido, entre 0.5 y 1. Con un alpha chico el
+               árbol queda más bajo pero se reconstruye más seguido.
+    """
+    
+    # Como BinarySearchTree más el tamaño de cada nodo, medido con tracemalloc
+    BYTES_PER_VALUE = 240
+    
+    node_class = SizedNode
+    
+    def __init__(self, alpha=0.6):
+        if not 0.5 < alpha < 1:
+            raise ValueError("alpha must be between 0.5 and 1")
+        super().__init__()
+        self.alpha = alpha
+        self._log_inverse_alpha = math.log(1 / alpha)
+        # Mayor tamaño desde la última reconstrucción completa: cuando las
+        # podas dejan el árbol por debajo de alpha * max_size se reconstruye
+        self.max_size = 0
+    
+    def insert(self, kid_id: int, name: str = "", age: int = 0):
+        """Inserta un Kid como el ABB y actualiza max_size (también cuando
+        el Kid es la raíz de un árbol vacío, que no pasa por _insert_iterative)"""
+        if not super().insert(kid_id, name, age):
+            return False
+        self.max_size = max(self.max_size, self.root.size)
+        return True
+    
+    def _insert_iterative(self, kid_id, slot):
+        """Inserta un Kid como el ABB y, si quedó muy profundo, reconstruye
+        el subárbol del chivo expiatorio"""
+        ids = self.kids.ids
+        path = []  # (nodo, dirección) desde la raíz hasta el padre del nuevo nodo
+        current_node = self.root
+        while True:
+            current_node.cache = None
+            
+            current_id = ids[current_node.slot]
+            if kid_id == current_id:
+                return False
+            
+            direction = 0 if kid_id < current_id else 1
+            path.append((current_node, direction))
+            child = current_node.children[direction]
+            if child is None:
+                current_node.children[direction] = new_node = self.node_class(slot)
+                if self._delta is not None:
+                    self._delta.touch(current_node)
+                    self._delta.touch(new_node)
+                break
+            current_node = child
+        
+        if self._stats is not None:
+            self._stats.record("insert", len(path))
+        if self._height is not None:
+            self._height = max(self._height, len(path) + 1)
+        for node, _ in path:
+            node.size += 1
+        size = self.root.size
+        
+        # La profundidad del nuevo nodo es la cantidad de aristas desde la raíz
+        if len(path) > math.log(size) / self._log_inverse_alpha:
+            self._rebuild_scapegoat(path)
+        return True
+    
+    def _rebuild_scapegoat(self, path):
+        """Sube por el camino hasta el primer ancestro desbalanceado en peso
+        y reconstruye su subárbol
+        
+        Un nodo más profundo que log_{1/alpha}(n) garantiza que ese ancestro
+        existe en el camino.
+        """
+        child_size = 1  # El nuevo nodo
+        for index in range(len(path) - 1, -1, -1):
+            node = path[index][0]
+            if child_size > self.alpha * node.size:
+                # La reconstrucción baja la altura; se recalcula cuando se pida
+                self._height = None
+                subtree = self._rebuild_subtree(node)
+                if index == 0:
+                    self.root = subtree
+                else:
+                    parent, direction = path[index - 1]
+                    parent.children[direction] = subtree
+                    if self._delta is not None:
+                        self._delta.touch(parent)
+                return
+            child_size = node.size
+    
+    def _rebuild_subtree(self, node):
+        """Rearma el subárbol de node perfectamente balanceado, en O(tamaño)
+        
+        Se reutilizan los mismos nodos (y sus slots): solo cambian hijos,
+        tamaños y cachés. Retorna la nueva raíz del subárbol.
+        """
+        nodes = []
+        stack = []
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.children[0]
+            node = stack.pop()
+            nodes.append(node)
+            node = node.children[1]
+        
+        if self._delta is not None:
+            for node in nodes:
+                self._delta.touch(node)
+        return self._build_balanced(nodes, 0, len(nodes) - 1)
+    
+    def _build_balanced(self, nodes, start, end):
+        """Cuelga nodes[start..end] (en inorden) con el del medio como raíz
+        
+        La recursión baja O(log n) niveles porque el resultado está balanceado.
+        """
+        if start > end:
+            return None
+        mid = (start + end) // 2
+        node = nodes[mid]
+        node.children[0] = self._build_balanced(nodes, start, mid - 1)
+        node.children[1] = self._build_balanced(nodes, mid + 1, end)
+        node.size = end - start + 1
+        node.cache = None
+        return node
+    
+    def _prune_iterative(self, kid_id):
+        """Poda como el ABB descontando el nodo quitado de los tamaños; si
+        quedan menos de alpha * max_size Kids se reconstruye todo el árbol"""
+        ids = self.kids.ids
+        path = []
+        current_node = self.root
+        while current_node is not None and kid_id != ids[current_node.slot]:
+            path.append(current_node)
+            current_node = current_node.children[0 if kid_id < ids[current_node.slot] else 1]
+        
+        if current_node is None:
+            # Si lo encuentra, la poda del ABB registra el camino en los contadores
+            if self._stats is not None:
+                self._stats.record("prune", len(path))
+            return False
+        
+        # El nodo que se quita es el del Kid o, si tiene dos hijos, su
+        # sucesor: todos los nodos hasta él pierden uno en su tamaño
+        for node in path:
+            node.size -= 1
+        current_node.size -= 1
+        if current_node.children[0] is not None and current_node.children[1] is not None:
+            successor = current_node.children[1]
+            while successor is not None:
+                successor.size -= 1
+                successor = successor.children[0]
+        
+        super()._prune_iterative(kid_id)
+        
+        size = self.root.size if self.root is not None else 0
+        if size < self.alpha * self.max_size:
+            if self._delta is not None:
+                self._delta.rebuilt = True
+            self.root = self._rebuild_subtree(self.root)
+            self.max_size = size
+        return True
+    
+    def build_from_preorder(self, kids):
+        """Reemplaza el árbol por la forma de un preorden (ver
+        BinarySearchTree.build_from_preorder) y calcula los tamaños"""
+        super().build_from_preorder(kids)
+        for node in self._iter_postorder_nodes():
+            left, right = node.children
+            node.size = 1 + (left.size if left is not None else 0) + (right.size if right is not None else 0)
+        self.max_size = self.root.size if self.root is not None else 0
+    
+    def _iter_postorder_nodes(self):
+        """Generador de nodos en postorden (los hijos antes que el padre)"""
+        stack = [(self.root, False)] if self.root is not None else []
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                yield node
+                continue
+            stack.append((node, True))
+            if node.children[1] is not None:
+                stack.append((node.children[1], False))
+            if node.children[0] is not None:
+                stack.append((node.children[0], False))
+    
+    def clear(self):
+        """Limpia todo el árbol"""
+        super().clear()
+        self.max_size = 0
@@ -0,0 +1,467 @@
+# Árbol AVL particionado por rangos en varios procesos (sharding)
+# Un solo AVLTree vive en un proceso de Python y usa un solo núcleo. En modo
+# particionado el espacio de valores se divide en rangos contiguos y cada
+# rango (shard) es un AVLTree en su propio proceso:
+#
+#   shard 0: valores < bounds[0]
+#   shard i: bounds[i - 1] <= valores < bounds[i]
+#   último:  valores >= bounds[-1]
+#
+# El proceso del servidor solo enruta: una operación sobre un valor va al
+# único shard que lo contiene, y las consultas de rango y los recorridos se
+# envían a todos los shards involucrados a la vez y se unen en orden (los
+# rangos ya están ordenados, así que basta con concatenar). Cuando un shard
+# supera max_shard_size valores se parte por su mediana en dos procesos.
+
+import bisect
+import multiprocessing
+import os
+import threading
+from itertools import islice
+
+from app.services.avl_service import create_avl_tree
+from app.services.locking import RWLock
+
+def _page(tree, after, limit):
+    """Hasta limit valores en inorden mayores que after (after=None: desde el inicio)"""
+    return list(islice(tree.iter_inorder(after), limit))
+
+
+def _split_upper(tree):
+    """Deja en el árbol la mitad menor de sus valores y retorna la mayor
+    
+    Retorna (pivote, valores mayores o iguales al pivote ordenados, los
+    mismos en orden de inserción). Cada mitad conserva su orden de inserción.
+    """
+    values = tree.inorder()
+    pivot = values[len(values) // 2]
+    lower_order = [value for value in tree.saved_data if value < pivot]
+    upper_order = [value for value in tree.saved_data if value >= pivot]
+    tree.load_sorted(values[:len(values) // 2], lower_order)
+    return pivot, values[len(values) // 2:], upper_order
+
+
+# Comandos que un shard acepta: nombre -> función(árbol, *args)
+SHARD_COMMANDS = {
+    "insert": lambda tree, value: tree.insert(value),
+    "insert_many": lambda tree, values: tree.insert_many(values),
+    "search": lambda tree, value: tree.search(value),
+    "prune": lambda tree, value: tree.prune(value),
+    "prune_range": lambda tree, lo, hi: tree.prune_range(lo, hi),
+    "range": lambda tree, lo, hi, limit: tree.range(lo, hi, limit),
+    "rank": lambda tree, value: tree.rank(value),
+    "select": lambda tree, k: tree.select(k),
+    "count_between": lambda tree, lo, hi: tree.count_between(lo, hi),
+    "inorder": lambda tree: tree.inorder(),
+    "page": _page,
+    "summary": lambda tree: tree.summary(),
+    "get_structure": lambda tree: tree.get_structure(),
+    "load_sorted": lambda tree, values, order: tree.load_sorted(values, order),
+    "split_upper": _split_upper,
+    "clear": lambda tree: tree.clear(),
+}
+
+# Errores que se reenvían al proceso del servidor con su mismo tipo; el
+# resto llega como RuntimeError
+FORWARDED_ERRORS = {"ValueError": ValueError, "IndexError": IndexError}
+SHARD_ERRORS = (ValueError, IndexError, RuntimeError)
+
+
+def _shard_worker(connection, storage):
+    """Bucle del proceso de un shard: ejecuta comandos hasta recibir None
+    
+    Cada mensaje es (comando, *args) y cada respuesta ("ok", resultado) o
+    ("error", tipo, mensaje).
+    """
+    tree = create_avl_tree(storage)
+    while True:
+        message = connection.recv()
+        if message is None:
+            connection.close()
+            return
+        command, *args = message
+        try:
+            connection.send(("ok", SHARD_COMMANDS[command](tree, *args)))
+        except Exception as error:
+            connection.send(("error", type(error).__name__, str(error)))
+
+
+class _Shard:
+    """
+    Un proceso shard visto desde el servidor.
+    
+    La conexión solo admite una petición a la vez, así que cada envío y su
+    respuesta se hacen con self.lock tomado. size es la cantidad de valores
+    del shard, llevada por el servidor con el resultado de cada escritura.
+    """
+    def __init__(self, context, storage):
+        self.connection, worker_connection = context.Pipe()
+        self.process = context.Process(target=_shard_worker, args=(worker_connection, storage),
+                                       daemon=True)
+        self.process.start()
+        worker_connection.close()
+        self.lock = threading.Lock()
+        self.size = 0
+    
+    def send(self, command, *args):
+        """Envía un comando sin esperar la respuesta (con self.lock tomado)"""
+        self.connection.send((command, *args))
+    
+    def receive(self):
+        """Espera la respuesta del último comando enviado"""
+        status, *result = self.connection.recv()
+        if status == "error":
+            error_type, message = result
+            raise FORWARDED_ERRORS.get(error_type, RuntimeError)(message)
+        return result[0]
+    
+    def call(self, command, *args):
+        """Envía un comando y espera su respuesta"""
+        with self.lock:
+            self.send(command, *args)
+            return self.receive()
+    
+    def stop(self):
+        """Termina el proceso del shard"""
+        with self.lock:
+            self.connection.send(None)
+            self.connection.close()
+        self.process.join()
+
+
+class ShardedAVLTree:
+    """
+    Árbol AVL particionado por rangos de valores en procesos separados.
+    
+    Las operaciones sobre shards distintos corren en paralelo en procesos
+    distintos. Una consulta que abarca varios shards toma el candado de cada
+    uno (en orden, para no bloquearse con otra consulta) y les envía el
+    comando a todos antes de esperar las respuestas. Partir un shard cambia
+    la lista de shards, así que se hace con self.topology en modo escritura;
+    el resto de las operaciones la toman en modo lectura.
+    
+    Args:
+        bounds: Límites iniciales entre shards (ordenados), p. ej. [1000, 2000]
+                crea tres shards; por defecto un solo shard que se va partiendo
+        max_shard_size: Cantidad de valores a partir de la cual un shard se parte
+        max_shards: Cantidad máxima de procesos shard
+        storage: Almacenamiento del AVL de cada shard ("objects" o "arena")
+    """
+    def __init__(self, bounds=(), max_shard_size=1_000_000, max_shards=16, storage="objects"):
+        self.bounds = sorted(bounds)
+        if len(set(self.bounds)) != len(self.bounds):
+            raise ValueError("Shard bounds must be distinct")
+        self.max_shard_size = max_shard_size
+        self.max_shards = max(max_shards, len(self.bounds) + 1)
+        self.storage = storage
+        self.topology = RWLock()
+        self.splits = 0
+        # spawn: un proceso limpio, sin copiar hilos ni candados del servidor
+        self._context = multiprocessing.get_context("spawn")
+        self.shards = [_Shard(self._context, storage) for _ in range(len(self.bounds) + 1)]
+    
+    def _shard_index(self, value):
+        """Posición del shard cuyo rango contiene value"""
+        return bisect.bisect_right(self.bounds, value)
+    
+    def _fan_out(self, indexes, command, *args):
+        """Envía el mismo comando a varios shards y retorna sus respuestas en orden"""
+        shards = [self.shards[index] for index in indexes]
+        for shard in shards:
+            shard.lock.acquire()
+        try:
+            for shard in shards:
+                shard.send(command, *args)
+            # Hay que leer todas las respuestas aunque alguna sea un error
+            results, error = [], None
+            for shard in shards:
+                try:
+                    results.append(shard.receive())
+                except SHARD_ERRORS as shard_error:
+                    error = shard_error
+            if error is not None:
+                raise error
+            return results
+        finally:
+            for shard in shards:
+                shard.lock.release()
+    
+    # ---- Escrituras ----
+    
+    def insert(self, value):
+        """Inserta value en su shard; retorna False si ya existía"""
+        with self.topology.read():
+            shard = self.shards[self._shard_index(value)]
+            with shard.lock:
+                shard.send("insert", value)
+                inserted = shard.receive()
+                shard.size += inserted
+        self._split_oversized()
+        return inserted
+    
+    def insert_many(self, values):
+        """Reparte el lote entre sus shards, que lo insertan en paralelo
+        
+        Retorna la cantidad de valores nuevos insertados.
+        """
+        with self.topology.read():
+            batches = {}
+            for value in values:
+                batches.setdefault(self._shard_index(value), []).append(value)
+            indexes = sorted(batches)
+            shards = [self.shards[index] for index in indexes]
+            for shard in shards:
+                shard.lock.acquire()
+            try:
+                for index, shard in zip(indexes, shards):
+                    shard.send("insert_many", batches[index])
+                # Hay que leer todas las respuestas aunque alguna sea un error:
+                # una respuesta sin leer la recibiría el próximo comando
+                inserted, error = 0, None
+                for shard in shards:
+                    try:
+                        count = shard.receive()
+                    except SHARD_ERRORS as shard_error:
+                        error = shard_error
+                        continue
+                    shard.size += count
+                    inserted += count
+            finally:
+                for shard in shards:
+                    shard.lock.release()
+        self._split_oversized()
+        if error is not None:
+            raise error
+        return inserted
+    
+    def prune(self, value):
+        """Poda value de su shard; retorna False si no existía"""
+        with self.topology.read():
+            shard = self.shards[self._shard_index(value)]
+            with shard.lock:
+                shard.send("prune", value)
+                removed = shard.receive()
+                shard.size -= removed
+        return removed
+    
+    def prune_range(self, lo, hi):
+        """Poda [lo, hi] en cada shard del intervalo a la vez; retorna cuántos podó"""
+        if lo > hi:
+            return 0
+        with self.topology.read():
+            indexes = self._overlapping(lo, hi)
+            removed = self._fan_out(indexes, "prune_range", lo, hi)
+            for index, count in zip(indexes, removed):
+                self.shards[index].size -= count
+        return sum(removed)
+    
+    def clear(self):
+        """Vacía todos los shards (los rangos se conservan)"""
+        with self.topology.read():
+            self._fan_out(range(len(self.shards)), "clear")
+            for shard in self.shards:
+                shard.size = 0
+    
+    def _split_oversized(self):
+        """Parte por la mediana los shards con más de max_shard_size valores"""
+        # Con max_shards shards ya no se parte más: sin este corte cada
+        # escritura a un shard grande tomaría el candado exclusivo para nada
+        if len(self.shards) >= self.max_shards:
+            return
+        if all(shard.size <= self.max_shard_size for shard in self.shards):
+            return
+        with self.topology.write():
+            index = 0
+            while index < len(self.shards) and len(self.shards) < self.max_shards:
+                shard = self.shards[index]
+                if shard.size <= self.max_shard_size:
+                    index += 1
+                    continue
+                pivot, upper, upper_order = shard.call("split_upper")
+                new_shard = _Shard(self._context, self.storage)
+                new_shard.call("load_sorted", upper, upper_order)
+                new_shard.size = len(upper)
+                shard.size -= len(upper)
+                self.bounds.insert(index, pivot)
+                self.shards.insert(index + 1, new_shard)
+                self.splits += 1
+                # Se vuelve a revisar el mismo shard: un lote grande puede
+                # necesitar varias particiones
+    
+    # ---- Lecturas ----
+    
+    def search(self, value):
+        """Busca value en su shard"""
+        with self.topology.read():
+            return self.shards[self._shard_index(value)].call("search", value)
+    
+    def size(self):
+        """Cantidad total de valores"""
+        with self.topology.read():
+            return sum(shard.size for shard in self.shards)
+    
+    def _overlapping(self, lo, hi):
+        """Posiciones de los shards cuyo rango se cruza con [lo, hi]"""
+        return range(self._shard_index(lo), self._shard_index(hi) + 1)
+    
+    def range(self, lo, hi, limit=None):
+        """Valores en [lo, hi] en orden: cada shard del intervalo busca su parte"""
+        if lo > hi or (limit is not None and limit <= 0):
+            return []
+        with self.topology.read():
+            parts = self._fan_out(self._overlapping(lo, hi), "range", lo, hi, limit)
+        values = [value for part in parts for value in part]
+        return values if limit is None else values[:limit]
+    
+    def count_between(self, lo, hi):
+        """Cantidad de valores en [lo, hi]
+        
+        Los shards completamente dentro del intervalo aportan su tamaño; solo
+        se consulta a los dos de los extremos.
+        """
+        if lo > hi:
+            return 0
+        with self.topology.read():
+            first, last = self._shard_index(lo), self._shard_index(hi)
+            edges = sorted({first, last})
+            counts = self._fan_out(edges, "count_between", lo, hi)
+            return sum(counts) + sum(shard.size for shard in self.shards[first + 1:last])
+    
+    def rank(self, value):
+        """Valores menores que value: los shards anteriores completos más el rango local"""
+        with self.topology.read():
+            index = self._shard_index(value)
+            before = sum(shard.size for shard in self.shards[:index])
+            return before + self.shards[index].call("rank", value)
+    
+    def select(self, k):
+        """k-ésimo menor valor (k empieza en 0), buscado en el shard que lo contiene"""
+        with self.topology.read():
+            total = sum(shard.size for shard in self.shards)
+            if k < 0 or k >= total:
+                raise IndexError(f"k must be between 0 and {total - 1}")
+            for shard in self.shards:
+                if k < shard.size:
+                    return shard.call("select", k)
+                k -= shard.size
+    
+    def percentile(self, p):
+        """Valor en el percentil p (0-100), con el mismo método que AVLTree"""
+        if p < 0 or p > 100:
+            raise ValueError("p must be between 0 and 100")
+        n = self.size()
+        if n == 0:
+            raise IndexError("The tree is empty")
+        return self.select(int(max(0, -(-p * n // 100) - 1)))
+    
+    def median(self):
+        """Mediana de todos los valores (promedio de los dos centrales si n es par)"""
+        n = self.size()
+        if n == 0:
+            raise IndexError("The tree is empty")
+        if n % 2 == 1:
+            return self.select(n // 2)
+        return (self.select(n // 2 - 1) + self.select(n // 2)) / 2
+    
+    def inorder(self):
+        """Recorrido inorden completo: los shards recorren en paralelo y se concatenan"""
+        with self.topology.read():
+            parts = self._fan_out(range(len(self.shards)), "inorder")
+        return [value for part in parts for value in part]
+    
+    def inorder_page(self, after=None, limit=None):
+        """Una página del inorden: (valores, siguiente cursor) como paginate()
+        
+        Se recorre desde el shard que contiene al cursor y se pide a cada
+        shard solo lo que falta para completar la página.
+        """
+        if limit is None:
+            values = self.inorder()
+            if after is not None:
+                values = values[bisect.bisect_right(values, after):]
+            return values, None
+        
+        with self.topology.read():
+            page = []
+            index = 0 if after is None else self._shard_index(after)
+            # Se pide un valor de más para saber si existe una página siguiente
+            while index < len(self.shards) and len(page) <= limit:
+                page += self.shards[index].call("page", after, limit + 1 - len(page))
+                index += 1
+        if len(page) > limit:
+            page.pop()
+            return page, page[-1]
+        return page, None
+    
+    def describe(self):
+        """Rango, tamaño y proceso de cada shard"""
+        with self.topology.read():
+            lows = [None] + self.bounds
+            highs = self.bounds + [None]
+            return [
+                {"shard": index, "lo": low, "hi": high, "size": shard.size, "pid": shard.process.pid}
+                for index, (low, high, shard) in enumerate(zip(lows, highs, self.shards))
+            ]
+    
+    def summary(self):
+        """Resumen del árbol: cantidad de valores, altura del shard más alto y cantidad de shards"""
+        with self.topology.read():
+            summaries = self._fan_out(range(len(self.shards)), "summary")
+        return {
+            "size": sum(summary["size"] for summary in summaries),
+            "height": max(summary["height"] for summary in summaries),
+            "shards": len(summaries)
+        }
+    
+    def get_structure(self):
+        """Estructura del AVL de cada shard junto a su rango"""
+        with self.topology.read():
+            structures = self._fan_out(range(len(self.shards)), "get_structure")
+        shards = self.describe()
+        for shard, structure in zip(shards, structures):
+            shard["structure"] = structure
+        return shards
+    
+    def close(self):
+        """Termina todos los procesos shard"""
+        with self.topology.write():
+            for shard in self.shards:
+                shard.stop()
+            self.shards = []
+
+
+def create_configured_sharded_tree():
+    """Crea el árbol particionado configurado con las variables de entorno
+    
+    AVL_SHARDS: cantidad máxima de procesos shard
+    AVL_SHARD_BOUNDS: límites iniciales separados por comas (opcional)
+    AVL_SHARD_MAX_SIZE: valores a partir de los cuales un shard se parte
+    AVL_STORAGE: almacenamiento del AVL de cada shard
+    """
+    bounds = os.environ.get("AVL_SHARD_BOUNDS", "")
+    return ShardedAVLTree(
+        bounds=[int(bound) for bound in bounds.split(",") if bound.strip()],
+        max_shard_size=int(os.environ.get("AVL_SHARD_MAX_SIZE", "1000000")),
+        max_shards=int(os.environ["AVL_SHARDS"]),
+        storage=os.environ.get("AVL_STORAGE", "objects")
+    )
+
+
+# Instancia global, creada al iniciar el servidor (ver main.py) y no al
+# importar el módulo: cada proceso shard importa este módulo otra vez
+sharded_tree = None
+
+
+def start_sharded_tree():
+    """Crea los procesos shard del árbol global"""
+    global sharded_tree
+    sharded_tree = create_configured_sharded_tree()
+    return sharded_tree
+
+
+def stop_sharded_tree():
+    """Termina los procesos shard del árbol global"""
+    global sharded_tree
+    if sharded_tree is not None:
+        sharded_tree.close()
+        sharded_tree = None
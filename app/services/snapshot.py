@@ -0,0 +1,170 @@
+# Snapshot binario de los árboles
+# Guarda el contenido de un árbol en columnas de enteros de ancho fijo, sin
+# JSON: al cargarlo, el archivo se mapea en memoria (mmap) y las columnas se
+# leen directamente como arreglos de enteros, sin parsear texto.
+#
+# Formato (little-endian, cada sección alineada a 8 bytes):
+#   Encabezado (32 bytes): magic "ABBSNAP1", tipo (1 = AVL, 2 = BST),
+#                          7 bytes de relleno, n (cantidad de valores),
+#                          m (cantidad de nombres, 0 en el AVL)
+#   AVL: keys   int64[n]  Valores en inorden (ordenados)
+#        order  int64[n]  Valores en orden de inserción (saved_data)
+#   BST: ids    int64[n]  IDs en preorden (recrea la misma forma del árbol)
+#        order  int64[n]  IDs en orden de inserción (saved_data)
+#        ages   int32[n]  Edad de cada Kid, en el mismo orden que ids
+#        codes  int32[n]  Código del nombre de cada Kid
+#        offsets int64[m + 1]  Inicio de cada nombre dentro de los bytes UTF-8
+#        names  bytes    Nombres concatenados en UTF-8
+
+import mmap
+import os
+import struct
+from array import array
+
+from app.services.tree_service import BinarySearchTree
+
+MAGIC = b"ABBSNAP1"
+HEADER = struct.Struct("<8sB7xQQ")
+AVL_KIND = 1
+BST_KIND = 2
+
+
+def save_snapshot(tree, path):
+    """Guarda el árbol en un snapshot binario de forma atómica
+    
+    Se escribe un archivo temporal, se fuerza a disco y recién entonces
+    reemplaza al snapshot anterior: una caída nunca deja un snapshot a medias.
+    """
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        if isinstance(tree, BinarySearchTree):
+            _write_bst(file, tree)
+        else:
+            _write_avl(file, tree)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+def _write_avl(file, avl_tree):
+    """Escribe las columnas del AVL (ver el formato al inicio del módulo)"""
+    keys = array('q', avl_tree.iter_inorder())
+    order = array('q', avl_tree.saved_data)
+    file.write(HEADER.pack(MAGIC, AVL_KIND, len(keys), 0))
+    file.write(keys)
+    file.write(order)
+
+
+def _write_bst(file, tree):
+    """Escribe las columnas del BST (ver el formato al inicio del módulo)"""
+    store = tree.kids
+    ids, ages, codes = array('q'), array('i'), array('i')
+    for node in tree._iter_preorder_nodes():
+        ids.append(store.ids[node.slot])
+        ages.append(store.ages[node.slot])
+        codes.append(store.name_codes[node.slot])
+    order = array('q', tree.saved_data)
+    
+    encoded = [name.encode("utf-8") for name in store.names]
+    offsets = array('q', [0])
+    for name in encoded:
+        offsets.append(offsets[-1] + len(name))
+    
+    file.write(HEADER.pack(MAGIC, BST_KIND, len(ids), len(encoded)))
+    file.write(ids)
+    file.write(order)
+    file.write(ages)
+    file.write(codes)
+    file.write(offsets)
+    file.write(b"".join(encoded))
+
+
+class Snapshot:
+    """
+    Snapshot binario abierto con mmap.
+    
+    Las columnas son memoryviews sobre el archivo mapeado: se indexan como
+    listas de enteros sin copiar ni parsear nada. Se usa como context
+    manager para cerrar el mapeo al terminar:
+        
+        with open_snapshot(path) as snapshot:
+            avl_tree.load_sorted(snapshot.keys, snapshot.order)
+    
+    Atributos:
+        kind: AVL_KIND o BST_KIND
+        keys: AVL: valores ordenados; BST: IDs en preorden
+        order: Valores o IDs en orden de inserción
+        ages, codes, names: Columnas de los Kids (solo BST)
+    """
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        
+        magic, self.kind, count, name_count = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a tree snapshot")
+        
+        offset = HEADER.size
+        self.keys, offset = self._column(offset, 'q', count)
+        self.order, offset = self._column(offset, 'q', count)
+        self.ages = self.codes = None
+        self.names = []
+        if self.kind == BST_KIND:
+            self.ages, offset = self._column(offset, 'i', count)
+            self.codes, offset = self._column(offset, 'i', count)
+            offsets, offset = self._column(offset, 'q', name_count + 1)
+            blob = self._map[offset:offset + offsets[-1]]
+            self.names = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(name_count)]
+    
+    def _column(self, offset, typecode, count):
+        """Vista de count enteros desde offset; retorna (vista, offset siguiente)"""
+        size = struct.calcsize(typecode) * count
+        view = memoryview(self._map)[offset:offset + size].cast(typecode)
+        self._views.append(view)
+        return view, offset + size
+    
+    def kids(self):
+        """Generador de los Kids del BST en preorden como tuplas (id, nombre, edad)"""
+        names = self.names
+        for kid_id, age, code in zip(self.keys, self.ages, self.codes):
+            yield kid_id, names[code], age
+    
+    def close(self):
+        """Libera las vistas y cierra el mapeo del archivo"""
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_snapshot(path):
+    """Abre un snapshot binario con mmap (ver Snapshot)"""
+    return Snapshot(path)
+
+
+def load_snapshot(tree, path):
+    """Reemplaza el contenido del árbol por el de un snapshot binario
+    
+    El AVL se arma con una construcción balanceada en O(n) desde los
+    valores ordenados. El BST se arma en O(n) desde el preorden, con la
+    misma forma que tenía al guardarlo.
+    """
+    with open_snapshot(path) as snapshot:
+        if isinstance(tree, BinarySearchTree):
+            if snapshot.kind != BST_KIND:
+                raise ValueError(f"{path} is not a BST snapshot")
+            tree.build_from_preorder(snapshot.kids())
+            tree.saved_data = dict.fromkeys(snapshot.order)
+        else:
+            if snapshot.kind != AVL_KIND:
+                raise ValueError(f"{path} is not an AVL snapshot")
+            tree.load_sorted(snapshot.keys, snapshot.order)
@@ -0,0 +1,26 @@
+class TreeDelta:
+    """Registro de los cambios que hizo una escritura en un árbol
+    
+    Los servicios llaman a touch() con cada nodo cuyo contenido cambió
+    (valor, hijos o altura) y a rotation() con cada rotación. Como una
+    escritura solo toca O(log n) nodos, el delta es mucho más chico que la
+    estructura completa.
+    
+    Atributos:
+        nodes: Nodos modificados (dict usado como conjunto ordenado)
+        rotations: Rotaciones realizadas, en orden
+        rebuilt: True si el árbol se reconstruyó completo (el delta sería
+                 todo el árbol, así que conviene mandar la estructura)
+    """
+    def __init__(self):
+        self.nodes = {}
+        self.rotations = []
+        self.rebuilt = False
+    
+    def touch(self, node):
+        """Marca un nodo (o slot) como modificado"""
+        self.nodes[node] = None
+    
+    def rotation(self, kind, pivot, new_root):
+        """Registra una rotación: kind es "left" o "right" """
+        self.rotations.append({"type": kind, "pivot": pivot, "new_root": new_root})
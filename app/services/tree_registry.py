@@ -0,0 +1,141 @@
+# Registro de árboles con nombre (uno por cliente)
+# Además de los árboles globales de /avl y /tree, la API atiende árboles con
+# nombre en /avl/{tree_name}/... y /tree/{tree_name}/... Cada árbol se crea la
+# primera vez que se usa. Para no guardar en memoria los árboles de todos los
+# clientes, el registro tiene un presupuesto de memoria: cuando se supera, los
+# árboles usados hace más tiempo (LRU) se guardan en un snapshot en disco y se
+# sueltan; la próxima petición a ese árbol lo vuelve a cargar.
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from app.services.avl_service import create_configured_avl_tree
+from app.services.snapshot import load_snapshot, save_snapshot
+from app.services.tree_service import create_configured_tree
+
+# Los nombres se usan como nombre de archivo: solo letras, números, - y _
+TREE_NAME_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class TreeRegistry:
+    """
+    Árboles con nombre con presupuesto de memoria y desalojo LRU.
+    
+    La memoria de cada árbol se estima como cantidad de valores por
+    BYTES_PER_VALUE de su clase. Un árbol en uso por una petición (entre
+    acquire y release) nunca se desaloja, así ninguna escritura cae en un
+    árbol ya guardado.
+    
+    Args:
+        directory: Directorio de los snapshots de los árboles desalojados
+        memory_budget: Bytes que pueden ocupar entre todos los árboles cargados
+        factories: Tipo de árbol -> función que crea un árbol vacío
+    """
+    def __init__(self, directory, memory_budget, factories):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.factories = factories
+        self._trees = OrderedDict()  # (tipo, nombre) -> árbol, del menos al más reciente
+        self._in_use = {}  # (tipo, nombre) -> peticiones que lo están usando
+        self._lock = threading.Lock()
+        self.evictions = 0
+    
+    def _snapshot_path(self, kind, name):
+        """Ruta del snapshot del árbol desalojado"""
+        return os.path.join(self.directory, kind, f"{name}.snapshot")
+    
+    def acquire(self, kind, name):
+        """Retorna el árbol (cargándolo si hace falta) y lo marca en uso
+        
+        Cada acquire debe terminar con un release. Lanza ValueError si el
+        nombre no es válido.
+        """
+        if not TREE_NAME_PATTERN.fullmatch(name):
+            raise ValueError("Tree names must be 1-64 letters, digits, '-' or '_'")
+        
+        key = (kind, name)
+        with self._lock:
+            tree = self._trees.get(key)
+            if tree is None:
+                tree = self._load(kind, name)
+                self._trees[key] = tree
+            self._trees.move_to_end(key)
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+            self._evict()
+        return tree
+    
+    def release(self, kind, name):
+        """Marca que una petición terminó de usar el árbol"""
+        key = (kind, name)
+        with self._lock:
+            self._in_use[key] -= 1
+            if self._in_use[key] == 0:
+                del self._in_use[key]
+            # La petición pudo hacer crecer el árbol
+            self._evict()
+    
+    @contextmanager
+    def use(self, kind, name):
+        """Bloque with que usa el árbol entre acquire y release"""
+        tree = self.acquire(kind, name)
+        try:
+            yield tree
+        finally:
+            self.release(kind, name)
+    
+    def _load(self, kind, name):
+        """Crea el árbol, con el contenido de su snapshot si fue desalojado antes"""
+        tree = self.factories[kind]()
+        path = self._snapshot_path(kind, name)
+        if os.path.exists(path):
+            load_snapshot(tree, path)
+        return tree
+    
+    def _evict(self):
+        """Desaloja árboles sin uso, del menos reciente al más reciente, hasta
+        volver al presupuesto (se llama con self._lock tomado)"""
+        used = sum(len(tree.saved_data) * tree.BYTES_PER_VALUE for tree in self._trees.values())
+        for key in list(self._trees):
+            if used <= self.memory_budget:
+                break
+            if key in self._in_use:
+                continue
+            tree = self._trees.pop(key)
+            self._save(key, tree)
+            used -= len(tree.saved_data) * tree.BYTES_PER_VALUE
+            self.evictions += 1
+    
+    def _save(self, key, tree):
+        """Guarda el snapshot de un árbol"""
+        path = self._snapshot_path(*key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        save_snapshot(tree, path)
+    
+    def loaded(self):
+        """Nombres de los árboles cargados en memoria por tipo, del menos al más reciente"""
+        with self._lock:
+            result = {kind: [] for kind in self.factories}
+            for kind, name in self._trees:
+                result[kind].append(name)
+            return result
+    
+    def save_all(self):
+        """Guarda el snapshot de todos los árboles cargados (al apagar el servidor)"""
+        with self._lock:
+            for key, tree in self._trees.items():
+                with tree.lock.write():
+                    self._save(key, tree)
+
+
+# Registro global de árboles con nombre
+# TREE_DIR: directorio de los snapshots; TREE_MEMORY_BUDGET_MB: presupuesto
+# Los árboles cargados se guardan al apagar el servidor (lifespan de main.py),
+# no al terminar cualquier proceso que importe este módulo
+tree_registry = TreeRegistry(
+    os.environ.get("TREE_DIR", "trees"),
+    int(os.environ.get("TREE_MEMORY_BUDGET_MB", "512")) * 1024 * 1024,
+    {"avl": create_configured_avl_tree, "tree": create_configured_tree}
+)
@@ -1,13 +1,41 @@
+import os
+
 from app.models.tree_model import Node
-from app.models.kid_model import Kid
+from app.models.kid_store import KidStore
+from app.services.hot_path_stats import HotPathStats
+from app.services.locking import RWLock
+from app.services.tree_delta import TreeDelta
 
 
 class BinarySearchTree:
     """Clase para manejar el Árbol Binario de Búsqueda"""
     
+    # Memoria aproximada por Kid (nodo, columnas y saved_data), medida con
+    # tracemalloc; la usa el registro de árboles con nombre
+    BYTES_PER_VALUE = 230
+    
+    # Clase de los nodos; ScapegoatTree usa nodos que guardan su tamaño
+    node_class = Node
+    
     def __init__(self):
         self.root = None  # La raíz del árbol
-        self.saved_data = []  # Lista para guardar todos los IDs insertados
+        # Datos de los Kids guardados por columnas; cada Node guarda solo su slot
+        self.kids = KidStore()
+        # IDs insertados: el dict conserva el orden de inserción y permite
+        # comprobar si un ID existe y borrarlo en O(1)
+        self.saved_data = {}
+        # Registro de cambios de la escritura en curso (None = no se registra)
+        self._delta = None
+        # Lecturas en paralelo y escrituras exclusivas (lo usan los controladores)
+        self.lock = RWLock()
+        # Registro de escrituras en disco (ver app/services/wal.py); None = sin registro
+        self.wal = None
+        # Cola que agrupa escrituras concurrentes (ver app/services/write_queue.py)
+        self.write_queue = None
+        # Contadores del camino caliente (None = desactivados, ver enable_stats)
+        self._stats = None
+        # Altura que retorna height(); None = una poda la dejó desactualizada
+        self._height = 0
     
     def insert(self, kid_id: int, name: str = "", age: int = 0):
         """Inserta un Kid en el árbol
@@ -20,107 +48,192 @@ class BinarySearchTree:
         El árbol usa el ID del Kid para determinar automáticamente
         si va a la izquierda (ID menor) o derecha (ID mayor).
         """
-        # Guardar el ID en la lista
-        if kid_id not in self.saved_data:
-            self.saved_data.append(kid_id)
+        # Los IDs guardados reflejan el contenido del árbol, así que sirven
+        # para rechazar duplicados sin recorrerlo
+        if kid_id in self.saved_data:
+            return False
         
-        # Crear el Kid con ID, name y age
-        kid = Kid(kid_id, name, age)
+        # Guardar el Kid con ID, name y age en el almacén columnar
+        slot = self.kids.add(kid_id, name, age)
+        self.saved_data[kid_id] = None
         
         # Si el árbol está vacío, crear la raíz
         if self.root is None:
-            self.root = Node(kid)
-            return True
+            self.root = self.node_class(slot)
+            self._height = 1
+            if self._delta is not None:
+                self._delta.touch(self.root)
+        else:
+            # Si no está vacío, buscar dónde insertar
+            # El árbol decide izquierda/derecha comparando IDs
+            self._insert_iterative(kid_id, slot)
         
-        # Si no está vacío, buscar dónde insertar
-        # El árbol decide izquierda/derecha comparando IDs
-        return self._insert_recursive(self.root, kid)
+        self._log("insert", kid_id, name, age)
+        return True
     
-    def _insert_recursive(self, current_node, kid):
-        """Función recursiva para insertar un Kid"""
-        # Si el ID ya existe, no insertarlo
-        if kid.id == current_node.kid.id:
-            return False
-        
-        # Si el ID es menor, va al hijo izquierdo (children[0])
-        if kid.id < current_node.kid.id:
-            if current_node.children[0] is None:
-                current_node.children[0] = Node(kid)
-                return True
-            else:
-                return self._insert_recursive(current_node.children[0], kid)
+    def _log(self, *record):
+        """Agrega la escritura al registro en disco (WAL), si hay uno"""
+        if self.wal is not None:
+            self.wal.append(record)
+    
+    def _insert_iterative(self, kid_id, slot):
+        """Inserta un Kid bajando por el árbol con un ciclo (sin recursión)
         
-        # Si el ID es mayor, va al hijo derecho (children[1])
-        else:
-            if current_node.children[1] is None:
-                current_node.children[1] = Node(kid)
+        Sin recursión no hay límite de profundidad, por lo que IDs
+        secuenciales (que degeneran el árbol en una lista) no rompen la pila.
+        """
+        ids = self.kids.ids
+        current_node = self.root
+        nodes = 0  # Nodos comparados al bajar (para los contadores)
+        while True:
+            # El nuevo Kid queda dentro de este subárbol: su estructura cambia
+            current_node.cache = None
+            nodes += 1
+            
+            # Si el ID ya existe, no insertarlo
+            current_id = ids[current_node.slot]
+            if kid_id == current_id:
+                return False
+            
+            # Si el ID es menor, va al hijo izquierdo (children[0])
+            # Si el ID es mayor, va al hijo derecho (children[1])
+            direction = 0 if kid_id < current_id else 1
+            child = current_node.children[direction]
+            if child is None:
+                current_node.children[direction] = self.node_class(slot)
+                if self._delta is not None:
+                    self._delta.touch(current_node)
+                    self._delta.touch(current_node.children[direction])
+                if self._stats is not None:
+                    self._stats.record("insert", nodes)
+                # El nuevo nodo queda a profundidad nodes + 1
+                if self._height is not None:
+                    self._height = max(self._height, nodes + 1)
                 return True
-            else:
-                return self._insert_recursive(current_node.children[1], kid)
+            current_node = child
     
     def search(self, kid_id: int):
         """Busca un Kid por ID en el árbol"""
-        return self._search_recursive(self.root, kid_id)
-    
-    def _search_recursive(self, current_node, kid_id):
-        """Función recursiva para buscar un Kid por ID"""
-        # Si llegamos a None, el ID no existe
-        if current_node is None:
-            return False
+        if self._stats is not None:
+            nodes, comparisons, found = self._walk_counted(kid_id)
+            self._stats.record("search", nodes, comparisons)
+            return found
+        ids = self.kids.ids
+        current_node = self.root
+        while current_node is not None:
+            # Si encontramos el ID
+            current_id = ids[current_node.slot]
+            if kid_id == current_id:
+                return True
+            
+            # Menor: hijo izquierdo (children[0]); mayor: hijo derecho (children[1])
+            if kid_id < current_id:
+                current_node = current_node.children[0]
+            else:
+                current_node = current_node.children[1]
         
-        # Si encontramos el ID
-        if kid_id == current_node.kid.id:
-            return True
+        # Si llegamos a None, el ID no existe
+        return False
+    
+    def _walk_counted(self, kid_id):
+        """Recorre el camino de búsqueda de kid_id contando lo que hace search()
         
-        # Si el ID es menor, buscar en el hijo izquierdo (children[0])
-        if kid_id < current_node.kid.id:
-            return self._search_recursive(current_node.children[0], kid_id)
+        Solo se usa con los contadores activados, así search() no paga la
+        cuenta cuando están desactivados.
         
-        # Si el ID es mayor, buscar en el hijo derecho (children[1])
-        else:
-            return self._search_recursive(current_node.children[1], kid_id)
+        Returns:
+            Tupla (nodos visitados, comparaciones de IDs, si se encontró)
+        """
+        ids = self.kids.ids
+        nodes = comparisons = 0
+        current_node = self.root
+        while current_node is not None:
+            nodes += 1
+            comparisons += 1
+            current_id = ids[current_node.slot]
+            if kid_id == current_id:
+                return nodes, comparisons, True
+            comparisons += 1
+            current_node = current_node.children[0 if kid_id < current_id else 1]
+        return nodes, comparisons, False
     
     def prune(self, kid_id: int):
-        """Poda (elimina) un Kid del árbol por ID"""
-        if kid_id in self.saved_data:
-            self.saved_data.remove(kid_id)
+        """Poda (elimina) un Kid del árbol por ID
         
-        self.root = self._prune_recursive(self.root, kid_id)
+        Retorna False si el Kid no estaba: no hace falta buscarlo antes.
+        """
+        self.saved_data.pop(kid_id, None)
+        if not self._prune_iterative(kid_id):
+            return False
+        self._log("prune", kid_id)
         return True
     
-    def _prune_recursive(self, current_node, kid_id):
-        """Función recursiva para podar (eliminar) un Kid"""
+    def _prune_iterative(self, kid_id):
+        """Poda (elimina) un Kid sin recursión"""
+        ids = self.kids.ids
+        parent = None
+        direction = 0
+        current_node = self.root
+        nodes = 0  # Nodos recorridos (para los contadores)
+        
+        # Buscar el nodo a podar recordando su padre; la estructura de todos
+        # los nodos del camino cambia, así que se invalida su caché
+        while current_node is not None and kid_id != ids[current_node.slot]:
+            current_node.cache = None
+            nodes += 1
+            parent = current_node
+            direction = 0 if kid_id < ids[current_node.slot] else 1
+            current_node = current_node.children[direction]
+        
+        if self._stats is not None:
+            self._stats.record("prune", nodes + (current_node is not None))
         # Si el nodo es None, no hay nada que podar
         if current_node is None:
-            return None
+            return False
+        
+        # Liberar el slot del Kid podado en el almacén
+        self.kids.release(current_node.slot)
+        target, target_parent = current_node, parent
+        
+        # Caso 4: El nodo tiene dos hijos
+        # Se copia el Kid con el ID más pequeño del subárbol derecho
+        # y se poda ese nodo, que como máximo tiene un hijo derecho
+        if current_node.children[0] is not None and current_node.children[1] is not None:
+            current_node.cache = None
+            parent = current_node
+            direction = 1
+            min_node = current_node.children[1]
+            while min_node.children[0] is not None:
+                min_node.cache = None
+                parent = min_node
+                direction = 0
+                min_node = min_node.children[0]
+            current_node.slot = min_node.slot
+            current_node = min_node
         
-        # Buscar el nodo a podar
-        if kid_id < current_node.kid.id:
-            current_node.children[0] = self._prune_recursive(current_node.children[0], kid_id)
-        elif kid_id > current_node.kid.id:
-            current_node.children[1] = self._prune_recursive(current_node.children[1], kid_id)
+        # Casos 1, 2 y 3: sin hijos o con un solo hijo
+        if current_node.children[0] is not None:
+            replacement = current_node.children[0]
         else:
-            # Encontramos el nodo a podar
-            
-            # Caso 1: El nodo no tiene hijos
-            if current_node.children[0] is None and current_node.children[1] is None:
-                return None
-            
-            # Caso 2: El nodo solo tiene hijo derecho
-            if current_node.children[0] is None:
-                return current_node.children[1]
-            
-            # Caso 3: El nodo solo tiene hijo izquierdo
-            if current_node.children[1] is None:
-                return current_node.children[0]
-            
-            # Caso 4: El nodo tiene dos hijos
-            # Encontrar el Kid con el ID más pequeño en el subárbol derecho
-            min_node = self._find_minimum(current_node.children[1])
-            current_node.kid = min_node.kid
-            current_node.children[1] = self._prune_recursive(current_node.children[1], min_node.kid.id)
+            replacement = current_node.children[1]
         
-        return current_node
+        if parent is None:
+            self.root = replacement
+        else:
+            parent.children[direction] = replacement
+        # La poda puede bajar la altura; se recalcula cuando se pida
+        self._height = None
+        
+        if self._delta is not None:
+            # Cambiaron el padre del nodo quitado y, si se copió el sucesor,
+            # el nodo que recibió al nuevo Kid y su padre (que ve otro hijo)
+            if parent is not None:
+                self._delta.touch(parent)
+            if target is not current_node:
+                self._delta.touch(target)
+                if target_parent is not None:
+                    self._delta.touch(target_parent)
+        return True
     
     def _find_minimum(self, node):
         """Encuentra el nodo con el valor mínimo"""
@@ -129,44 +242,279 @@ class BinarySearchTree:
             current = current.children[0]
         return current
     
+    def _iter_inorder_nodes(self):
+        """Generador de nodos en inorden usando una pila explícita"""
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            # Bajar por la izquierda guardando los nodos pendientes
+            while node is not None:
+                stack.append(node)
+                node = node.children[0]
+            node = stack.pop()
+            yield node
+            node = node.children[1]
+    
+    def _iter_preorder_nodes(self):
+        """Generador de nodos en preorden usando una pila explícita
+        
+        Insertar los Kids en este orden reconstruye exactamente la misma
+        forma del árbol (ver build_from_preorder).
+        """
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.children[1] is not None:
+                stack.append(node.children[1])
+            if node.children[0] is not None:
+                stack.append(node.children[0])
+    
+    def build_from_preorder(self, kids):
+        """Reemplaza el árbol por uno con la forma dada por un preorden, en O(n)
+        
+        Args:
+            kids: Tuplas (id, nombre, edad) en preorden (ver _iter_preorder_nodes)
+        
+        Cada nodo nuevo es hijo izquierdo del tope de la pila o, si su ID es
+        mayor, hijo derecho del último ancestro con ID menor. Así no se baja
+        desde la raíz por cada Kid, aunque el árbol sea una lista degenerada.
+        """
+        self.clear()
+        store = self.kids
+        ids = store.ids
+        stack = []
+        for kid_id, name, age in kids:
+            node = self.node_class(store.add(kid_id, name, age))
+            self.saved_data[kid_id] = None
+            if not stack:
+                self.root = node
+            else:
+                parent = None
+                while stack and ids[stack[-1].slot] < kid_id:
+                    parent = stack.pop()
+                if parent is not None:
+                    parent.children[1] = node
+                else:
+                    stack[-1].children[0] = node
+            stack.append(node)
+        self._height = None
+    
     def inorder(self):
         """Recorrido inorden: izquierda -> raíz -> derecha"""
-        result = []
-        self._inorder_recursive(self.root, result)
-        return result
-    
-    def _inorder_recursive(self, node, result):
-        """Función recursiva para recorrido inorden"""
-        if node is not None:
-            self._inorder_recursive(node.children[0], result)
-            result.append(node.kid.id)
-            self._inorder_recursive(node.children[1], result)
+        ids = self.kids.ids
+        return [ids[node.slot] for node in self._iter_inorder_nodes()]
     
     def preorder(self):
         """Recorrido preorden: raíz -> izquierda -> derecha"""
+        ids = self.kids.ids
         result = []
-        self._preorder_recursive(self.root, result)
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            result.append(ids[node.slot])
+            # Se apila primero el derecho para visitar antes el izquierdo
+            if node.children[1] is not None:
+                stack.append(node.children[1])
+            if node.children[0] is not None:
+                stack.append(node.children[0])
         return result
     
-    def _preorder_recursive(self, node, result):
-        """Función recursiva para recorrido preorden"""
-        if node is not None:
-            result.append(node.kid.id)
-            self._preorder_recursive(node.children[0], result)
-            self._preorder_recursive(node.children[1], result)
-    
     def postorder(self):
         """Recorrido postorden: izquierda -> derecha -> raíz"""
+        # Se recorre raíz -> derecha -> izquierda y se invierte el resultado
+        ids = self.kids.ids
         result = []
-        self._postorder_recursive(self.root, result)
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            result.append(ids[node.slot])
+            if node.children[0] is not None:
+                stack.append(node.children[0])
+            if node.children[1] is not None:
+                stack.append(node.children[1])
+        result.reverse()
         return result
     
-    def _postorder_recursive(self, node, result):
-        """Función recursiva para recorrido postorden"""
-        if node is not None:
-            self._postorder_recursive(node.children[0], result)
-            self._postorder_recursive(node.children[1], result)
-            result.append(node.kid.id)
+    def _path_to(self, key):
+        """Camino (nodo, dirección) desde la raíz hasta key y el nodo de key
+        
+        Lanza ValueError si key no está en el árbol.
+        """
+        ids = self.kids.ids
+        path = []
+        node = self.root
+        while node is not None and ids[node.slot] != key:
+            direction = 0 if key < ids[node.slot] else 1
+            path.append((node, direction))
+            node = node.children[direction]
+        if node is None:
+            raise ValueError(f"Cursor {key} is not in the tree")
+        return path, node
+    
+    def iter_inorder(self, after=None):
+        """Generador del recorrido inorden (sin armar la lista completa)
+        
+        Args:
+            after: Cursor opcional. Si se indica, el recorrido continúa con el
+                   primer valor mayor que after, en O(log n) para reanudar.
+        """
+        ids = self.kids.ids
+        stack = []
+        node = self.root
+        if after is not None:
+            # Reconstruir la pila como si ya se hubiera visitado hasta after
+            while node is not None:
+                if ids[node.slot] > after:
+                    stack.append(node)
+                    node = node.children[0]
+                else:
+                    node = node.children[1]
+        while True:
+            while node is not None:
+                stack.append(node)
+                node = node.children[0]
+            if not stack:
+                return
+            node = stack.pop()
+            yield ids[node.slot]
+            node = node.children[1]
+    
+    def iter_preorder(self, after=None):
+        """Generador del recorrido preorden
+        
+        Args:
+            after: Cursor opcional (un valor ya recibido). El recorrido continúa
+                   justo después de él; lanza ValueError si ya no está en el árbol.
+        """
+        ids = self.kids.ids
+        if after is None:
+            stack = [self.root] if self.root is not None else []
+        else:
+            # Pendientes: los hijos derechos de los ancestros donde se bajó
+            # por la izquierda, y luego los hijos del propio cursor
+            path, node = self._path_to(after)
+            stack = [ancestor.children[1] for ancestor, direction in path
+                     if direction == 0 and ancestor.children[1] is not None]
+            if node.children[1] is not None:
+                stack.append(node.children[1])
+            if node.children[0] is not None:
+                stack.append(node.children[0])
+        while stack:
+            node = stack.pop()
+            yield ids[node.slot]
+            if node.children[1] is not None:
+                stack.append(node.children[1])
+            if node.children[0] is not None:
+                stack.append(node.children[0])
+    
+    def iter_postorder(self, after=None):
+        """Generador del recorrido postorden
+        
+        Cada entrada de la pila es (nodo, hijos_listos): un nodo se entrega
+        cuando sus dos subárboles ya se recorrieron.
+        
+        Args:
+            after: Cursor opcional (un valor ya recibido). El recorrido continúa
+                   justo después de él; lanza ValueError si ya no está en el árbol.
+        """
+        ids = self.kids.ids
+        if after is None:
+            stack = [(self.root, False)] if self.root is not None else []
+        else:
+            # Cada ancestro queda pendiente; si se bajó por su izquierda,
+            # también falta recorrer su subárbol derecho
+            path, _ = self._path_to(after)
+            stack = []
+            for ancestor, direction in path:
+                stack.append((ancestor, True))
+                if direction == 0 and ancestor.children[1] is not None:
+                    stack.append((ancestor.children[1], False))
+        while stack:
+            node, children_ready = stack.pop()
+            if children_ready:
+                yield ids[node.slot]
+                continue
+            stack.append((node, True))
+            if node.children[1] is not None:
+                stack.append((node.children[1], False))
+            if node.children[0] is not None:
+                stack.append((node.children[0], False))
+    
+    def begin_delta(self):
+        """Empieza a registrar los cambios de la próxima escritura"""
+        self._delta = TreeDelta()
+    
+    def end_delta(self):
+        """Deja de registrar y retorna los nodos modificados por la escritura
+        
+        El ABB no rota, así que solo cambian los hijos del padre del nodo
+        insertado o podado (y el nodo que recibe al sucesor en una poda).
+        Si la escritura reconstruyó el árbol completo (ver ScapegoatTree),
+        rebuilt es True y no se listan nodos.
+        """
+        delta, self._delta = self._delta, None
+        return {
+            "rebuilt": delta.rebuilt,
+            "root": self.kids.ids[self.root.slot] if self.root is not None else None,
+            "rotations": delta.rotations,
+            "changed_nodes": [] if delta.rebuilt else [self._describe_node(node) for node in delta.nodes]
+        }
+    
+    def enable_stats(self):
+        """Activa los contadores del camino caliente (empiezan en cero)"""
+        self._stats = HotPathStats()
+    
+    def disable_stats(self):
+        """Desactiva los contadores y descarta lo contado"""
+        self._stats = None
+    
+    def get_stats(self):
+        """Contadores del camino caliente (ver HotPathStats.to_dict), None si están desactivados
+        
+        La altura se calcula recorriendo el árbol completo, O(n).
+        """
+        if self._stats is None:
+            return None
+        return self._stats.to_dict(len(self.saved_data), self.height())
+    
+    def _describe_node(self, node):
+        """Datos de un solo nodo; los hijos se indican por su ID"""
+        left, right = node.children
+        return {
+            "kid": self.kids.to_dict(node.slot),
+            "children": [
+                self.kids.ids[left.slot] if left is not None else None,
+                self.kids.ids[right.slot] if right is not None else None
+            ]
+        }
+    
+    def height(self):
+        """Altura del árbol (0 si está vacío)
+        
+        El ABB no guarda alturas en los nodos: las inserciones mantienen la
+        altura guardada y solo después de una poda se recorre todo el árbol,
+        O(n), una vez. Así /metrics no recorre el árbol en cada lectura.
+        """
+        if self._height is not None:
+            return self._height
+        height = 0
+        stack = [(self.root, 1)] if self.root is not None else []
+        while stack:
+            node, depth = stack.pop()
+            height = max(height, depth)
+            for child in node.children:
+                if child is not None:
+                    stack.append((child, depth + 1))
+        self._height = height
+        return height
+    
+    def summary(self):
+        """Resumen del árbol: cantidad de Kids y ID de la raíz"""
+        return {
+            "size": len(self.saved_data),
+            "root": self.kids.ids[self.root.slot] if self.root is not None else None
+        }
     
     def get_structure(self):
         """Obtiene la estructura del árbol en formato diccionario"""
@@ -175,38 +523,53 @@ class BinarySearchTree:
         return self._node_to_dict(self.root)
     
     def _node_to_dict(self, node):
-        """Convierte un nodo a diccionario"""
+        """Convierte un nodo a diccionario
+        
+        Cada nodo guarda su diccionario en node.cache. Las escrituras borran
+        la caché de los nodos de su camino, así que aquí solo se reconstruyen
+        esos nodos; el resto de los subárboles reutiliza su diccionario.
+        """
         if node is None:
             return None
+        if node.cache is not None:
+            return node.cache
         
-        return {
-            "kid": {
-                "id": node.kid.id,
-                "name": node.kid.name,
-                "age": node.kid.age
-            },
-            "children": [
-                self._node_to_dict(node.children[0]),
-                self._node_to_dict(node.children[1])
-            ]
-        }
+        # Postorden con pila explícita, bajando solo a los nodos sin caché
+        stack = [(node, False)]
+        while stack:
+            current, children_ready = stack.pop()
+            left, right = current.children
+            if not children_ready:
+                stack.append((current, True))
+                if right is not None and right.cache is None:
+                    stack.append((right, False))
+                if left is not None and left.cache is None:
+                    stack.append((left, False))
+                continue
+            current.cache = {
+                "kid": self.kids.to_dict(current.slot),
+                "children": [
+                    left.cache if left is not None else None,
+                    right.cache if right is not None else None
+                ]
+            }
+        return node.cache
     
     def _collect_kids_by_age(self, node, min_age, result):
-        """Función recursiva para recolectar Kids por edad (recorrido inorden)"""
-        if node is not None:
-            # Recorrer izquierda
-            self._collect_kids_by_age(node.children[0], min_age, result)
+        """Recolecta Kids por edad (recorrido inorden desde node)"""
+        ages = self.kids.ages
+        stack = []
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.children[0]
+            node = stack.pop()
             
             # Procesar nodo actual
-            if node.kid.age >= min_age:
-                result.append({
-                    "id": node.kid.id,
-                    "name": node.kid.name,
-                    "age": node.kid.age
-                })
+            if ages[node.slot] >= min_age:
+                result.append(self.kids.to_dict(node.slot))
             
-            # Recorrer derecha
-            self._collect_kids_by_age(node.children[1], min_age, result)
+            node = node.children[1]
     
     def get_kids_grouped_by_age_ranges(self, range_size: int):
         """Agrupa los Kids por rangos de edad
@@ -254,29 +617,52 @@ class BinarySearchTree:
         return ranges
     
     def _collect_all_ages(self, node, ages_dict):
-        """Función recursiva para recolectar todas las edades y contarlas"""
-        if node is not None:
-            # Recorrer izquierda
-            self._collect_all_ages(node.children[0], ages_dict)
+        """Recolecta todas las edades y las cuenta (recorrido con pila explícita)"""
+        ages = self.kids.ages
+        stack = [node] if node is not None else []
+        while stack:
+            current = stack.pop()
             
             # Contar edad del nodo actual
-            age = node.kid.age
+            age = ages[current.slot]
             if age in ages_dict:
                 ages_dict[age] += 1
             else:
                 ages_dict[age] = 1
             
-            # Recorrer derecha
-            self._collect_all_ages(node.children[1], ages_dict)
+            if current.children[0] is not None:
+                stack.append(current.children[0])
+            if current.children[1] is not None:
+                stack.append(current.children[1])
     
     def get_saved_data(self):
         """Retorna todos los datos que han sido insertados"""
-        return self.saved_data
+        return list(self.saved_data)
+    
+    def iter_saved_data(self, after=None):
+        """Generador de los IDs guardados en orden de inserción
+        
+        Args:
+            after: Cursor opcional (un valor ya recibido). Lanza ValueError si
+                   ya no está guardado. El dict no permite saltar directo a
+                   una posición, así que reanudar cuesta O(posición del cursor).
+        """
+        saved = iter(self.saved_data)
+        if after is not None:
+            if after not in self.saved_data:
+                raise ValueError(f"Cursor {after} is not in the saved data")
+            for value in saved:
+                if value == after:
+                    break
+        yield from saved
     
     def clear(self):
         """Limpia todo el árbol"""
         self.root = None
-        self.saved_data = []
+        self.kids = KidStore()
+        self.saved_data = {}
+        self._height = 0
+        self._log("clear")
 
 
     def create_sample_tree(self):
@@ -292,5 +678,32 @@ class BinarySearchTree:
             sample_tree.insert(kid_id)
         return sample_tree
 
+
+def create_tree(scapegoat=False, alpha=0.6):
+    """Crea un Árbol Binario de Búsqueda
+    
+    Args:
+        scapegoat: Mantener la altura en O(log n) reconstruyendo subárboles
+                   desbalanceados (ver ScapegoatTree); la API y las
+                   respuestas son las mismas
+        alpha: Balance en peso del modo scapegoat, entre 0.5 y 1
+    """
+    if scapegoat:
+        from app.services.scapegoat_service import ScapegoatTree
+        return ScapegoatTree(alpha)
+    return BinarySearchTree()
+
+
+def create_configured_tree():
+    """Crea un Árbol Binario de Búsqueda configurado con las variables de entorno
+    
+    Con BST_SCAPEGOAT=1 se usa el modo scapegoat con alpha = BST_ALPHA.
+    """
+    return create_tree(
+        os.environ.get("BST_SCAPEGOAT", "0") == "1",
+        alpha=float(os.environ.get("BST_ALPHA", "0.6"))
+    )
+
+
 # Instancia global del árbol
-tree = BinarySearchTree()
+tree = create_configured_tree()
@@ -0,0 +1,247 @@
+# Registro de escrituras en disco (Write-Ahead Log) con snapshots
+# Los árboles viven en memoria; para sobrevivir a un reinicio, cada escritura
+# exitosa (insertar, podar, limpiar) se agrega al final de un archivo de log.
+# Cada cierto número de escrituras se guarda un snapshot del árbol completo y
+# el log se vacía, así el log no crece sin límite y la recuperación es rápida.
+#
+# Archivos por árbol, dentro del directorio configurado:
+#   <nombre>.wal       Una operación JSON por línea, p. ej. ["insert", 5]
+#   <nombre>.snapshot  Snapshot binario del árbol (ver app/services/snapshot.py)
+
+import atexit
+import json
+import os
+from contextlib import contextmanager
+
+from app.services.snapshot import open_snapshot, save_snapshot
+from app.services.tree_service import BinarySearchTree
+
+
+class WriteAheadLog:
+    """
+    Log de operaciones de solo agregado, con fsync por lotes y compactación.
+    
+    Cada registro se escribe y se vacía al sistema operativo (flush) al
+    momento, así que una caída del proceso no pierde escrituras confirmadas.
+    El fsync (que espera al disco y es lo caro) se hace cada fsync_every
+    registros; con fsync_every=1 ni una caída del sistema pierde escrituras.
+    
+    Args:
+        directory: Directorio donde se guardan el log y el snapshot
+        name: Nombre base de los archivos (p. ej. "avl")
+        save: Función que guarda el snapshot del árbol en la ruta recibida
+        fsync_every: Registros entre cada fsync (0 = nunca, lo decide el SO)
+        snapshot_every: Registros entre cada snapshot + truncado del log
+                        (0 = nunca se compacta automáticamente)
+    """
+    def __init__(self, directory, name, save, fsync_every=64, snapshot_every=100_000):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, f"{name}.wal")
+        self.snapshot_path = os.path.join(directory, f"{name}.snapshot")
+        self.save = save
+        self.fsync_every = fsync_every
+        self.snapshot_every = snapshot_every
+        self._file = None
+        self._unsynced = 0  # Registros escritos desde el último fsync
+        self._since_snapshot = 0  # Registros escritos desde el último snapshot
+        self._grouping = False  # Dentro de group(): el flush se hace al final
+    
+    def read(self):
+        """Lee los registros del log (los posteriores al último snapshot)
+        
+        Una última línea incompleta (el proceso cayó mientras la escribía)
+        se descarta y se recorta del archivo, para que los registros nuevos
+        no queden pegados a ella.
+        """
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        
+        valid_size = 0
+        with open(self.path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                valid_size += len(line)
+        if valid_size < os.path.getsize(self.path):
+            with open(self.path, "r+b") as file:
+                file.truncate(valid_size)
+        
+        self._since_snapshot = len(records)
+        return records
+    
+    def open(self):
+        """Abre el log para agregar registros al final"""
+        self._file = open(self.path, "ab")
+    
+    def append(self, record):
+        """Agrega un registro; hace fsync y compacta según la configuración"""
+        self._file.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+        self._unsynced += 1
+        self._since_snapshot += 1
+        if not self._grouping:
+            self._commit()
+    
+    def _commit(self):
+        """Vacía lo escrito al SO; hace fsync y compacta según la configuración"""
+        self._file.flush()
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            self.sync()
+        if self.snapshot_every and self._since_snapshot >= self.snapshot_every:
+            self.compact()
+    
+    @contextmanager
+    def group(self):
+        """Agrupa los registros escritos dentro del bloque (group commit)
+        
+        Se vacían al SO con un solo flush al terminar el bloque y, si toca,
+        con un solo fsync para todo el grupo. El bloque debe ejecutarse con
+        el candado de escritura del árbol tomado.
+        """
+        self._grouping = True
+        try:
+            yield
+        finally:
+            self._grouping = False
+            self._commit()
+    
+    def sync(self):
+        """Fuerza a disco los registros pendientes"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+    
+    def compact(self):
+        """Guarda un snapshot del árbol y vacía el log
+        
+        El snapshot reemplaza al anterior de forma atómica. Si el proceso cae
+        después del reemplazo pero antes de vaciar el log, al recuperar se
+        aplican de nuevo registros que el snapshot ya incluye; el resultado
+        es el mismo porque insertar un valor existente o podar uno ausente
+        no cambia nada.
+        """
+        self.save(self.snapshot_path)
+        
+        self._file.close()
+        self._file = open(self.path, "wb")
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._since_snapshot = 0
+    
+    def close(self):
+        """Hace fsync de lo pendiente y cierra el log"""
+        if self._file is not None and not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+# ============================================
+# ESTADO DE CADA ÁRBOL
+# ============================================
+
+def _restore_avl(avl_tree, snapshot, records):
+    """Recupera el AVL con una sola construcción balanceada
+    
+    En lugar de insertar uno por uno (O(n log n) con rotaciones), primero se
+    calcula el contenido final aplicando el log sobre el snapshot y después
+    se construye el árbol balanceado en O(n) con load_sorted. La forma puede
+    diferir de la original, pero el contenido es el mismo.
+    
+    Los valores ordenados del snapshot se reutilizan tal cual: solo se
+    quitan los podados y se mezclan los agregados por el log (sorted()
+    detecta las dos secuencias ordenadas y las mezcla en O(n)).
+    """
+    # Valores en orden de inserción (para saved_data)
+    values = dict.fromkeys(snapshot.order) if snapshot is not None else {}
+    keys = snapshot.keys if snapshot is not None else []
+    added = {}  # Valores que el log agregó y siguen en el árbol
+    removed = set()  # Valores del snapshot que el log podó
+    for record in records:
+        operation = record[0]
+        if operation == "insert" or operation == "insert_many":
+            new_values = [record[1]] if operation == "insert" else record[1]
+            for value in new_values:
+                if value not in values:
+                    values[value] = None
+                    added[value] = None
+        elif operation == "prune":
+            if record[1] in values:
+                del values[record[1]]
+                added.pop(record[1], None)
+                removed.add(record[1])
+        elif operation == "prune_range":
+            lo, hi = record[1], record[2]
+            for value in [value for value in values if lo <= value <= hi]:
+                del values[value]
+                added.pop(value, None)
+                removed.add(value)
+        elif operation == "clear":
+            values.clear()
+            added.clear()
+            keys = []
+    
+    if removed:
+        keys = [value for value in keys if value not in removed]
+    if added:
+        keys = sorted(list(keys) + sorted(added))
+    avl_tree.load_sorted(keys, values)
+
+
+def _restore_bst(tree, snapshot, records):
+    """Recupera el BST: construye el snapshot en O(n) y aplica el log en orden
+    
+    La forma de un BST depende del orden de inserción, así que no se
+    reconstruye ordenado: el snapshot en preorden recrea la misma forma y
+    los registros posteriores (a lo sumo snapshot_every) se aplican uno a uno.
+    """
+    tree.clear()
+    if snapshot is not None:
+        tree.build_from_preorder(snapshot.kids())
+        tree.saved_data = dict.fromkeys(snapshot.order)
+    
+    for record in records:
+        operation = record[0]
+        if operation == "insert":
+            tree.insert(*record[1:])
+        elif operation == "prune":
+            tree.prune(record[1])
+        elif operation == "clear":
+            tree.clear()
+
+
+def attach_wal(tree, directory, name, fsync_every=64, snapshot_every=100_000):
+    """Recupera el árbol desde disco y empieza a registrar sus escrituras
+    
+    Args:
+        tree: avl_tree (AVLTree o ArenaAVLTree) o tree (BinarySearchTree)
+        directory: Directorio del log y del snapshot
+        name: Nombre base de los archivos
+        fsync_every: Registros entre cada fsync (ver WriteAheadLog)
+        snapshot_every: Registros entre cada compactación
+    
+    Returns:
+        El WriteAheadLog ya conectado al árbol (tree.wal)
+    """
+    restore = _restore_bst if isinstance(tree, BinarySearchTree) else _restore_avl
+    
+    wal = WriteAheadLog(directory, name, lambda path: save_snapshot(tree, path),
+                        fsync_every, snapshot_every)
+    records = wal.read()
+    if os.path.exists(wal.snapshot_path):
+        with open_snapshot(wal.snapshot_path) as snapshot:
+            restore(tree, snapshot, records)
+    elif records:
+        restore(tree, None, records)
+    
+    wal.open()
+    # Con el árbol recuperado, un snapshot nuevo deja el log vacío
+    if records:
+        wal.compact()
+    tree.wal = wal
+    atexit.register(wal.close)
+    return wal
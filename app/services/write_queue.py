@@ -0,0 +1,106 @@
+# Cola de escrituras con agrupación (group commit)
+# Con ráfagas de escrituras cada petición toma el candado, recorre el árbol,
+# rebalancea, arma su respuesta y escribe su registro en el WAL por separado.
+# Con WRITE_COALESCE_MS > 0 las escrituras que llegan juntas se agrupan: la
+# primera espera unos milisegundos a las que llegan detrás y aplica el lote
+# completo de una vez (un solo candado, una sola decisión de reconstruir, un
+# solo render por modo de respuesta y un solo flush del log). Cada petición
+# recibe igual su propio resultado. Cada escritura tarda a lo sumo la ventana
+# más lo que tarde su lote; a cambio el servidor acepta muchas más por segundo.
+
+import os
+import threading
+from functools import partial
+
+# Milisegundos que se esperan escrituras para un lote (0 = sin agrupar)
+COALESCE_WINDOW_MS = float(os.environ.get("WRITE_COALESCE_MS", "0"))
+# Un lote lleno se aplica sin esperar al final de la ventana
+COALESCE_MAX_BATCH = int(os.environ.get("WRITE_COALESCE_MAX", "256"))
+
+
+class _Batch:
+    """Escrituras de un lote y sus resultados"""
+    def __init__(self):
+        self.entries = []
+        self.results = None
+        self.full = threading.Event()  # Ya no entran más escrituras
+        self.done = threading.Event()  # Resultados listos
+
+
+class WriteQueue:
+    """
+    Agrupa escrituras concurrentes en lotes.
+    
+    La primera escritura que llega abre un lote y lo lidera: espera hasta
+    window segundos (o hasta que el lote tenga max_batch escrituras), cierra
+    el lote y lo aplica con apply_batch. Las que llegan mientras el lote está
+    abierto se suman a él y esperan a que el líder termine. No hay hilos
+    propios: el trabajo lo hace el hilo de la petición que lidera el lote.
+    
+    Args:
+        apply_batch: Función que recibe la lista de escrituras (en orden de
+                     llegada) y retorna un resultado por escritura; un
+                     resultado que es una excepción se lanza solo en la
+                     petición de esa escritura
+        window: Segundos que el lote queda abierto
+        max_batch: Escrituras como máximo por lote
+    """
+    def __init__(self, apply_batch, window, max_batch):
+        self.apply_batch = apply_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._open = None  # Lote que todavía acepta escrituras
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+    
+    def submit(self, entry):
+        """Agrega la escritura al lote abierto y retorna su resultado cuando se aplica"""
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            index = len(batch.entries)
+            batch.entries.append(entry)
+            if len(batch.entries) >= self.max_batch:
+                self._open = None
+                batch.full.set()
+        
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+                self.batches += 1
+                self.writes += len(batch.entries)
+            try:
+                batch.results = self.apply_batch(batch.entries)
+            except Exception as error:
+                batch.results = [error] * len(batch.entries)
+            batch.done.set()
+        else:
+            batch.done.wait()
+        
+        result = batch.results[index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+_create_lock = threading.Lock()
+
+
+def write_queue_for(tree, apply_batch):
+    """Cola de escrituras del árbol, o None si no se agrupan escrituras
+    
+    La cola se crea la primera vez que se pide (si WRITE_COALESCE_MS > 0) y
+    queda en tree.write_queue; apply_batch recibe el árbol y el lote.
+    """
+    if tree.write_queue is None and COALESCE_WINDOW_MS > 0:
+        with _create_lock:
+            if tree.write_queue is None:
+                tree.write_queue = WriteQueue(
+                    partial(apply_batch, tree), COALESCE_WINDOW_MS / 1000, COALESCE_MAX_BATCH
+                )
+    return tree.write_queue
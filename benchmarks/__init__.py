@@ -0,0 +1 @@
+# Benchmarks de los servicios de árboles (se ejecutan sin levantar el servidor)
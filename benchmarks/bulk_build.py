@@ -0,0 +1,53 @@
+"""Mide la carga masiva en paralelo (bulk_build) con distinta cantidad de procesos
+
+Carga los mismos valores aleatorios con 1, 2, 4, ... procesos (hasta la
+cantidad de núcleos) y muestra el tiempo y la aceleración respecto de un solo
+proceso, para el AVL de objetos y el AVL en arena. Uso:
+
+    python -m benchmarks.bulk_build               # 10^6 valores
+    python -m benchmarks.bulk_build 5000000
+"""
+import os
+import random
+import sys
+import time
+
+from app.services.avl_arena_service import ArenaAVLTree
+from app.services.avl_service import AVLTree
+from app.services.bulk_build import bulk_build
+
+
+def worker_counts():
+    """1, 2, 4, ... hasta la cantidad de núcleos (incluida)"""
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def seconds(tree_class, values, workers):
+    """Tiempo de cargar values en un árbol nuevo con workers procesos"""
+    tree = tree_class()
+    start = time.perf_counter()
+    bulk_build(tree, values, workers)
+    return time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'n':>9} {'storage':>8} {'workers':>8} {'seconds':>8} {'speedup':>8}")
+    for n in sizes:
+        values = random.Random(0).sample(range(-2 ** 61, 2 ** 61), n)
+        for name, tree_class in (("objects", AVLTree), ("arena", ArenaAVLTree)):
+            baseline = None
+            for workers in worker_counts():
+                elapsed = seconds(tree_class, values, workers)
+                baseline = baseline or elapsed
+                print(f"{n:>9} {name:>8} {workers:>8} {elapsed:>8.2f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000_000])
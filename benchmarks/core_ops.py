@@ -0,0 +1,74 @@
+"""Benchmark de las operaciones básicas de AVLTree y BinarySearchTree
+
+Mide operaciones por segundo de insert, search y prune llamando directamente
+a los servicios (sin HTTP). Uso:
+
+    python -m benchmarks.core_ops                 # 10^4, 10^5 y 10^6 claves
+    python -m benchmarks.core_ops 10000 100000    # tamaños personalizados
+"""
+import random
+import sys
+import time
+
+from app.services.avl_service import AVLTree
+from app.services.tree_service import BinarySearchTree
+
+
+def _ops_per_second(operation, values):
+    """Ejecuta operation(v) para cada valor y retorna operaciones por segundo"""
+    start = time.perf_counter()
+    for value in values:
+        operation(value)
+    elapsed = time.perf_counter() - start
+    return len(values) / elapsed if elapsed > 0 else float("inf")
+
+
+def bench_avl(n, seed=0):
+    """Mide el árbol AVL con claves aleatorias y con claves secuenciales"""
+    rng = random.Random(seed)
+    results = {}
+    for workload in ("random", "sequential"):
+        values = list(range(n))
+        if workload == "random":
+            rng.shuffle(values)
+        tree = AVLTree()
+        results[workload] = {
+            "insert": _ops_per_second(tree.insert, values),
+            "search": _ops_per_second(tree.search, values),
+            "prune": _ops_per_second(tree.prune, values),
+        }
+    return results
+
+
+def bench_bst(n, seed=0):
+    """Mide el ABB de Kids con IDs aleatorios
+
+    Con IDs secuenciales el ABB degenera en una lista (O(n) por operación),
+    por eso ese caso se mide con a lo sumo 10^4 claves.
+    """
+    rng = random.Random(seed)
+    results = {}
+    for workload, size in (("random", n), ("sequential", min(n, 10_000))):
+        values = list(range(size))
+        if workload == "random":
+            rng.shuffle(values)
+        tree = BinarySearchTree()
+        results[workload] = {
+            "insert": _ops_per_second(tree.insert, values),
+            "search": _ops_per_second(tree.search, values),
+            "prune": _ops_per_second(tree.prune, values),
+        }
+    return results
+
+
+def main(sizes):
+    print(f"{'tree':<5} {'n':>9} {'workload':<11} {'insert/s':>12} {'search/s':>12} {'prune/s':>12}")
+    for n in sizes:
+        for name, bench in (("avl", bench_avl), ("bst", bench_bst)):
+            for workload, ops in bench(n).items():
+                print(f"{name:<5} {n:>9} {workload:<11} "
+                      f"{ops['insert']:>12,.0f} {ops['search']:>12,.0f} {ops['prune']:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
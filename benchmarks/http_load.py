@@ -0,0 +1,195 @@
+"""Generador de carga HTTP en el mismo proceso, con percentiles de latencia
+
+Ejecuta la app de main.py sin red ni servidor: las peticiones pasan por un
+transporte ASGI de httpx, así que se mide todo lo que hace FastAPI (validar
+parámetros, pasar el endpoint síncrono al pool de hilos, serializar la
+respuesta) pero no el costo de los sockets. Muchos clientes concurrentes
+(tareas de asyncio) envían una mezcla de peticiones a /avl y /tree y al final
+se reporta por endpoint la cantidad de peticiones, errores, peticiones por
+segundo y latencias p50/p95/p99. Uso:
+
+    python -m benchmarks.http_load                          # 10^3, 10^4 y 10^5 valores
+    python -m benchmarks.http_load --sizes 100000 --mixes structure --clients 64
+    python -m benchmarks.http_load --response summary --threads 8 --output load.json
+
+Mezclas:
+    read-heavy   Búsquedas, rank y páginas de inorden con pocas escrituras
+    mixed        Inserciones, búsquedas y podas en los dos árboles
+    write-heavy  Solo inserciones y podas
+    structure    Estructura completa de los árboles (mide la serialización)
+
+Antes de cada tamaño se vacían los árboles y se cargan size valores al azar
+entre 0 y 2 * size, así la mitad de las búsquedas y podas encuentran su valor.
+Con el modo de respuesta por defecto (full) cada escritura serializa el árbol
+completo; --response summary muestra la diferencia.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+
+import anyio.to_thread
+import httpx
+
+from app.services.tree_service import tree
+from main import app
+
+# Endpoint -> (método, ruta, parámetros a partir de una clave y del modo de respuesta)
+ENDPOINTS = {
+    "avl insert": ("POST", "/avl/insert", lambda key, mode: {"value": key, "response": mode}),
+    "avl search": ("POST", "/avl/search", lambda key, mode: {"value": key}),
+    "avl prune": ("DELETE", "/avl/prune", lambda key, mode: {"value": key, "response": mode}),
+    "avl rank": ("GET", "/avl/rank", lambda key, mode: {"value": key}),
+    "avl inorder page": ("GET", "/avl/traversal/inorder", lambda key, mode: {"after": key, "limit": 100}),
+    "avl structure": ("GET", "/avl/structure", lambda key, mode: {}),
+    "tree insert": ("POST", "/tree/insert", lambda key, mode: {"kid_id": key, "age": key % 18, "response": mode}),
+    "tree search": ("POST", "/tree/search", lambda key, mode: {"kid_id": key}),
+    "tree prune": ("DELETE", "/tree/prune", lambda key, mode: {"kid_id": key, "response": mode}),
+    "tree inorder page": ("GET", "/tree/traversal/inorder", lambda key, mode: {"after": key, "limit": 100}),
+    "tree structure": ("GET", "/tree/structure", lambda key, mode: {}),
+}
+
+# Mezcla -> peso de cada endpoint
+MIXES = {
+    "read-heavy": {
+        "avl search": 35, "avl rank": 10, "avl inorder page": 5, "avl insert": 5,
+        "tree search": 35, "tree inorder page": 5, "tree insert": 5,
+    },
+    "mixed": {
+        "avl insert": 20, "avl search": 20, "avl prune": 10,
+        "tree insert": 20, "tree search": 20, "tree prune": 10,
+    },
+    "write-heavy": {
+        "avl insert": 35, "avl prune": 15, "tree insert": 35, "tree prune": 15,
+    },
+    "structure": {
+        "avl structure": 50, "tree structure": 50,
+    },
+}
+
+PRELOAD_BATCH = 100_000
+
+
+def percentile(sorted_values, p):
+    """Percentil p (0-100) por rango más cercano de una lista ordenada"""
+    index = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+async def preload(client, size, seed):
+    """Vacía los dos árboles y carga size valores al azar en cada uno"""
+    values = random.Random(seed).sample(range(2 * size), size)
+    await client.delete("/avl/clear")
+    await client.delete("/tree/clear")
+    for start in range(0, size, PRELOAD_BATCH):
+        await client.post("/avl/insert/batch", json=values[start:start + PRELOAD_BATCH])
+    # El ABB no tiene inserción por lotes: se carga directo en el servicio
+    with tree.lock.write():
+        for value in values:
+            tree.insert(value, "", value % 18)
+
+
+async def _run_client(client, weights, count, key_space, mode, seed, latencies, errors):
+    """Un cliente: envía count peticiones de la mezcla, una detrás de otra"""
+    rng = random.Random(seed)
+    for name in rng.choices(list(weights), list(weights.values()), k=count):
+        method, path, params = ENDPOINTS[name]
+        start = time.perf_counter()
+        response = await client.request(method, path, params=params(rng.randrange(key_space), mode))
+        latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors[name] += 1
+
+
+async def run_mix(client, mix, size, clients, requests_per_client, mode, seed):
+    """Corre una mezcla con clients clientes concurrentes y retorna un reporte por endpoint"""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _run_client(client, MIXES[mix], requests_per_client, 2 * max(size, 1), mode, seed + i,
+                    latencies, errors)
+        for i in range(clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    report = []
+    everything = []
+    for name in MIXES[mix]:
+        if latencies[name]:
+            report.append(_summary(name, sorted(latencies[name]), errors[name], elapsed))
+            everything.extend(latencies[name])
+    report.append(_summary("total", sorted(everything), sum(errors.values()), elapsed))
+    return report
+
+
+def _summary(name, latencies, errors, elapsed):
+    """Fila del reporte: latencias en milisegundos"""
+    return {
+        "endpoint": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def print_report(size, mix, clients, report):
+    print(f"\nsize={size} mix={mix} clients={clients}")
+    print(f"{'endpoint':<18} {'requests':>8} {'errors':>6} {'req/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for row in report:
+        print(f"{row['endpoint']:<18} {row['requests']:>8} {row['errors']:>6} "
+              f"{row['requests_per_second']:>9,.0f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+              f"{row['p99_ms']:>8.2f} {row['max_ms']:>8.2f}", flush=True)
+
+
+async def run_load(sizes, mixes, clients, requests_per_client, mode="full", threads=None, seed=0):
+    """Corre cada mezcla con cada tamaño de árbol y retorna todos los reportes"""
+    if threads:
+        # Hilos del pool donde Starlette ejecuta los endpoints síncronos (40 por defecto)
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+            for size in sizes:
+                await preload(client, size, seed)
+                for mix in mixes:
+                    report = await run_mix(client, mix, size, clients, requests_per_client, mode, seed)
+                    print_report(size, mix, clients, report)
+                    results.append({"size": size, "mix": mix, "clients": clients, "endpoints": report})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="In-process HTTP load test of the tree API")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--mixes", nargs="+", choices=list(MIXES), default=list(MIXES))
+    parser.add_argument("--clients", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=20, help="requests sent by each client")
+    parser.add_argument("--response", default="full", choices=["none", "summary", "delta", "full"],
+                        help="?response= mode of the write requests")
+    parser.add_argument("--threads", type=int, help="size of the threadpool for sync endpoints")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_load(args.sizes, args.mixes, args.clients, args.requests,
+                                   args.response, args.threads, args.seed))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"response": args.response, "threads": args.threads, "results": results}, file, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
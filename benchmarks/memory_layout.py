@@ -0,0 +1,41 @@
+"""Compara los bytes por nodo del AVL de objetos y del AVL en arena
+
+Construye ambos árboles con las mismas claves y mide la memoria reservada con
+tracemalloc (sin contar saved_data, que es igual en los dos). Uso:
+
+    python -m benchmarks.memory_layout            # 10^5 y 10^6 claves
+    python -m benchmarks.memory_layout 50000
+"""
+import random
+import sys
+import tracemalloc
+
+from app.services.avl_arena_service import ArenaAVLTree
+from app.services.avl_service import AVLTree
+
+
+def bytes_per_node(tree_class, values):
+    """Memoria del árbol (sin saved_data) dividida por la cantidad de nodos"""
+    tree = tree_class()
+    tracemalloc.start()
+    tree.insert(values[0])
+    for value in values[1:]:
+        tree._insert_iterative(value)
+    tree.saved_data = {}
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / len(values)
+
+
+def main(sizes):
+    print(f"{'n':>9} {'objects B/node':>15} {'arena B/node':>13} {'ratio':>7}")
+    for n in sizes:
+        values = list(range(n))
+        random.Random(0).shuffle(values)
+        objects = bytes_per_node(AVLTree, values)
+        arena = bytes_per_node(ArenaAVLTree, values)
+        print(f"{n:>9} {objects:>15.1f} {arena:>13.1f} {objects / arena:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000])
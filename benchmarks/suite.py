@@ -0,0 +1,306 @@
+"""Suite de benchmarks de los servicios de árboles, con resultados en JSON
+
+Corre cada carga de trabajo de benchmarks/workloads.py sobre AVLTree,
+ArenaAVLTree, BinarySearchTree, ScapegoatTree y una lista ordenada con
+bisect (la referencia sin árbol), llamando directamente a los servicios
+(sin HTTP).
+Por cada combinación reporta operaciones por segundo, memoria máxima
+(tracemalloc) y altura final, y guarda todo en un archivo JSON que se puede
+comparar con el de una corrida anterior. Uso:
+
+    python -m benchmarks.suite                               # 10^3 a 10^6 claves
+    python -m benchmarks.suite --sizes 1000 10000 --structures avl bisect
+    python -m benchmarks.suite --compare anterior.json       # marca regresiones
+
+Cargas:
+    random, sorted, reverse, zigzag  Insertar n claves en ese orden y buscar
+                                     todas (random además las poda todas)
+    zipf                             n búsquedas con popularidad de Zipf
+    churn                            n operaciones que alternan insertar y
+                                     podar con el tamaño fijo en n
+
+La memoria se mide en una segunda corrida de cada carga (tracemalloc hace
+más lentas las asignaciones y no debe afectar los tiempos); --no-memory la
+omite. Con --repeat N cada carga se corre N veces y se guarda el menor
+tiempo de cada operación, que es el menos afectado por el ruido. Con
+--compare el programa termina con código 1 si alguna medición quedó por
+debajo de --threshold veces la anterior.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from bisect import bisect_left
+
+from app.services.avl_arena_service import ArenaAVLTree
+from app.services.avl_service import AVLTree
+from app.services.scapegoat_service import ScapegoatTree
+from app.services.tree_service import BinarySearchTree
+from benchmarks.workloads import BUILD_ORDERS, churn_operations, random_keys, zipf_searches
+
+# Un ABB sin balanceo con claves ordenadas es una lista: O(n) por operación
+DEGENERATE_MAX_KEYS = 10_000
+# Insertar o podar en una lista mueve en promedio la mitad de sus elementos
+LIST_UPDATE_MAX_KEYS = 100_000
+
+
+class SortedList:
+    """Lista ordenada con búsqueda binaria (bisect): la referencia sin árbol"""
+    def __init__(self):
+        self.values = []
+
+    def insert(self, value):
+        index = bisect_left(self.values, value)
+        if index < len(self.values) and self.values[index] == value:
+            return False
+        self.values.insert(index, value)
+        return True
+
+    def search(self, value):
+        index = bisect_left(self.values, value)
+        return index < len(self.values) and self.values[index] == value
+
+    def prune(self, value):
+        index = bisect_left(self.values, value)
+        if index < len(self.values) and self.values[index] == value:
+            del self.values[index]
+            return True
+        return False
+
+    def load(self, keys):
+        self.values = sorted(keys)
+
+
+STRUCTURES = {
+    "avl": AVLTree,
+    "arena": ArenaAVLTree,
+    "bst": BinarySearchTree,
+    "scapegoat": ScapegoatTree,
+    "bisect": SortedList,
+}
+
+
+def tree_height(structure):
+    """Altura del árbol (None para la lista ordenada)"""
+    if isinstance(structure, AVLTree):
+        return structure._get_height(structure.root)
+    if isinstance(structure, BinarySearchTree):
+        # Recorrido con pila explícita: un ABB degenerado supera el límite de recursión
+        height = 0
+        stack = [(structure.root, 1)] if structure.root is not None else []
+        while stack:
+            node, depth = stack.pop()
+            height = max(height, depth)
+            stack.extend((child, depth + 1) for child in node.children if child is not None)
+        return height
+    return None
+
+
+def _seconds(operation, values):
+    """Tiempo de ejecutar operation(v) para cada valor"""
+    start = time.perf_counter()
+    for value in values:
+        operation(value)
+    return time.perf_counter() - start
+
+
+def _filled(structure_class, keys):
+    """Estructura con keys insertadas en orden aleatorio (preparación, no se mide)"""
+    structure = structure_class()
+    if isinstance(structure, SortedList):
+        structure.load(keys)
+    else:
+        for key in keys:
+            structure.insert(key)
+    return structure
+
+
+def _build_workload(order):
+    """Carga de construcción: insertar en el orden dado y buscar todas las claves"""
+    def prepare(n, seed):
+        keys = BUILD_ORDERS[order](n, seed)
+        return keys, random_keys(n, seed + 1)
+
+    def run(structure_class, inputs):
+        keys, lookups = inputs
+        structure = structure_class()
+        timings = [("insert", len(keys), _seconds(structure.insert, keys))]
+        timings.append(("search", len(lookups), _seconds(structure.search, lookups)))
+        height = tree_height(structure)
+        if order == "random":
+            timings.append(("prune", len(lookups), _seconds(structure.prune, lookups)))
+        return timings, height
+    return prepare, run
+
+
+def _prepare_zipf(n, seed):
+    keys = random_keys(n, seed)
+    return keys, zipf_searches(keys, n, seed + 1)
+
+
+def _run_zipf(structure_class, inputs):
+    keys, searches = inputs
+    structure = _filled(structure_class, keys)
+    return [("search", len(searches), _seconds(structure.search, searches))], tree_height(structure)
+
+
+def _prepare_churn(n, seed):
+    keys = random_keys(n, seed)
+    return keys, churn_operations(keys, n, seed + 1)
+
+
+def _run_churn(structure_class, inputs):
+    keys, operations = inputs
+    structure = _filled(structure_class, keys)
+    insert, prune = structure.insert, structure.prune
+    start = time.perf_counter()
+    for is_insert, key in operations:
+        if is_insert:
+            insert(key)
+        else:
+            prune(key)
+    elapsed = time.perf_counter() - start
+    return [("insert+prune", len(operations), elapsed)], tree_height(structure)
+
+
+# Carga -> (prepare(n, seed) -> entradas, run(clase, entradas) -> (tiempos, altura))
+WORKLOADS = {order: _build_workload(order) for order in BUILD_ORDERS}
+WORKLOADS["zipf"] = (_prepare_zipf, _run_zipf)
+WORKLOADS["churn"] = (_prepare_churn, _run_churn)
+
+
+def keys_for(structure, workload, n):
+    """Cantidad de claves a usar: los casos cuadráticos se miden con menos"""
+    if structure == "bst" and workload in ("sorted", "reverse", "zigzag"):
+        return min(n, DEGENERATE_MAX_KEYS)
+    if structure == "bisect" and workload != "zipf":
+        return min(n, LIST_UPDATE_MAX_KEYS)
+    return n
+
+
+def run_suite(sizes, structures, workloads, seed=0, memory=True, repeat=1):
+    """Corre todas las combinaciones y retorna una fila (dict) por operación medida"""
+    results = []
+    for n in sizes:
+        for workload in workloads:
+            prepare, run = WORKLOADS[workload]
+            for structure in structures:
+                keys = keys_for(structure, workload, n)
+                inputs = prepare(keys, seed)
+                timings, height = run(STRUCTURES[structure], inputs)
+                for _ in range(repeat - 1):
+                    # Se queda con el menor tiempo de cada operación: el ruido solo suma
+                    again, _ = run(STRUCTURES[structure], inputs)
+                    timings = [(operation, count, min(elapsed, other[2]))
+                               for (operation, count, elapsed), other in zip(timings, again)]
+                peak = None
+                if memory:
+                    tracemalloc.start()
+                    run(STRUCTURES[structure], inputs)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                for operation, count, elapsed in timings:
+                    row = {
+                        "structure": structure,
+                        "workload": workload,
+                        "operation": operation,
+                        "n": keys,
+                        "operations": count,
+                        "seconds": elapsed,
+                        "ops_per_second": count / elapsed if elapsed > 0 else None,
+                        "height": height,
+                        "peak_memory_bytes": peak,
+                    }
+                    results.append(row)
+                    print_row(row)
+    return results
+
+
+def print_header():
+    print(f"{'structure':<9} {'workload':<8} {'operation':<12} {'n':>9} "
+          f"{'ops/s':>12} {'height':>7} {'peak MB':>9}")
+
+
+def print_row(row):
+    height = row["height"] if row["height"] is not None else "-"
+    peak = f"{row['peak_memory_bytes'] / 2 ** 20:.1f}" if row["peak_memory_bytes"] is not None else "-"
+    print(f"{row['structure']:<9} {row['workload']:<8} {row['operation']:<12} {row['n']:>9} "
+          f"{row['ops_per_second'] or 0:>12,.0f} {height:>7} {peak:>9}", flush=True)
+
+
+def environment(seed):
+    """Datos de la máquina y del código medido, para comparar corridas"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+    }
+
+
+def compare(results, previous, threshold):
+    """Imprime la relación con una corrida anterior; retorna las regresiones"""
+    key = lambda row: (row["structure"], row["workload"], row["operation"], row["n"])
+    before = {key(row): row for row in previous["results"]}
+    regressions = []
+    print(f"\n{'structure':<9} {'workload':<8} {'operation':<12} {'n':>9} {'before':>12} {'now':>12} {'ratio':>7}")
+    for row in results:
+        old = before.get(key(row))
+        if old is None or not old["ops_per_second"] or not row["ops_per_second"]:
+            continue
+        ratio = row["ops_per_second"] / old["ops_per_second"]
+        mark = "  <-- regression" if ratio < threshold else ""
+        print(f"{row['structure']:<9} {row['workload']:<8} {row['operation']:<12} {row['n']:>9} "
+              f"{old['ops_per_second']:>12,.0f} {row['ops_per_second']:>12,.0f} {ratio:>6.2f}x{mark}")
+        if ratio < threshold:
+            regressions.append(row)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the tree services")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--structures", nargs="+", choices=list(STRUCTURES), default=list(STRUCTURES))
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="runs of each workload; the fastest is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file for the results")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.9,
+                        help="ratio to the previous run below which a result is a regression")
+    args = parser.parse_args(argv)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+
+    print_header()
+    results = run_suite(args.sizes, args.structures, args.workloads, args.seed, not args.no_memory,
+                        args.repeat)
+    with open(args.output, "w") as file:
+        json.dump({"environment": environment(args.seed), "results": results}, file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if previous is not None and compare(results, previous, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
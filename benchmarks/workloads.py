@@ -0,0 +1,98 @@
+"""Cargas de trabajo reproducibles para los benchmarks
+
+Cada función arma de antemano la secuencia de claves (o de operaciones) a
+partir de una semilla, para que todos los árboles reciban exactamente la
+misma carga y el tiempo de generarla no se mida.
+"""
+import random
+from itertools import accumulate
+
+# Exponente de la distribución de Zipf de las búsquedas: la clave más
+# buscada recibe alrededor del 12% de las búsquedas con 10^6 claves
+ZIPF_EXPONENT = 1.1
+
+
+def random_keys(n, seed=0):
+    """0..n-1 en orden aleatorio"""
+    keys = list(range(n))
+    random.Random(seed).shuffle(keys)
+    return keys
+
+
+def sorted_keys(n, seed=0):
+    """0..n-1 en orden creciente"""
+    return list(range(n))
+
+
+def reverse_keys(n, seed=0):
+    """0..n-1 en orden decreciente"""
+    return list(range(n - 1, -1, -1))
+
+
+def zigzag_keys(n, seed=0):
+    """0, n-1, 1, n-2, ...: alterna entre los extremos hacia el centro
+
+    En un ABB sin balanceo cada clave nueva queda debajo de la anterior y el
+    árbol es un camino en zigzag de altura n.
+    """
+    keys = []
+    low, high = 0, n - 1
+    while low <= high:
+        keys.append(low)
+        if low != high:
+            keys.append(high)
+        low, high = low + 1, high - 1
+    return keys
+
+
+def zipf_searches(keys, count, seed=0):
+    """count búsquedas de claves existentes con popularidad de Zipf
+
+    La popularidad se asigna a las claves en orden aleatorio, así las más
+    buscadas quedan repartidas por todo el árbol y no solo en un extremo.
+    """
+    rng = random.Random(seed)
+    by_popularity = list(keys)
+    rng.shuffle(by_popularity)
+    weights = accumulate(1 / rank ** ZIPF_EXPONENT for rank in range(1, len(keys) + 1))
+    return rng.choices(by_popularity, cum_weights=list(weights), k=count)
+
+
+def churn_operations(keys, count, seed=0):
+    """count operaciones que alternan insertar una clave nueva y podar una existente
+
+    El árbol parte con keys y mantiene su tamaño. Las claves nuevas se eligen
+    al azar entre 0 y 2 * len(keys) (sin repetir las presentes), así caen por
+    todo el árbol en vez de agregarse siempre a la derecha. Retorna pares
+    (True, clave) para insertar y (False, clave) para podar.
+    """
+    rng = random.Random(seed)
+    live = list(keys)
+    present = set(live)
+    space = 2 * max(len(live), 1) + 1
+    operations = []
+    for i in range(count):
+        if i % 2 == 0 or not live:
+            key = rng.randrange(space)
+            while key in present:
+                key = rng.randrange(space)
+            operations.append((True, key))
+            live.append(key)
+            present.add(key)
+        else:
+            # Sacar una clave al azar cambiándola por la última (O(1))
+            index = rng.randrange(len(live))
+            live[index], live[-1] = live[-1], live[index]
+            key = live.pop()
+            present.discard(key)
+            operations.append((False, key))
+    return operations
+
+
+# Cargas de construcción: orden en que se insertan las claves
+BUILD_ORDERS = {
+    "random": random_keys,
+    "sorted": sorted_keys,
+    "reverse": reverse_keys,
+    "zigzag": zigzag_keys,
+}
@@ -1,16 +1,82 @@
+import logging
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.controllers.tree_controller import router as bst_router
-from app.controllers.avl_controller import router as avl_router
+from app.controllers.tree_controller import router as bst_router, named_router as named_bst_router
+from app.controllers.avl_controller import router as avl_router, named_router as named_avl_router
+from app.controllers.sharded_controller import router as sharded_avl_router
+from app.controllers.metrics_controller import router as metrics_router
+from app.services.avl_service import avl_tree
+from app.services.metrics import AVL_METHODS, BST_METHODS, instrument_tree
+from app.services.sharding import start_sharded_tree, stop_sharded_tree
+from app.services.tree_registry import tree_registry
+from app.services.tree_service import tree
+from app.services.wal import attach_wal
+
+# Con AVL_SHARDS=N el árbol AVL se reparte por rangos en hasta N procesos
+# (ver app/services/sharding.py) y /avl lo atiende el router particionado
+SHARDED = int(os.environ.get("AVL_SHARDS", "0")) > 0
+
+# Duración de los métodos de los árboles globales y sus medidas en /metrics
+# (ver app/services/metrics.py); con shards el AVL global no se usa
+if not SHARDED:
+    instrument_tree("avl", avl_tree, AVL_METHODS)
+instrument_tree("tree", tree, BST_METHODS)
+
+# Con TREE_STATS=1 los árboles globales cuentan nodos visitados, profundidades
+# y rotaciones desde el arranque (ver app/services/hot_path_stats.py)
+if os.environ.get("TREE_STATS") == "1":
+    if not SHARDED:
+        avl_tree.enable_stats()
+    tree.enable_stats()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Arranque y apagado del servidor
+    
+    Los procesos shard y el WAL se inician aquí y no al importar el módulo:
+    cada proceso shard vuelve a importar main.py al arrancar.
+    """
+    # Con WAL_DIR las escrituras se registran en disco y los árboles se
+    # recuperan al reiniciar (ver app/services/wal.py)
+    if os.environ.get("WAL_DIR"):
+        fsync_every = int(os.environ.get("WAL_FSYNC_EVERY", "64"))
+        snapshot_every = int(os.environ.get("WAL_SNAPSHOT_EVERY", "100000"))
+        if SHARDED:
+            logging.getLogger(__name__).warning(
+                "WAL_DIR only logs /tree in sharded mode: the AVL shards are not recovered on restart")
+        else:
+            attach_wal(avl_tree, os.environ["WAL_DIR"], "avl", fsync_every, snapshot_every)
+        attach_wal(tree, os.environ["WAL_DIR"], "tree", fsync_every, snapshot_every)
+    if SHARDED:
+        start_sharded_tree()
+    yield
+    if SHARDED:
+        stop_sharded_tree()
+    # Los árboles con nombre cargados se guardan en TREE_DIR para la próxima vez
+    tree_registry.save_all()
+
 
 app = FastAPI(
     title="API de Árboles Binarios",
     description="API para gestionar Árbol Binario de Búsqueda (BST) y Árbol AVL",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Incluir los routers de los árboles
 app.include_router(bst_router)
-app.include_router(avl_router)
+# Árboles con nombre (uno por cliente), ver app/services/tree_registry.py
+app.include_router(named_bst_router)
+if SHARDED:
+    app.include_router(sharded_avl_router)
+else:
+    app.include_router(avl_router)
+    app.include_router(named_avl_router)
+# Métricas en formato de Prometheus
+app.include_router(metrics_router)
 
 
 @app.get("/")
@@ -20,8 +86,10 @@ def home():
         "message": "Bienvenido a la API de Árboles Binarios",
         "trees": {
             "bst": "Binary Search Tree - /tree",
-            "avl": "AVL Tree - /avl"
+            "avl": "AVL Tree - /avl" + (" (sharded, see /avl/shards)" if SHARDED else ""),
+            "named": "Named trees - /tree/{tree_name}" + ("" if SHARDED else " and /avl/{tree_name}")
         },
+        "metrics": "/metrics",
         "documentation": "/docs"
     }
 
@@ -0,0 +1,85 @@
+"""Prueba del almacenamiento en arena del árbol AVL (AVL_STORAGE=arena)
+
+No necesita el servidor corriendo: la arena aplica las mismas rotaciones
+que el árbol de objetos, así que con las mismas operaciones los dos deben
+quedar con la misma forma y responder lo mismo.
+"""
+import random
+
+from app.services.avl_arena_service import INT64_MAX, INT64_MIN, ArenaAVLTree
+from app.services.avl_service import AVLTree, create_avl_tree
+
+
+def test_same_shape_as_the_object_tree():
+    rng = random.Random(7)
+    arena, objects = ArenaAVLTree(), AVLTree()
+    for _ in range(5000):
+        value = rng.randrange(2000)
+        if rng.random() < 0.6:
+            assert arena.insert(value) == objects.insert(value)
+        else:
+            assert arena.prune(value) == objects.prune(value)
+        assert arena.search(value) == objects.search(value)
+    
+    assert arena.preorder() == objects.preorder()
+    assert arena.postorder() == objects.postorder()
+    assert arena.get_structure() == objects.get_structure()
+    assert arena.height() == objects.height() and arena.size() == objects.size()
+    assert list(arena.iter_inorder(after=1000)) == list(objects.iter_inorder(after=1000))
+    assert arena.prune_range(100, 300) == objects.prune_range(100, 300)
+    assert arena.inorder() == objects.inorder()
+    print("   ✅ Inserciones y podas al azar: misma forma que el árbol de objetos")
+
+
+def test_pruned_slots_are_reused():
+    arena = ArenaAVLTree()
+    arena.insert_many(range(1000))
+    slots = len(arena._values)
+    
+    for value in range(0, 1000, 2):
+        arena.prune(value)
+    assert len(arena._free) == 500 and arena.size() == 500
+    for value in range(-500, 0):
+        arena.insert(value)
+    # Los nuevos nodos ocupan los slots libres: la arena no crece
+    assert len(arena._values) == slots and len(arena._free) == 0
+    assert arena.inorder() == list(range(-500, 0)) + list(range(1, 1000, 2))
+    
+    arena.clear()
+    assert arena.root is None and len(arena._values) == 1
+    print("   ✅ Los slots podados se reutilizan y clear vacía la arena")
+
+
+def test_only_64_bit_integers():
+    arena = create_avl_tree("arena")
+    assert arena.insert(INT64_MIN) and arena.insert(INT64_MAX)
+    for values in ([INT64_MAX + 1], [1, 2, INT64_MIN - 1]):
+        try:
+            arena.insert_many(values)
+            assert False, f"{values} should not fit in the arena"
+        except ValueError:
+            pass
+    # Un lote rechazado no deja valores a medio insertar
+    assert arena.inorder() == [INT64_MIN, INT64_MAX]
+    
+    try:
+        create_avl_tree("arena", persistent=True)
+        assert False, "The arena should not support persistent mode"
+    except ValueError:
+        pass
+    
+    # Cuatro columnas de 8 bytes y la altura en 1 byte por slot
+    arena.insert_many(range(10000))
+    assert arena.memory_usage() == 33 * len(arena._values)
+    assert arena.memory_usage() < arena.size() * AVLTree.BYTES_PER_VALUE / 5
+    print("   ✅ Solo enteros de 64 bits y 33 bytes por nodo en los arreglos")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DEL ALMACENAMIENTO EN ARENA")
+    print("=" * 60)
+    test_same_shape_as_the_object_tree()
+    test_pruned_slots_are_reused()
+    test_only_64_bit_integers()
+    print("\n✅ Todas las pruebas de la arena pasaron")
@@ -1,8 +1,15 @@
-"""Script de prueba para verificar que el árbol AVL funciona correctamente"""
-import requests
+"""Script de prueba para verificar que el árbol AVL funciona correctamente
+
+Usa la app en el mismo proceso (TestClient), sin servidor corriendo.
+"""
 import json
 
-BASE_URL = "http://localhost:8000"
+from fastapi.testclient import TestClient
+
+from main import app
+
+# Cliente en el mismo proceso (transporte ASGI): no hace falta levantar el servidor
+client = TestClient(app)
 
 def test_avl_tree():
     print("=" * 60)
@@ -11,21 +18,22 @@ def test_avl_tree():
     
     # Limpiar el árbol
     print("\n1. Limpiando el árbol...")
-    response = requests.delete(f"{BASE_URL}/avl/clear")
+    response = client.delete("/avl/clear")
     print(f"   Respuesta: {response.json()}")
     
     # Insertar valores
     print("\n2. Insertando valores...")
     values = [50, 30, 70, 20, 40, 60, 80, 10, 25, 35, 45]
     for value in values:
-        response = requests.post(f"{BASE_URL}/avl/insert", params={"value": value})
+        response = client.post("/avl/insert", params={"value": value})
         result = response.json()
         status = "✅" if result.get('success') else "❌"
         print(f"   {status} Insertado {value}")
+        assert result.get('success')
     
     # Obtener estructura
     print("\n3. Obteniendo estructura del árbol...")
-    response = requests.get(f"{BASE_URL}/avl/structure")
+    response = client.get("/avl/structure")
     structure = response.json()
     print(f"   Estructura: {json.dumps(structure, indent=2)}")
     
@@ -42,47 +50,50 @@ def test_avl_tree():
     
     tree_data = structure.get('data', {}).get('structure')
     is_balanced = check_balance(tree_data)
-    if is_balanced:
-        print("   ✅ El árbol está perfectamente balanceado!")
+    assert is_balanced
+    print("   ✅ El árbol está perfectamente balanceado!")
     
     # Hacer recorridos
     print("\n5. Recorridos del árbol...")
-    response = requests.get(f"{BASE_URL}/avl/traversal/inorder")
+    response = client.get("/avl/traversal/inorder")
     print(f"   Inorden: {response.json()['data']['traversal']}")
     
-    response = requests.get(f"{BASE_URL}/avl/traversal/preorder")
+    response = client.get("/avl/traversal/preorder")
     print(f"   Preorden: {response.json()['data']['traversal']}")
     
-    response = requests.get(f"{BASE_URL}/avl/traversal/postorder")
+    response = client.get("/avl/traversal/postorder")
     print(f"   Postorden: {response.json()['data']['traversal']}")
     
     # Buscar valores
     print("\n6. Buscando valores...")
     test_values = [40, 100, 25, 500]
     for value in test_values:
-        response = requests.post(f"{BASE_URL}/avl/search", params={"value": value})
+        response = client.post("/avl/search", params={"value": value})
         result = response.json()
         status = "✅ encontrado" if result['data']['found'] else "❌ no encontrado"
         print(f"   Valor {value}: {status}")
+        assert result['data']['found'] == (value in values)
     
     # Eliminar un valor
     print("\n7. Eliminando valor 30...")
-    response = requests.delete(f"{BASE_URL}/avl/prune", params={"value": 30})
+    response = client.delete("/avl/prune", params={"value": 30})
     result = response.json()
     status = "✅" if result.get('success') else "❌"
     print(f"   {status} {result['message']}")
+    assert result.get('success')
     
     # Verificar estructura después de eliminar
     print("\n8. Verificando estructura después de eliminar...")
-    response = requests.get(f"{BASE_URL}/avl/structure")
+    response = client.get("/avl/structure")
     structure = response.json()
     tree_data = structure.get('data', {}).get('structure')
     is_balanced = check_balance(tree_data)
-    if is_balanced:
-        print("   ✅ El árbol sigue balanceado después de eliminar!")
+    assert is_balanced
+    print("   ✅ El árbol sigue balanceado después de eliminar!")
     
-    response = requests.get(f"{BASE_URL}/avl/traversal/inorder")
+    response = client.get("/avl/traversal/inorder")
     print(f"   Inorden después de eliminar: {response.json()['data']['traversal']}")
+    assert response.json()['data']['traversal'] == sorted(set(values) - {30})
     
     print("\n" + "=" * 60)
     print("✅ TODAS LAS PRUEBAS COMPLETADAS EXITOSAMENTE")
@@ -91,8 +102,5 @@ def test_avl_tree():
 if __name__ == "__main__":
     try:
         test_avl_tree()
-    except requests.exceptions.ConnectionError:
-        print("❌ Error: No se pudo conectar al servidor.")
-        print("   Asegúrate de que el servidor esté corriendo en http://localhost:8000")
     except Exception as e:
         print(f"❌ Error durante las pruebas: {e}")
@@ -0,0 +1,103 @@
+"""Prueba de la carga masiva en paralelo (bulk_build)
+
+No necesita el servidor corriendo: carga los mismos valores con uno y con
+varios procesos y compara el resultado con una carga normal.
+"""
+import os
+import random
+import tempfile
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.controllers.avl_controller import router
+from app.controllers.named_trees import get_avl_tree
+from app.services import bulk_build as bulk_build_module
+from app.services.avl_arena_service import ArenaAVLTree
+from app.services.avl_service import AVLTree
+from app.services.bulk_build import bulk_build
+from app.services.wal import attach_wal
+
+
+def test_parallel_build_matches_sequential():
+    # Sin mínimo, para que un lote chico también use los procesos
+    minimum = bulk_build_module.PARALLEL_MIN_VALUES
+    bulk_build_module.PARALLEL_MIN_VALUES = 0
+    try:
+        rng = random.Random(17)
+        values = [rng.randint(-10 ** 12, 10 ** 12) for _ in range(20_000)] + [7, 7, -3, 7]
+        expected = sorted(set(values))
+        for tree_class in (AVLTree, ArenaAVLTree):
+            sequential = tree_class()
+            sequential.load_sorted(expected, dict.fromkeys(values))
+            parallel = tree_class()
+            assert bulk_build(parallel, values, workers=3) == len(expected)
+            assert parallel.inorder() == expected
+            assert list(parallel.saved_data) == list(dict.fromkeys(values))
+            # Misma forma que la construcción en un solo proceso
+            assert parallel.preorder() == sequential.preorder()
+            parallel.insert(10 ** 13)
+            parallel.prune(expected[0])
+            assert parallel.select(parallel.size() - 1) == 10 ** 13
+            print(f"   ✅ {tree_class.__name__}: {len(expected)} valores cargados con 3 procesos")
+    finally:
+        bulk_build_module.PARALLEL_MIN_VALUES = minimum
+
+
+def test_rejects_values_outside_int64():
+    try:
+        bulk_build(AVLTree(), [1, 2 ** 70], workers=1)
+        assert False, "Values outside int64 should be rejected"
+    except ValueError:
+        print("   ✅ Valores fuera de 64 bits rechazados")
+
+
+def test_batch_endpoint_bulk_loads_an_empty_tree():
+    minimum = bulk_build_module.PARALLEL_MIN_VALUES
+    bulk_build_module.PARALLEL_MIN_VALUES = 1000
+    try:
+        for tree_class in (AVLTree, ArenaAVLTree):
+            avl_tree = tree_class()
+            app = FastAPI()
+            app.include_router(router)
+            app.dependency_overrides[get_avl_tree] = lambda: avl_tree
+            client = TestClient(app)
+            
+            with tempfile.TemporaryDirectory() as directory:
+                wal = attach_wal(avl_tree, directory, "avl")
+                # Árbol vacío y lote grande: la carga masiva deja un snapshot
+                # en lugar de escribir el lote en el log
+                values = list(range(5000, 0, -1)) + [10, 20]
+                data = client.post("/avl/insert/batch", json=values).json()["data"]
+                assert data == {"inserted": 5000, "duplicates": 2, "size": 5000}
+                assert os.path.getsize(wal.path) == 0
+                assert avl_tree.inorder() == list(range(1, 5001))
+                assert list(avl_tree.saved_data)[:2] == [5000, 4999]
+                
+                # Con el árbol cargado el lote se inserta normalmente
+                data = client.post("/avl/insert/batch", json=[0, 1, 6000]).json()["data"]
+                assert data == {"inserted": 2, "duplicates": 1, "size": 5002}
+                assert os.path.getsize(wal.path) > 0
+                assert avl_tree.height() == 13
+                wal.close()
+        
+        # Fuera de 64 bits no hay carga masiva: AVLNode inserta el lote
+        # normalmente y la arena lo rechaza sin cargar nada
+        huge = [2 ** 70 + value for value in range(1000)]
+        for tree_class, success in ((AVLTree, True), (ArenaAVLTree, False)):
+            avl_tree = tree_class()
+            assert client.post("/avl/insert/batch", json=huge).json()["success"] is success
+            assert avl_tree.size() == (1000 if success else 0)
+        print("   ✅ /avl/insert/batch usa la carga masiva con un árbol vacío")
+    finally:
+        bulk_build_module.PARALLEL_MIN_VALUES = minimum
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DE LA CARGA MASIVA EN PARALELO")
+    print("=" * 60)
+    test_parallel_build_matches_sequential()
+    test_rejects_values_outside_int64()
+    test_batch_endpoint_bulk_loads_an_empty_tree()
+    print("\n✅ Todas las pruebas de la carga masiva pasaron")
@@ -0,0 +1,117 @@
+"""Prueba de estrés concurrente: miles de operaciones intercaladas desde varios hilos
+
+A diferencia de los otros scripts de prueba, no necesita el servidor corriendo:
+usa el TestClient de FastAPI, que ejecuta los endpoints síncronos en el mismo
+pool de hilos que usa uvicorn. Al final verifica los invariantes del AVL.
+"""
+import random
+import threading
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.services.avl_service import avl_tree
+from app.services.tree_service import tree
+
+THREADS = 8
+OPERATIONS_PER_THREAD = 500
+VALUE_RANGE = 2000
+
+
+def check_avl_node(node):
+    """Verifica orden, balance, altura y tamaño de un subárbol; retorna (altura, tamaño, valores)"""
+    if node is None:
+        return 0, 0, []
+    left_height, left_size, left_values = check_avl_node(node.children[0])
+    right_height, right_size, right_values = check_avl_node(node.children[1])
+    
+    assert abs(left_height - right_height) <= 1, f"Node {node.value} is unbalanced"
+    assert node.height == 1 + max(left_height, right_height), f"Wrong height at {node.value}"
+    assert node.size == 1 + left_size + right_size, f"Wrong size at {node.value}"
+    assert all(value < node.value for value in left_values), f"Wrong order left of {node.value}"
+    assert all(value > node.value for value in right_values), f"Wrong order right of {node.value}"
+    
+    return node.height, node.size, left_values + [node.value] + right_values
+
+
+def avl_worker(client, seed, errors):
+    """Mezcla inserciones, podas, búsquedas y recorridos sobre el árbol AVL"""
+    rng = random.Random(seed)
+    try:
+        for _ in range(OPERATIONS_PER_THREAD):
+            value = rng.randrange(VALUE_RANGE)
+            operation = rng.random()
+            if operation < 0.4:
+                client.post("/avl/insert", params={"value": value, "response": "none"})
+            elif operation < 0.6:
+                client.delete("/avl/prune", params={"value": value, "response": "none"})
+            elif operation < 0.8:
+                client.post("/avl/search", params={"value": value})
+            else:
+                # Un recorrido nunca debe ver un subárbol a medio rotar
+                traversal = client.get("/avl/traversal/inorder").json()["data"]["traversal"]
+                assert traversal == sorted(set(traversal)), "Inorder traversal is not sorted"
+    except Exception as error:
+        errors.append(error)
+
+
+def bst_worker(client, seed, errors):
+    """Mezcla inserciones, podas y recorridos sobre el árbol BST de Kids"""
+    rng = random.Random(seed)
+    try:
+        for _ in range(OPERATIONS_PER_THREAD):
+            kid_id = rng.randrange(VALUE_RANGE)
+            operation = rng.random()
+            if operation < 0.4:
+                client.post("/tree/insert", params={"kid_id": kid_id, "age": kid_id % 18, "response": "none"})
+            elif operation < 0.6:
+                client.delete("/tree/prune", params={"kid_id": kid_id, "response": "none"})
+            else:
+                ids = client.get("/tree/traversal/inorder").json()["data"]["traversal"]
+                assert ids == sorted(set(ids)), "Inorder traversal is not sorted"
+    except Exception as error:
+        errors.append(error)
+
+
+def run_workers(worker, client):
+    """Lanza THREADS hilos con el mismo worker y retorna los errores encontrados"""
+    errors = []
+    threads = [threading.Thread(target=worker, args=(client, seed, errors)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_concurrent_avl():
+    with TestClient(app) as client:
+        client.delete("/avl/clear")
+        errors = run_workers(avl_worker, client)
+        assert not errors, errors
+        
+        _, size, values = check_avl_node(avl_tree.root)
+        assert size == len(avl_tree.saved_data)
+        assert values == sorted(avl_tree.saved_data)
+        print(f"   ✅ AVL: {THREADS * OPERATIONS_PER_THREAD} operaciones, {size} valores, invariantes correctos")
+
+
+def test_concurrent_bst():
+    with TestClient(app) as client:
+        client.delete("/tree/clear")
+        errors = run_workers(bst_worker, client)
+        assert not errors, errors
+        
+        ids = tree.inorder()
+        assert ids == sorted(tree.saved_data)
+        assert len(tree.kids) == len(tree.saved_data)
+        print(f"   ✅ BST: {THREADS * OPERATIONS_PER_THREAD} operaciones, {len(ids)} Kids, orden correcto")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBA DE ESTRÉS CONCURRENTE")
+    print("=" * 60)
+    test_concurrent_avl()
+    test_concurrent_bst()
+    print("\n✅ Todas las pruebas concurrentes pasaron")
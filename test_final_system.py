@@ -1,11 +1,17 @@
 """Script de prueba para verificar que:
 - ABB (Binary Search Tree) usa la clase Kid con solo id
 - AVL usa valores simples (int)
+
+Usa la app en el mismo proceso (TestClient), sin servidor corriendo.
 """
-import requests
 import json
 
-BASE_URL = "http://localhost:8000"
+from fastapi.testclient import TestClient
+
+from main import app
+
+# Cliente en el mismo proceso (transporte ASGI): no hace falta levantar el servidor
+client = TestClient(app)
 
 def test_both_trees():
     print("=" * 70)
@@ -21,7 +27,7 @@ def test_both_trees():
     
     # Limpiar el árbol BST
     print("\n1. Limpiando el árbol ABB...")
-    response = requests.delete(f"{BASE_URL}/tree/clear")
+    response = client.delete("/tree/clear")
     print(f"   ✅ {response.json()['message']}")
     
     # Insertar Kids con solo ID
@@ -31,14 +37,15 @@ def test_both_trees():
     kids = [50, 30, 70, 20, 40, 60, 80]
     
     for kid_id in kids:
-        response = requests.post(f"{BASE_URL}/tree/insert", params={"kid_id": kid_id})
+        response = client.post("/tree/insert", params={"kid_id": kid_id})
         result = response.json()
         status = "✅" if result.get('success') else "❌"
         print(f"   {status} Kid(id={kid_id})")
+        assert result.get('success')
     
     # Obtener estructura del ABB
     print("\n3. Estructura del árbol ABB (con Kids):")
-    response = requests.get(f"{BASE_URL}/tree/structure")
+    response = client.get("/tree/structure")
     structure = response.json()
     if structure.get('success'):
         def print_tree(node, indent=6, side="ROOT"):
@@ -55,19 +62,21 @@ def test_both_trees():
     
     # Recorridos ABB
     print("\n4. Recorridos del árbol ABB:")
-    response = requests.get(f"{BASE_URL}/tree/traversal/inorder")
+    response = client.get("/tree/traversal/inorder")
     inorder = response.json()['data']['traversal']
     print(f"   Inorden: {inorder}")
+    assert inorder == sorted(kids)
     print(f"   ✅ Kids ordenados automáticamente por ID")
     
     # Buscar Kids
     print("\n5. Buscando Kids por ID en el ABB:")
     test_ids = [50, 100]
     for kid_id in test_ids:
-        response = requests.post(f"{BASE_URL}/tree/search", params={"kid_id": kid_id})
+        response = client.post("/tree/search", params={"kid_id": kid_id})
         result = response.json()
         status = "✅" if result['data']['found'] else "❌"
         print(f"   Kid(id={kid_id}): {status}")
+        assert result['data']['found'] == (kid_id in kids)
     
     # =========================================================================
     # PARTE 2: ÁRBOL AVL CON VALORES SIMPLES
@@ -78,7 +87,7 @@ def test_both_trees():
     
     # Limpiar el árbol AVL
     print("\n6. Limpiando el árbol AVL...")
-    response = requests.delete(f"{BASE_URL}/avl/clear")
+    response = client.delete("/avl/clear")
     print(f"   ✅ {response.json()['message']}")
     
     # Insertar valores simples en AVL
@@ -88,14 +97,15 @@ def test_both_trees():
     values = [10, 20, 30, 40, 50, 60, 70]
     
     for value in values:
-        response = requests.post(f"{BASE_URL}/avl/insert", params={"value": value})
+        response = client.post("/avl/insert", params={"value": value})
         result = response.json()
         status = "✅" if result.get('success') else "❌"
         print(f"   {status} Value={value}")
+        assert result.get('success')
     
     # Obtener estructura del AVL
     print("\n8. Estructura del árbol AVL (con valores y balance):")
-    response = requests.get(f"{BASE_URL}/avl/structure")
+    response = client.get("/avl/structure")
     structure = response.json()
     if structure.get('success'):
         def print_avl_tree(node, indent=6, side="ROOT"):
@@ -124,24 +134,26 @@ def test_both_trees():
             return False
         return check_balance(node['children'][0]) and check_balance(node['children'][1])
     
-    if check_balance(structure['data']['structure']):
-        print("   ✅ Todo el árbol AVL está perfectamente balanceado!")
+    assert check_balance(structure['data']['structure'])
+    print("   ✅ Todo el árbol AVL está perfectamente balanceado!")
     
     # Recorridos AVL
     print("\n10. Recorridos del árbol AVL:")
-    response = requests.get(f"{BASE_URL}/avl/traversal/inorder")
+    response = client.get("/avl/traversal/inorder")
     inorder = response.json()['data']['traversal']
     print(f"    Inorden: {inorder}")
+    assert inorder == values
     print(f"    ✅ Valores ordenados correctamente")
     
     # Buscar valores
     print("\n11. Buscando valores en el AVL:")
     test_values = [30, 100]
     for value in test_values:
-        response = requests.post(f"{BASE_URL}/avl/search", params={"value": value})
+        response = client.post("/avl/search", params={"value": value})
         result = response.json()
         status = "✅" if result['data']['found'] else "❌"
         print(f"    Value={value}: {status}")
+        assert result['data']['found'] == (value in values)
     
     # =========================================================================
     # RESUMEN FINAL
@@ -166,9 +178,6 @@ def test_both_trees():
 if __name__ == "__main__":
     try:
         test_both_trees()
-    except requests.exceptions.ConnectionError:
-        print("❌ Error: No se pudo conectar al servidor.")
-        print("   Asegúrate de que el servidor esté corriendo en http://localhost:8000")
     except Exception as e:
         print(f"❌ Error durante las pruebas: {e}")
         import traceback
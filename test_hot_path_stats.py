@@ -0,0 +1,131 @@
+"""Prueba de los contadores del camino caliente (GET/POST /avl/stats y /tree/stats)
+
+No necesita el servidor corriendo: usa el TestClient de FastAPI. Con IDs
+secuenciales el ABB queda como una lista y la distribución de profundidades
+de las búsquedas lo muestra, mientras que el AVL se mantiene en O(log n).
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from main import app
+from app.controllers import avl_controller, tree_controller
+from app.controllers.named_trees import get_avl_tree, get_tree
+from app.controllers.write_responses import apply_write_batch
+from app.services.avl_arena_service import ArenaAVLTree
+from app.services.avl_service import AVLTree
+from app.services.scapegoat_service import ScapegoatTree
+from app.services.tree_service import BinarySearchTree
+
+client = TestClient(app)
+
+
+def test_avl_counts_comparisons_and_rotations():
+    for avl in (AVLTree(), ArenaAVLTree()):
+        avl.enable_stats()
+        # 3, 1, 2: un rebalanceo doble (Left-Right); 4, 5: uno simple;
+        # podar 1 deja la raíz 2 cargada a la derecha: otro simple
+        for value in (3, 1, 2, 4, 5):
+            avl.insert(value)
+        assert avl.search(2) and not avl.search(10)
+        avl.prune(1)
+        
+        stats = avl.get_stats()
+        assert stats["rebalances"]["double_rotations"] == 1
+        assert stats["rebalances"]["single_rotations"] == 2
+        assert stats["rebalances"]["rotations"] == 4 == avl.rotations
+        # 2 es la raíz: un nodo y una comparación; 10 baja por 2, 4 y 5
+        search = stats["operations"]["search"]
+        assert search["depth_distribution"] == {1: 1, 3: 1}
+        assert search["comparisons"] == 1 + 6
+        assert stats["operations"]["insert"]["count"] == 4  # la raíz no baja por el árbol
+        assert stats["operations"]["prune"]["depth_distribution"] == {2: 1}
+        
+        avl.disable_stats()
+        assert avl.get_stats() is None and avl.search(2)
+    print("   ✅ AVL y arena: comparaciones, profundidades y rotaciones simples y dobles")
+
+
+def test_bst_counts_writes_while_descending():
+    for tree in (BinarySearchTree(), ScapegoatTree()):
+        tree.enable_stats()
+        # 30 y 70 comparan con la raíz, 20 con la raíz y con 30
+        for kid_id in (50, 30, 70, 20):
+            tree.insert(kid_id)
+        tree.prune(20)
+        tree.prune(99)  # Baja por 50 y 70 sin encontrarlo
+        
+        operations = tree.get_stats()["operations"]
+        assert operations["insert"]["depth_distribution"] == {1: 2, 2: 1}
+        assert operations["prune"]["depth_distribution"] == {2: 1, 3: 1}
+    print("   ✅ ABB y scapegoat: inserciones y podas contadas al bajar")
+
+
+def test_prune_endpoints_descend_once():
+    cases = [(avl_controller.router, get_avl_tree, "/avl/prune", "value", tree)
+             for tree in (AVLTree(), ArenaAVLTree())]
+    cases += [(tree_controller.router, get_tree, "/tree/prune", "kid_id", tree)
+              for tree in (BinarySearchTree(), ScapegoatTree())]
+    for router, dependency, path, key, tree in cases:
+        own_app = FastAPI()
+        own_app.include_router(router)
+        own_app.dependency_overrides[dependency] = lambda: tree
+        own_client = TestClient(own_app)
+        for value in (50, 30, 70, 20):
+            tree.insert(value)
+        tree.enable_stats()
+        
+        # La poda dice si el valor estaba: no se busca antes de podar
+        for value, mode in ((20, "full"), (99, "delta")):
+            body = own_client.delete(path, params={key: value, "response": mode}).json()
+            assert body["success"] is (value == 20)
+        results = apply_write_batch(tree, [("prune", (30,), "none"), ("prune", (30,), "none")])
+        assert [exists for exists, _ in results] == [True, False]
+        
+        operations = tree.get_stats()["operations"]
+        assert "search" not in operations and operations["prune"]["count"] == 4
+    print("   ✅ /prune y los lotes de escrituras bajan una sola vez por el árbol")
+
+
+def test_sequential_ids_degenerate_the_bst():
+    client.delete("/avl/clear")
+    client.delete("/tree/clear")
+    assert client.get("/tree/stats").json()["success"] is False
+    client.post("/avl/stats", params={"enabled": True})
+    client.post("/tree/stats", params={"enabled": True})
+    
+    n = 64
+    for kid_id in range(1, n + 1):
+        client.post("/tree/insert", params={"kid_id": kid_id, "response": "none"})
+        client.post("/avl/insert", params={"value": kid_id, "response": "none"})
+    for kid_id in range(1, n + 1):
+        client.post("/tree/search", params={"kid_id": kid_id})
+        client.post("/avl/search", params={"value": kid_id})
+    
+    bst = client.get("/tree/stats").json()["data"]
+    assert bst["height"] == n and bst["min_height"] == 7
+    search = bst["operations"]["search"]
+    # Cada ID queda un nivel más abajo que el anterior
+    assert search["depth_distribution"] == {str(depth): 1 for depth in range(1, n + 1)}
+    assert search["max_nodes_visited"] == n
+    assert bst["rebalances"]["rotations"] == 0
+    
+    avl = client.get("/avl/stats").json()["data"]
+    assert avl["height"] == 7
+    assert avl["operations"]["search"]["max_nodes_visited"] <= 7
+    assert avl["rebalances"]["single_rotations"] > 0
+    
+    client.post("/avl/stats", params={"enabled": False})
+    client.post("/tree/stats", params={"enabled": False})
+    assert client.get("/avl/stats").json()["success"] is False
+    print("   ✅ IDs secuenciales: ABB de altura n, AVL de altura O(log n)")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DE LOS CONTADORES DEL CAMINO CALIENTE")
+    print("=" * 60)
+    test_avl_counts_comparisons_and_rotations()
+    test_bst_counts_writes_while_descending()
+    test_prune_endpoints_descend_once()
+    test_sequential_ids_degenerate_the_bst()
+    print("\n✅ Todas las pruebas de los contadores pasaron")
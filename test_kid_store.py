@@ -0,0 +1,116 @@
+"""Prueba del almacén columnar de Kids (KidStore)
+
+No necesita el servidor corriendo: guarda y libera Kids directamente en el
+almacén y a través del ABB, y compara con lo que daría un objeto Kid.
+"""
+import os
+import random
+import tempfile
+
+from app.models.kid_model import Kid
+from app.models.kid_store import KidStore
+from app.services.snapshot import load_snapshot, save_snapshot
+from app.services.tree_service import BinarySearchTree
+
+
+def test_slots_are_reused_after_release():
+    store = KidStore()
+    slots = [store.add(kid_id, f"Kid {kid_id}", kid_id % 10) for kid_id in range(5)]
+    assert slots == [0, 1, 2, 3, 4] and len(store) == 5
+    
+    store.release(1)
+    store.release(3)
+    assert len(store) == 3
+    # El último slot liberado es el primero en reutilizarse
+    assert store.add(10, "Ana", 6) == 3 and store.add(11, "Ana", 7) == 1
+    assert store.add(12) == 5 and len(store.ids) == 6
+    assert store.to_dict(3) == {"id": 10, "name": "Ana", "age": 6}
+    assert store.to_dict(1) == {"id": 11, "name": "Ana", "age": 7}
+    print("   ✅ Los slots liberados se reutilizan")
+
+
+def test_names_and_dicts_match_kid():
+    store = KidStore()
+    rng = random.Random(8)
+    kids = {}
+    for kid_id in range(200):
+        kid = Kid(kid_id, rng.choice(["", "Ana", "Luis", "José", "Zoë 🐢"]), rng.randrange(18))
+        kids[store.add(kid.id, kid.name, kid.age)] = kid
+    
+    # Cada nombre distinto se guarda una sola vez
+    assert sorted(store.names) == sorted({kid.name for kid in kids.values()})
+    for slot, kid in kids.items():
+        assert store.name(slot) == kid.name
+        assert store.to_dict(slot) == kid.to_dict()
+        restored = store.get(slot)
+        assert restored == kid and str(restored) == str(kid)
+    print("   ✅ Nombres codificados una vez y to_dict igual a Kid.to_dict")
+
+
+def test_unused_names_are_forgotten():
+    store = KidStore()
+    first = store.add(1, "Ana")
+    second = store.add(2, "Ana")
+    store.release(first)
+    assert store.name(second) == "Ana" and len(store.names) == 1
+    
+    # Nombres únicos que entran y salen no hacen crecer la lista de nombres
+    for kid_id in range(1000):
+        store.release(store.add(kid_id + 10, f"unique {kid_id}"))
+    assert len(store.names) == 2 and len(store._codes_by_name) == 1
+    assert store.name(second) == "Ana"
+    
+    slot = store.add(5000, "Beto")
+    assert store.names.index("Beto") == 1 and store.name(slot) == "Beto"
+    print("   ✅ Los nombres sin Kids se liberan y sus códigos se reutilizan")
+
+
+def test_tree_churn_and_snapshot():
+    tree = BinarySearchTree()
+    # 20 rondas de 50 Kids con nombres que no se repiten entre rondas
+    rng = random.Random(8)
+    for round_number in range(20):
+        kid_ids = rng.sample(range(1000), 50)
+        for kid_id in kid_ids:
+            tree.insert(kid_id, f"round {round_number} kid {kid_id}", kid_id % 12)
+        for kid_id in kid_ids:
+            tree.prune(kid_id)
+    assert len(tree.kids) == 0 and len(tree.kids.names) == 50
+    
+    tree.insert(7, "Ana", 3)
+    tree.insert(3, "Ana", 4)
+    tree.insert(9, "Luis", 5)
+    tree.prune(7)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tree.snapshot")
+        save_snapshot(tree, path)
+        restored = BinarySearchTree()
+        load_snapshot(restored, path)
+    assert restored.get_structure() == tree.get_structure()
+    print("   ✅ El ABB no acumula nombres y el snapshot conserva los Kids")
+
+
+def test_out_of_range_values():
+    store = KidStore()
+    for kid_id, age in ((2 ** 63, 0), (-2 ** 63 - 1, 0), (1, 2 ** 31), (1, -2 ** 31 - 1)):
+        try:
+            store.add(kid_id, "Ana", age)
+            assert False, f"id={kid_id} age={age} should be rejected"
+        except ValueError:
+            pass
+    # Un Kid rechazado no deja nada guardado
+    assert len(store) == 0 and store.names == []
+    assert store.add(2 ** 63 - 1, "Ana", 2 ** 31 - 1) == 0
+    print("   ✅ IDs fuera de 64 bits y edades fuera de 32 bits rechazados")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DEL ALMACÉN COLUMNAR DE KIDS")
+    print("=" * 60)
+    test_slots_are_reused_after_release()
+    test_names_and_dicts_match_kid()
+    test_unused_names_are_forgotten()
+    test_tree_churn_and_snapshot()
+    test_out_of_range_values()
+    print("\n✅ Todas las pruebas del almacén de Kids pasaron")
@@ -0,0 +1,112 @@
+"""Prueba del endpoint /metrics (formato de texto de Prometheus)
+
+No necesita el servidor corriendo: usa el TestClient de FastAPI y revisa los
+histogramas de latencia por ruta y por método y las medidas de los árboles.
+"""
+import random
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.services.metrics import Histogram
+from app.services.scapegoat_service import ScapegoatTree
+from app.services.tree_service import BinarySearchTree
+
+client = TestClient(app)
+
+
+def metric_values(text):
+    """Línea de métrica -> valor, sin los comentarios # HELP / # TYPE"""
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            values[name] = float(value)
+    return values
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("demo_seconds", "Demo", ("route",), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(("/a",), seconds)
+    values = metric_values("\n".join(histogram.render()))
+    assert values['demo_seconds_bucket{route="/a",le="0.1"}'] == 1
+    assert values['demo_seconds_bucket{route="/a",le="1.0"}'] == 3
+    assert values['demo_seconds_bucket{route="/a",le="+Inf"}'] == 4
+    assert values['demo_seconds_count{route="/a"}'] == 4
+    assert values['demo_seconds_sum{route="/a"}'] == 4.05
+    print("   ✅ Buckets acumulados, suma y cuenta del histograma")
+
+
+def test_metrics_endpoint():
+    client.delete("/avl/clear")
+    client.delete("/tree/clear")
+    before = metric_values(client.get("/metrics").text)
+    
+    # 1, 2, 3 en orden: una rotación a la izquierda
+    for value in (1, 2, 3):
+        client.post("/avl/insert", params={"value": value, "response": "summary"})
+    for kid_id in (10, 5, 1):
+        client.post("/tree/insert", params={"kid_id": kid_id})
+    client.post("/avl/bad name!/search", params={"value": 1})
+    
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    values = metric_values(response.text)
+    
+    route = 'http_request_duration_seconds_count{method="POST",route="/avl/insert",status="200"}'
+    assert values[route] - before.get(route, 0) == 3
+    named = 'http_request_duration_seconds_count{method="POST",route="/avl/{tree_name}/search",status="400"}'
+    assert values[named] >= 1
+    method = 'tree_method_duration_seconds_count{tree="tree",method="get_structure"}'
+    assert values[method] - before.get(method, 0) == 3
+    
+    assert values['tree_nodes{tree="avl"}'] == 3 and values['tree_height{tree="avl"}'] == 2
+    assert values['tree_nodes{tree="tree"}'] == 3 and values['tree_height{tree="tree"}'] == 3
+    assert values['tree_saved_data_size{tree="tree"}'] == 3
+    rotations = 'tree_rotations_total{tree="avl"}'
+    assert values[rotations] - before[rotations] == 1
+    print("   ✅ /metrics: latencias por ruta y por método, nodos, altura y rotaciones")
+
+
+def walked_height(tree):
+    """Altura recorriendo todo el árbol, sin la altura guardada"""
+    tree._height = None
+    return tree.height()
+
+
+def test_bst_height_is_kept_between_scrapes():
+    rng = random.Random(23)
+    for tree in (BinarySearchTree(), ScapegoatTree()):
+        for step in range(2000):
+            kid_id = rng.randrange(500)
+            if rng.random() < 0.7:
+                tree.insert(kid_id)
+            else:
+                tree.prune(kid_id)
+            if step % 40 == 0:
+                height = tree.height()
+                assert height == walked_height(tree), f"Stale height at step {step}"
+        
+        # Las inserciones del ABB actualizan la altura sin recorrer el árbol
+        if type(tree) is BinarySearchTree:
+            tree.height()
+            for kid_id in rng.sample(range(500, 1000), 100):
+                tree.insert(kid_id)
+                assert tree._height is not None
+            assert tree.height() == walked_height(tree)
+        tree.clear()
+        assert tree.height() == 0
+        tree.build_from_preorder([(2, "", 0), (1, "", 0), (3, "", 0)])
+        assert tree.height() == 2
+    print("   ✅ La altura del ABB se guarda y solo se recorre el árbol después de podar")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DE /metrics")
+    print("=" * 60)
+    test_histogram_buckets_are_cumulative()
+    test_metrics_endpoint()
+    test_bst_height_is_kept_between_scrapes()
+    print("\n✅ Todas las pruebas de /metrics pasaron")
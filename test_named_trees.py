@@ -0,0 +1,90 @@
+"""Prueba del registro de árboles con nombre y su desalojo LRU
+
+No necesita el servidor corriendo: usa registros propios con un presupuesto
+de memoria pequeño, o el registro global apuntando a un directorio temporal.
+"""
+import os
+import tempfile
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.services.avl_service import AVLTree
+from app.services.tree_registry import TreeRegistry, tree_registry
+from app.services.tree_service import BinarySearchTree
+
+
+def make_registry(directory, values_allowed):
+    """Registro que admite unos values_allowed valores de AVL en memoria"""
+    return TreeRegistry(directory, values_allowed * AVLTree.BYTES_PER_VALUE,
+                        {"avl": AVLTree, "tree": BinarySearchTree})
+
+
+def test_lru_eviction_and_reload():
+    with tempfile.TemporaryDirectory() as directory:
+        registry = make_registry(directory, 150)
+        for name in ("a", "b", "c"):
+            with registry.use("avl", name) as tree:
+                tree.insert_many(range(100))
+        
+        # Solo entra un árbol de 100 valores: a y b se desalojaron, en ese orden
+        assert registry.loaded()["avl"] == ["c"]
+        assert registry.evictions == 2
+        
+        with registry.use("avl", "a") as tree:
+            assert tree.inorder() == list(range(100)), "Evicted tree should be reloaded"
+        assert registry.loaded()["avl"] == ["a"]
+        print("   ✅ Árboles desalojados en orden LRU y recargados desde disco")
+
+
+def test_tree_in_use_is_not_evicted():
+    with tempfile.TemporaryDirectory() as directory:
+        registry = make_registry(directory, 150)
+        first = registry.acquire("avl", "busy")
+        first.insert_many(range(100))
+        with registry.use("avl", "other") as tree:
+            tree.insert_many(range(100))
+        # "busy" sigue en uso: se desaloja "other" aunque sea más reciente
+        assert registry.loaded()["avl"] == ["busy"]
+        registry.release("avl", "busy")
+        print("   ✅ Un árbol en uso no se desaloja")
+
+
+def test_invalid_names_are_rejected():
+    with tempfile.TemporaryDirectory() as directory:
+        registry = make_registry(directory, 150)
+        for name in ("", "../etc", "a/b", "x" * 65):
+            try:
+                registry.acquire("tree", name)
+                assert False, f"Name {name!r} should be rejected"
+            except ValueError:
+                pass
+        print("   ✅ Nombres inválidos rechazados")
+
+
+def test_named_trees_are_saved_on_shutdown():
+    # El registro global apunta a un directorio temporal: la prueba no
+    # escribe snapshots en el directorio del repositorio
+    original = tree_registry.directory
+    with tempfile.TemporaryDirectory() as directory:
+        tree_registry.directory = directory
+        try:
+            with TestClient(app) as client:
+                assert client.post("/avl/t1/insert", params={"value": 5, "response": "none"}).json()["success"]
+            # Al apagar (salir del with) se guardó el snapshot del árbol cargado
+            assert os.path.exists(os.path.join(directory, "avl", "t1.snapshot"))
+        finally:
+            tree_registry.directory = original
+            tree_registry._trees.pop(("avl", "t1"), None)
+    print("   ✅ Los árboles con nombre se guardan al apagar, en TREE_DIR")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DE ÁRBOLES CON NOMBRE")
+    print("=" * 60)
+    test_lru_eviction_and_reload()
+    test_tree_in_use_is_not_evicted()
+    test_invalid_names_are_rejected()
+    test_named_trees_are_saved_on_shutdown()
+    print("\n✅ Todas las pruebas de árboles con nombre pasaron")
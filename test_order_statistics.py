@@ -0,0 +1,111 @@
+"""Prueba de las consultas por posición del árbol AVL (rank, select, percentiles)
+
+No necesita el servidor corriendo: compara cada consulta con el resultado
+de una lista ordenada, después de inserciones y podas al azar, en los dos
+almacenamientos (objetos y arena).
+"""
+import bisect
+import math
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.controllers.avl_controller import router
+from app.controllers.named_trees import get_avl_tree
+from app.services.avl_arena_service import ArenaAVLTree
+from app.services.avl_service import AVLTree
+
+
+def test_queries_match_a_sorted_list():
+    rng = random.Random(4)
+    for avl_tree in (AVLTree(), ArenaAVLTree()):
+        present = set()
+        for step in range(3000):
+            value = rng.randrange(-500, 500)
+            if rng.random() < 0.65:
+                avl_tree.insert(value)
+                present.add(value)
+            else:
+                avl_tree.prune(value)
+                present.discard(value)
+            if step % 300:
+                continue
+            
+            values = sorted(present)
+            n = len(values)
+            for k in range(n):
+                assert avl_tree.select(k) == values[k]
+            for probe in range(-510, 510, 7):
+                assert avl_tree.rank(probe) == bisect.bisect_left(values, probe)
+                hi = probe + rng.randrange(100)
+                expected = values[bisect.bisect_left(values, probe):bisect.bisect_right(values, hi)]
+                assert avl_tree.count_between(probe, hi) == len(expected)
+                assert avl_tree.range(probe, hi) == expected
+                assert avl_tree.range(probe, hi, limit=3) == expected[:3]
+            assert avl_tree.count_between(10, -10) == 0
+            for p in (0, 1, 25, 50, 90, 99, 99.9, 100):
+                assert avl_tree.percentile(p) == values[max(0, math.ceil(p * n / 100) - 1)]
+            middle = (values[(n - 1) // 2] + values[n // 2]) / 2
+            assert avl_tree.median() == (values[n // 2] if n % 2 else middle)
+    print("   ✅ rank, select, count_between, range y percentiles iguales a una lista ordenada")
+
+
+def test_out_of_range_queries():
+    for avl_tree in (AVLTree(), ArenaAVLTree()):
+        for query in (avl_tree.median, lambda: avl_tree.percentile(50), lambda: avl_tree.select(0)):
+            try:
+                query()
+                assert False, "An empty tree should raise IndexError"
+            except IndexError:
+                pass
+        assert avl_tree.rank(5) == 0 and avl_tree.range(0, 10) == []
+        
+        for value in (1, 2, 3):
+            avl_tree.insert(value)
+        for k in (-1, 3):
+            try:
+                avl_tree.select(k)
+                assert False, f"k={k} should raise IndexError"
+            except IndexError:
+                pass
+        for p in (-1, 100.5):
+            try:
+                avl_tree.percentile(p)
+                assert False, f"p={p} should raise ValueError"
+            except ValueError:
+                pass
+        assert avl_tree.median() == 2 and avl_tree.range(0, 10, limit=0) == []
+    print("   ✅ Árbol vacío, k y p fuera de rango: IndexError y ValueError")
+
+
+def test_order_statistic_endpoints():
+    avl_tree = AVLTree()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_avl_tree] = lambda: avl_tree
+    client = TestClient(app)
+    
+    assert client.get("/avl/median").json()["success"] is False
+    avl_tree.insert_many(range(10, 101, 10))
+    
+    assert client.get("/avl/rank", params={"value": 35}).json()["data"]["rank"] == 3
+    assert client.get("/avl/select", params={"k": 9}).json()["data"]["value"] == 100
+    assert client.get("/avl/select", params={"k": 10}).json()["success"] is False
+    assert client.get("/avl/count-between", params={"lo": 15, "hi": 50}).json()["data"]["count"] == 4
+    assert client.get("/avl/median").json()["data"]["median"] == 55
+    assert client.get("/avl/percentile", params={"p": 90}).json()["data"]["value"] == 90
+    assert client.get("/avl/percentile", params={"p": 101}).json()["success"] is False
+    values = client.get("/avl/range", params={"lo": 25, "hi": 80, "limit": 2}).json()["data"]["values"]
+    assert values == [30, 40]
+    print("   ✅ Endpoints /avl/rank, /select, /count-between, /median, /percentile y /range")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DE LAS CONSULTAS POR POSICIÓN")
+    print("=" * 60)
+    test_queries_match_a_sorted_list()
+    test_out_of_range_queries()
+    test_order_statistic_endpoints()
+    print("\n✅ Todas las pruebas de las consultas por posición pasaron")
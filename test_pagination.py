@@ -0,0 +1,120 @@
+"""Prueba de la paginación con cursor (?after=&limit=) de recorridos y datos guardados
+
+No necesita el servidor corriendo: pide cada recorrido de a páginas y
+compara la concatenación con el recorrido completo, en el AVL (objetos y
+arena) y en el ABB.
+"""
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.controllers import avl_controller, tree_controller
+from app.controllers.named_trees import get_avl_tree, get_tree
+from app.services.avl_arena_service import ArenaAVLTree
+from app.services.avl_service import AVLTree
+from app.services.tree_service import BinarySearchTree
+
+
+def make_client(router, dependency, tree):
+    """TestClient con el router conectado a un árbol propio"""
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[dependency] = lambda: tree
+    return TestClient(app)
+
+
+def read_pages(client, path, key, limit):
+    """Pide path de a limit valores siguiendo next_cursor; retorna todo lo leído"""
+    values, after, pages = [], None, 0
+    while True:
+        params = {"limit": limit} if after is None else {"limit": limit, "after": after}
+        body = client.get(path, params=params).json()
+        assert body["success"] is True
+        page, after = body["data"][key], body["data"]["next_cursor"]
+        assert len(page) <= limit and (after is None or after == page[-1])
+        values += page
+        pages += 1
+        if after is None:
+            return values, pages
+
+
+def sample_trees():
+    rng = random.Random(6)
+    values = rng.sample(range(1000), 200)
+    avl, arena, bst = AVLTree(), ArenaAVLTree(), BinarySearchTree()
+    for value in values:
+        avl.insert(value)
+        arena.insert(value)
+        bst.insert(value)
+    for value in values[::5]:
+        avl.prune(value)
+        arena.prune(value)
+        bst.prune(value)
+    return avl, arena, bst
+
+
+def test_iterators_resume_after_any_cursor():
+    for tree in sample_trees():
+        for name in ("inorder", "preorder", "postorder"):
+            full = getattr(tree, name)()
+            iterate = getattr(tree, f"iter_{name}")
+            assert list(iterate()) == full
+            # Reanudar después de cada valor da exactamente el resto
+            for position, value in enumerate(full):
+                assert list(iterate(after=value)) == full[position + 1:], f"{name} after {value}"
+        saved = tree.get_saved_data()
+        assert list(tree.iter_saved_data(after=saved[10])) == saved[11:]
+    print("   ✅ iter_inorder, iter_preorder e iter_postorder se reanudan desde cualquier cursor")
+
+
+def test_endpoints_follow_next_cursor():
+    avl, arena, bst = sample_trees()
+    cases = [(make_client(avl_controller.router, get_avl_tree, tree), "/avl", "values", tree)
+             for tree in (avl, arena)]
+    cases.append((make_client(tree_controller.router, get_tree, bst), "/tree", "kid_ids", bst))
+    for client, prefix, saved_key, tree in cases:
+        for name in ("inorder", "preorder", "postorder"):
+            values, pages = read_pages(client, f"{prefix}/traversal/{name}", "traversal", 7)
+            assert values == getattr(tree, name)() and pages == -(-len(values) // 7)
+        values, _ = read_pages(client, f"{prefix}/saved-data", saved_key, 25)
+        assert values == tree.get_saved_data()
+        
+        # Sin limit se retorna todo y no hay siguiente página
+        body = client.get(f"{prefix}/traversal/inorder").json()
+        assert body["data"]["next_cursor"] is None and body["data"]["traversal"] == tree.inorder()
+        assert client.get(f"{prefix}/traversal/inorder", params={"limit": 0}).status_code == 422
+    print("   ✅ /avl y /tree: las páginas siguiendo next_cursor forman el recorrido completo")
+
+
+def test_invalid_or_foreign_cursor():
+    avl, arena, bst = sample_trees()
+    cases = [(make_client(avl_controller.router, get_avl_tree, tree), "/avl", tree)
+             for tree in (avl, arena)]
+    cases.append((make_client(tree_controller.router, get_tree, bst), "/tree", bst))
+    for client, prefix, tree in cases:
+        # Un cursor que nunca estuvo, o que se podó después de recibirlo
+        inorder = tree.inorder()
+        pruned = inorder[3]
+        tree.prune(pruned)
+        for cursor in (5000, pruned):
+            for path in ("/traversal/preorder", "/traversal/postorder", "/saved-data"):
+                body = client.get(f"{prefix}{path}", params={"after": cursor, "limit": 5}).json()
+                assert body["success"] is False and str(cursor) in body["message"], f"{prefix}{path} {cursor}"
+        
+        # En inorden el cursor es una clave: sigue con el primer valor mayor
+        page = client.get(f"{prefix}/traversal/inorder", params={"after": pruned, "limit": 2}).json()
+        assert page["data"] == {"traversal": inorder[4:6], "next_cursor": inorder[5]}
+        page = client.get(f"{prefix}/traversal/inorder", params={"after": 5000, "limit": 2}).json()
+        assert page["data"] == {"traversal": [], "next_cursor": None}
+    print("   ✅ Un cursor desconocido o podado responde success=false (inorden sigue por clave)")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DE LA PAGINACIÓN CON CURSOR")
+    print("=" * 60)
+    test_iterators_resume_after_any_cursor()
+    test_endpoints_follow_next_cursor()
+    test_invalid_or_foreign_cursor()
+    print("\n✅ Todas las pruebas de la paginación pasaron")
@@ -0,0 +1,108 @@
+"""Prueba del modo persistente del árbol AVL (AVL_PERSISTENT=1, ?version=)
+
+No necesita el servidor corriendo: las escrituras copian su camino, así que
+una versión publicada debe seguir igual después de cualquier escritura
+posterior. Se compara cada versión con el contenido que tenía al publicarse.
+"""
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.controllers.avl_controller import router
+from app.controllers.named_trees import get_avl_tree
+from app.services.avl_service import AVLTree, create_avl_tree
+
+
+def test_old_versions_never_change():
+    rng = random.Random(11)
+    avl_tree = create_avl_tree(persistent=True, max_versions=1000)
+    expected = {0: []}  # versión -> inorden al publicarse
+    structures = {}
+    present = set()
+    for _ in range(400):
+        value = rng.randrange(300)
+        if rng.random() < 0.6 or not present:
+            avl_tree.insert(value)
+            present.add(value)
+        else:
+            avl_tree.prune(value)
+            present.discard(value)
+        if rng.random() < 0.1:
+            avl_tree.insert_many(rng.sample(range(300), 20))
+            present.update(avl_tree.saved_data)
+        expected[avl_tree.version] = sorted(present)
+        structures[avl_tree.version] = avl_tree.get_structure()
+    avl_tree.prune_range(50, 150)
+    avl_tree.balance_tree()
+    
+    # Cada versión conserva su contenido y su forma, y sus consultas usan los
+    # tamaños de esa versión
+    for version, values in expected.items():
+        view = avl_tree.snapshot(version)
+        assert view.inorder() == values, f"Version {version} changed"
+        if version in structures:
+            assert view.get_structure() == structures[version]
+        if values:
+            assert view.select(len(values) // 2) == values[len(values) // 2]
+            assert view.rank(values[-1]) == len(values) - 1
+    assert avl_tree.snapshot().inorder() == avl_tree.inorder()
+    print(f"   ✅ {len(expected)} versiones publicadas siguen iguales después de escribir")
+
+
+def test_max_versions_drops_old_versions():
+    avl_tree = AVLTree(persistent=True, max_versions=3)
+    for value in range(1, 6):
+        avl_tree.insert(value)
+    
+    assert avl_tree.version == 5 and avl_tree.versions() == [3, 4, 5]
+    assert avl_tree.snapshot(3).inorder() == [1, 2, 3]
+    for version in (0, 2, 6):
+        try:
+            avl_tree.snapshot(version)
+            assert False, f"Version {version} should not be available"
+        except ValueError:
+            pass
+    # Una escritura que no cambia nada no publica versión
+    avl_tree.insert(5)
+    avl_tree.prune(100)
+    assert avl_tree.versions() == [3, 4, 5]
+    print("   ✅ Solo se conservan las últimas max_versions versiones")
+
+
+def test_version_query_parameter():
+    avl_tree = AVLTree(persistent=True, max_versions=2)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_avl_tree] = lambda: avl_tree
+    client = TestClient(app)
+    
+    for value in (10, 20, 30):
+        client.post("/avl/insert", params={"value": value, "response": "none"})
+    assert client.get("/avl/versions").json()["data"] == {"current": 3, "versions": [2, 3]}
+    
+    inorder = client.get("/avl/traversal/inorder", params={"version": 2}).json()
+    assert inorder["data"]["traversal"] == [10, 20]
+    assert client.post("/avl/search", params={"value": 30, "version": 2}).json()["data"]["found"] is False
+    assert client.post("/avl/search", params={"value": 30}).json()["data"]["found"] is True
+    
+    # Una versión desconocida o ya descartada responde con un error
+    for version in (1, 99):
+        body = client.get("/avl/structure", params={"version": version}).json()
+        assert body["success"] is False and f"Version {version}" in body["message"]
+    
+    # Sin modo persistente ?version= también es un error
+    app.dependency_overrides[get_avl_tree] = lambda: AVLTree()
+    assert client.get("/avl/structure", params={"version": 0}).json()["success"] is False
+    assert client.get("/avl/versions").json()["success"] is False
+    print("   ✅ ?version= lee versiones publicadas y rechaza las desconocidas")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DEL MODO PERSISTENTE")
+    print("=" * 60)
+    test_old_versions_never_change()
+    test_max_versions_drops_old_versions()
+    test_version_query_parameter()
+    print("\n✅ Todas las pruebas del modo persistente pasaron")
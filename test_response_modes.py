@@ -0,0 +1,169 @@
+"""Prueba de los modos de respuesta de las escrituras (?response=none|summary|delta|full)
+
+No necesita el servidor corriendo: usa el TestClient con árboles propios y
+compara cada respuesta con el estado del árbol después de la escritura. El
+delta debe listar justo los nodos cuyo contenido cambió.
+"""
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.controllers import avl_controller, tree_controller
+from app.controllers.named_trees import get_avl_tree, get_tree
+from app.services.avl_arena_service import ArenaAVLTree
+from app.services.avl_service import AVLTree
+from app.services.tree_service import BinarySearchTree
+
+
+def make_client(router, dependency, tree):
+    """TestClient con el router conectado a un árbol propio"""
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[dependency] = lambda: tree
+    return TestClient(app)
+
+
+def flatten(structure):
+    """Nodos de una estructura por clave: {clave: (datos del nodo, claves de los hijos)}"""
+    nodes = {}
+    stack = [structure] if structure is not None else []
+    while stack:
+        node = stack.pop()
+        data = {key: value for key, value in node.items() if key != "children"}
+        key = data["value"] if "value" in data else data["kid"]["id"]
+        children = [child and (child["value"] if "value" in child else child["kid"]["id"])
+                    for child in node["children"]]
+        nodes[key] = (data, children)
+        stack.extend(child for child in node["children"] if child is not None)
+    return nodes
+
+
+def check_delta(delta, before, after):
+    """El delta describe los nodos como quedaron y lista todos los que cambiaron"""
+    assert delta["rebuilt"] is False
+    changed = {}
+    for node in delta["changed_nodes"]:
+        key = node["value"] if "value" in node else node["kid"]["id"]
+        data, children = after[key]
+        assert node["children"] == children
+        for field, value in data.items():
+            assert node[field] == value, f"{key}: {field}"
+        changed[key] = node
+    # Todo nodo nuevo o con otra altura, balance o hijos aparece en el delta
+    for key, state in after.items():
+        if before.get(key) != state:
+            assert key in changed, f"Node {key} changed but is not in the delta"
+
+
+def test_avl_response_modes():
+    for avl_tree in (AVLTree(), ArenaAVLTree()):
+        client = make_client(avl_controller.router, get_avl_tree, avl_tree)
+        
+        assert client.post("/avl/insert", params={"value": 10, "response": "none"}).json()["data"] == {}
+        data = client.post("/avl/insert", params={"value": 20, "response": "summary"}).json()["data"]
+        assert data == {"summary": {"size": 2, "height": 2, "root": 10}}
+        # 10, 20, 30: rotación simple a la izquierda con 20 como nueva raíz
+        delta = client.post("/avl/insert", params={"value": 30, "response": "delta"}).json()["data"]["delta"]
+        assert delta["rotations"] == [{"type": "left", "pivot": 10, "new_root": 20}]
+        assert delta["root"] == 20 and {node["value"] for node in delta["changed_nodes"]} >= {10, 20, 30}
+        data = client.post("/avl/insert", params={"value": 40, "response": "full"}).json()["data"]
+        assert data == {"structure": avl_tree.get_structure()}
+        
+        # Escrituras al azar: cada delta coincide con el árbol después de escribir
+        rng = random.Random(10)
+        for _ in range(300):
+            value = rng.randrange(100)
+            before = flatten(avl_tree.get_structure())
+            if rng.random() < 0.6:
+                body = client.post("/avl/insert", params={"value": value, "response": "delta"}).json()
+            else:
+                body = client.delete("/avl/prune", params={"value": value, "response": "delta"}).json()
+            if body["success"]:
+                check_delta(body["data"]["delta"], before, flatten(avl_tree.get_structure()))
+                assert body["data"]["delta"]["root"] == avl_tree.summary()["root"]
+            else:
+                assert "data" not in body
+        
+        data = client.delete("/avl/prune", params={"value": avl_tree.inorder()[0], "response": "summary"}).json()["data"]
+        assert data == {"summary": avl_tree.summary()}
+        
+        # Balancear reconstruye todo: el delta trae la estructura completa
+        for mode, keys in (("none", set()), ("summary", {"summary"}), ("full", {"structure"}),
+                           ("delta", {"structure", "delta"})):
+            data = client.post("/avl/balance", params={"response": mode}).json()["data"]
+            assert set(data) == keys
+        assert data["delta"]["rebuilt"] is True and data["delta"]["changed_nodes"] == []
+        assert data["structure"] == avl_tree.get_structure()
+        assert client.post("/avl/insert", params={"value": 1, "response": "other"}).status_code == 422
+    print("   ✅ /avl/insert, /avl/prune y /avl/balance: none, summary, delta y full")
+
+
+def test_avl_prune_range_delta():
+    for avl_tree in (AVLTree(), AVLTree(persistent=True)):
+        client = make_client(avl_controller.router, get_avl_tree, avl_tree)
+        avl_tree.insert_many(range(0, 2000, 2))
+        rng = random.Random(19)
+        for _ in range(30):
+            lo = rng.randrange(2000)
+            hi = lo + rng.randrange(200)
+            before = flatten(avl_tree.get_structure())
+            body = client.delete("/avl/prune-range", params={"lo": lo, "hi": hi, "response": "delta"}).json()
+            if not body["success"]:
+                continue
+            after = flatten(avl_tree.get_structure())
+            delta = body["data"]["delta"]
+            # Solo los nodos que las uniones volvieron a enlazar, no el árbol entero
+            check_delta(delta, {key: before[key] for key in after if key in before}, after)
+            assert len(delta["changed_nodes"]) < 4 * avl_tree.height()
+            assert all(not lo <= rotation["pivot"] <= hi for rotation in delta["rotations"])
+            assert delta["root"] == avl_tree.summary()["root"]
+    print("   ✅ /avl/prune-range: el delta trae solo los nodos reenlazados")
+
+
+def test_bst_response_modes():
+    tree = BinarySearchTree()
+    client = make_client(tree_controller.router, get_tree, tree)
+    
+    # La inserción del ABB siempre retorna el Kid insertado junto al modo pedido
+    params = {"kid_id": 50, "name": "Ana", "age": 7}
+    data = client.post("/tree/insert", params={**params, "response": "none"}).json()["data"]
+    assert data == {"kid": {"id": 50, "name": "Ana", "age": 7}}
+    data = client.post("/tree/insert", params={"kid_id": 30, "response": "summary"}).json()["data"]
+    assert data == {"kid": {"id": 30, "name": "", "age": 0}, "summary": {"size": 2, "root": 50}}
+    delta = client.post("/tree/insert", params={"kid_id": 70, "age": 9, "response": "delta"}).json()["data"]["delta"]
+    assert delta["rotations"] == [] and delta["root"] == 50
+    assert delta["changed_nodes"] == [
+        {"kid": {"id": 50, "name": "Ana", "age": 7}, "children": [30, 70]},
+        {"kid": {"id": 70, "name": "", "age": 9}, "children": [None, None]}
+    ]
+    data = client.post("/tree/insert", params={"kid_id": 60, "response": "full"}).json()["data"]
+    assert set(data) == {"kid", "structure"} and data["structure"] == tree.get_structure()
+    
+    rng = random.Random(10)
+    for _ in range(300):
+        kid_id = rng.randrange(100)
+        before = flatten(tree.get_structure())
+        if rng.random() < 0.6:
+            body = client.post("/tree/insert", params={"kid_id": kid_id, "response": "delta"}).json()
+        else:
+            body = client.delete("/tree/prune", params={"kid_id": kid_id, "response": "delta"}).json()
+        if body["success"]:
+            after = flatten(tree.get_structure())
+            # Al quitar un nodo su padre cambia de hijos; la raíz se reporta aparte
+            check_delta(body["data"]["delta"], {key: before[key] for key in after if key in before}, after)
+            assert body["data"]["delta"]["root"] == tree.summary()["root"]
+    
+    data = client.delete("/tree/prune", params={"kid_id": tree.inorder()[0], "response": "summary"}).json()["data"]
+    assert data == {"summary": tree.summary()}
+    print("   ✅ /tree/insert y /tree/prune: none, summary, delta y full")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DE LOS MODOS DE RESPUESTA")
+    print("=" * 60)
+    test_avl_response_modes()
+    test_avl_prune_range_delta()
+    test_bst_response_modes()
+    print("\n✅ Todas las pruebas de los modos de respuesta pasaron")
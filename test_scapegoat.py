@@ -0,0 +1,132 @@
+"""Prueba del modo scapegoat del Árbol Binario de Búsqueda (BST_SCAPEGOAT=1)
+
+Con IDs secuenciales el ABB normal queda como una lista de altura n; el
+ScapegoatTree reconstruye los subárboles desbalanceados y mantiene la altura
+en O(log n) con la misma API y las mismas respuestas.
+"""
+import math
+import os
+import random
+import tempfile
+
+from app.models.tree_model import SizedNode
+from app.services.scapegoat_service import ScapegoatTree
+from app.services.snapshot import load_snapshot, save_snapshot
+from app.services.tree_service import BinarySearchTree, create_tree
+
+
+def height_bound(tree):
+    """Altura máxima del modo scapegoat: log_{1/alpha}(n) aristas más la raíz"""
+    return math.floor(math.log(max(tree.max_size, 1)) / math.log(1 / tree.alpha)) + 1
+
+
+def check_sizes(node):
+    """Comprueba que cada nodo guarde el tamaño de su subárbol; retorna el tamaño"""
+    if node is None:
+        return 0
+    size = 1 + check_sizes(node.children[0]) + check_sizes(node.children[1])
+    assert node.size == size
+    return size
+
+
+def test_sequential_ids_keep_logarithmic_height():
+    tree = create_tree(scapegoat=True)
+    assert isinstance(tree, ScapegoatTree) and tree.alpha == 0.6
+    n = 5000
+    for kid_id in range(1, n + 1):
+        tree.insert(kid_id, f"Kid {kid_id}", kid_id % 18)
+    
+    assert tree.height() <= height_bound(tree) < 20
+    assert check_sizes(tree.root) == n
+    assert tree.inorder() == list(range(1, n + 1))
+    assert tree.search(1) and tree.search(n) and not tree.search(n + 1)
+    print(f"   ✅ {n} IDs secuenciales: altura {tree.height()} (el ABB normal tendría {n})")
+
+
+def test_same_results_as_the_plain_bst():
+    rng = random.Random(7)
+    scapegoat, plain = ScapegoatTree(), BinarySearchTree()
+    for _ in range(5000):
+        kid_id = rng.randrange(1000)
+        if rng.random() < 0.6:
+            assert scapegoat.insert(kid_id, "Kid", kid_id % 12) == plain.insert(kid_id, "Kid", kid_id % 12)
+        else:
+            scapegoat.prune(kid_id)
+            plain.prune(kid_id)
+    
+    assert scapegoat.inorder() == plain.inorder()
+    assert scapegoat.get_saved_data() == plain.get_saved_data()
+    assert scapegoat.get_kids_grouped_by_age_ranges(3) == plain.get_kids_grouped_by_age_ranges(3)
+    assert check_sizes(scapegoat.root) == len(plain.saved_data)
+    assert scapegoat.height() <= height_bound(scapegoat)
+    print("   ✅ Inserciones y podas al azar: mismo contenido que el ABB normal")
+
+
+def test_prunes_rebuild_and_delta():
+    tree = ScapegoatTree()
+    for kid_id in range(1, 101):
+        tree.insert(kid_id)
+    structure = tree.get_structure()
+    assert structure["kid"]["id"] == tree.kids.ids[tree.root.slot]
+    
+    # Podar hasta quedar por debajo de alpha * max_size reconstruye todo el árbol
+    for kid_id in range(1, 42):
+        tree.begin_delta()
+        tree.prune(kid_id)
+        delta = tree.end_delta()
+    assert delta["rebuilt"] and delta["changed_nodes"] == []
+    assert tree.max_size == 59 and tree.height() == 6
+    assert check_sizes(tree.root) == 59
+    
+    # Una inserción que no reconstruye reporta solo los nodos que cambiaron
+    tree.begin_delta()
+    tree.insert(1000)
+    delta = tree.end_delta()
+    assert not delta["rebuilt"] and len(delta["changed_nodes"]) == 2
+    print("   ✅ Podas: reconstrucción completa y delta marcado como rebuilt")
+
+
+def test_first_insert_and_node_class():
+    # La raíz de un árbol vacío no pasa por _insert_iterative
+    tree = ScapegoatTree()
+    tree.insert(10)
+    assert tree.max_size == 1
+    
+    # El ABB base crea los nodos con node_class, así que un subárbol armado
+    # por la inserción del ABB también guarda tamaños
+    class SizedTree(BinarySearchTree):
+        node_class = SizedNode
+    sized = SizedTree()
+    for kid_id in (2, 1, 3):
+        sized.insert(kid_id)
+    assert all(isinstance(node, SizedNode) for node in sized._iter_preorder_nodes())
+    print("   ✅ max_size cuenta la raíz y los nodos usan node_class")
+
+
+def test_snapshot_restores_sizes():
+    tree = ScapegoatTree()
+    for kid_id in range(1, 1001):
+        tree.insert(kid_id)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tree.snapshot")
+        save_snapshot(tree, path)
+        restored = create_tree(scapegoat=True)
+        load_snapshot(restored, path)
+    
+    assert restored.preorder() == tree.preorder()
+    assert check_sizes(restored.root) == 1000 and restored.max_size == 1000
+    restored.insert(1001)
+    assert restored.height() <= height_bound(restored)
+    print("   ✅ Snapshot: misma forma y tamaños recalculados")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DEL MODO SCAPEGOAT")
+    print("=" * 60)
+    test_sequential_ids_keep_logarithmic_height()
+    test_same_results_as_the_plain_bst()
+    test_prunes_rebuild_and_delta()
+    test_first_insert_and_node_class()
+    test_snapshot_restores_sizes()
+    print("\n✅ Todas las pruebas del modo scapegoat pasaron")
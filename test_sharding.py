@@ -0,0 +1,144 @@
+"""Prueba del árbol AVL particionado por rangos en procesos shard
+
+No necesita el servidor corriendo: crea sus propios procesos shard y compara
+cada consulta con un AVLTree normal con los mismos valores.
+"""
+import random
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.controllers.sharded_controller import get_sharded_tree, router
+from app.services.avl_service import AVLTree
+from app.services.sharding import ShardedAVLTree
+
+
+def test_sharded_tree_matches_avl():
+    sharded = ShardedAVLTree(bounds=[0], max_shard_size=200, max_shards=4)
+    try:
+        reference = AVLTree()
+        rng = random.Random(16)
+        values = [rng.randint(-1000, 1000) for _ in range(900)]
+        assert sharded.insert_many(values[:600]) == reference.insert_many(values[:600])
+        for value in values[600:]:
+            assert sharded.insert(value) == reference.insert(value)
+        for value in values[::7]:
+            assert sharded.prune(value) == (value in reference.saved_data)
+            reference.prune(value)
+        
+        # Los shards que pasaron de 200 valores se partieron, hasta 4 procesos
+        assert len(sharded.shards) == 4 and sharded.splits == 2
+        assert sharded.inorder() == reference.inorder()
+        assert sharded.size() == reference.size()
+        for lo, hi in [(-1000, 1000), (-50, 50), (300, 200), (990, 2000)]:
+            assert sharded.range(lo, hi) == reference.range(lo, hi)
+            assert sharded.range(lo, hi, 5) == reference.range(lo, hi, 5)
+            assert sharded.count_between(lo, hi) == reference.count_between(lo, hi)
+        for value in (-1001, -3, 0, 512, 2000):
+            assert sharded.search(value) == reference.search(value)
+            assert sharded.rank(value) == reference.rank(value)
+        for k in (0, 17, reference.size() - 1):
+            assert sharded.select(k) == reference.select(k)
+        assert sharded.median() == reference.median()
+        assert sharded.percentile(99) == reference.percentile(99)
+        
+        # La paginación cruza de un shard al siguiente sin perder valores
+        pages, cursor = [], None
+        while True:
+            page, cursor = sharded.inorder_page(cursor, 97)
+            pages += page
+            if cursor is None:
+                break
+        assert pages == reference.inorder()
+        print(f"   ✅ {len(sharded.shards)} shards con los mismos resultados que un AVL")
+    finally:
+        sharded.close()
+
+
+def test_sharded_router():
+    sharded = ShardedAVLTree(bounds=[100])
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_sharded_tree] = lambda: sharded
+    client = TestClient(app)
+    try:
+        assert client.post("/avl/insert/batch", json=[5, 150, 50, 150]).json()["data"]["inserted"] == 3
+        assert client.post("/avl/insert?value=120").json()["success"]
+        assert client.get("/avl/range?lo=0&hi=200").json()["data"]["values"] == [5, 50, 120, 150]
+        shards = client.get("/avl/shards").json()["data"]["shards"]
+        assert [shard["size"] for shard in shards] == [2, 2]
+        assert client.delete("/avl/prune?value=50").json()["success"]
+        assert client.get("/avl/select?k=1").json()["data"]["value"] == 120
+        assert client.delete("/avl/prune-range?lo=0&hi=130").json()["data"]["removed"] == 2
+        assert client.get("/avl/traversal/inorder").json()["data"]["traversal"] == [150]
+        
+        # ?response= como en el modo normal, salvo delta
+        data = client.post("/avl/insert?value=7").json()["data"]
+        assert [shard["structure"]["value"] for shard in data["shards"]] == [7, 150]
+        assert client.post("/avl/insert?value=8&response=summary").json()["data"]["summary"] == {
+            "size": 3, "height": 2, "shards": 2}
+        assert client.delete("/avl/prune?value=8&response=none").json()["data"] == {}
+        
+        # Lo que no existe con shards responde con un error explícito
+        for method, path in [("POST", "/avl/insert?value=9&response=delta"),
+                             ("POST", "/avl/search?value=7&version=1"),
+                             ("GET", "/avl/traversal/preorder"), ("GET", "/avl/saved-data"),
+                             ("POST", "/avl/balance"), ("GET", "/avl/versions"), ("GET", "/avl/stats"),
+                             ("POST", "/avl/mine/insert?value=1")]:
+            body = client.request(method, path).json()
+            assert body["success"] is False and "sharded mode" in body["message"], path
+        assert not client.post("/avl/search?value=9").json()["success"]
+        print("   ✅ Endpoints del árbol particionado")
+    finally:
+        sharded.close()
+
+
+def test_failed_batch_keeps_shards_in_sync():
+    # La arena no guarda floats: el shard 0 responde con un error que no es
+    # ValueError y el shard 1 inserta su parte; su respuesta se debe leer
+    sharded = ShardedAVLTree(bounds=[100], storage="arena")
+    try:
+        try:
+            sharded.insert_many([5.5, 150])
+            assert False, "the shard error must be raised"
+        except RuntimeError:
+            pass
+        assert sharded.shards[1].size == 1
+        assert sharded.range(100, 200) == [150]
+        assert sharded.insert(160) and sharded.range(100, 200) == [150, 160]
+        print("   ✅ Un lote con error lee las respuestas de todos los shards")
+    finally:
+        sharded.close()
+
+
+def test_full_shards_do_not_block_writes():
+    # Con max_shards shards un shard grande ya no se parte: insertar en él no
+    # debe pedir el candado exclusivo de la topología
+    sharded = ShardedAVLTree(bounds=[100], max_shard_size=5, max_shards=2)
+    try:
+        sharded.insert_many(range(20))
+        assert len(sharded.shards) == 2 and sharded.shards[0].size == 20
+        
+        # Con una lectura en curso, una escritura que pidiera el candado
+        # exclusivo quedaría esperando
+        writer = threading.Thread(target=lambda: (sharded.insert(50), sharded.insert_many([60, 70])))
+        with sharded.topology.read():
+            writer.start()
+            writer.join(timeout=10)
+            assert not writer.is_alive(), "Writes at max_shards should not take the topology write lock"
+        assert sharded.shards[0].size == 23 and sharded.splits == 0
+        print("   ✅ Con max_shards shards las escrituras no toman el candado exclusivo")
+    finally:
+        sharded.close()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DEL ÁRBOL PARTICIONADO (SHARDS)")
+    print("=" * 60)
+    test_sharded_tree_matches_avl()
+    test_sharded_router()
+    test_failed_batch_keeps_shards_in_sync()
+    test_full_shards_do_not_block_writes()
+    print("\n✅ Todas las pruebas del árbol particionado pasaron")
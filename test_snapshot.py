@@ -0,0 +1,61 @@
+"""Prueba del snapshot binario: guardar y cargar los árboles con mmap
+
+No necesita el servidor corriendo.
+"""
+import os
+import tempfile
+
+from app.services.avl_service import create_avl_tree
+from app.services.snapshot import load_snapshot, save_snapshot
+from app.services.tree_service import BinarySearchTree
+
+
+def test_avl_snapshot_roundtrip():
+    for storage in ("objects", "arena"):
+        avl_tree = create_avl_tree(storage)
+        for value in [50, 30, 70, 20, 40, 60, 80, -5, 2 ** 62]:
+            avl_tree.insert(value)
+        avl_tree.prune(40)
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "avl.snapshot")
+            save_snapshot(avl_tree, path)
+            loaded = create_avl_tree(storage)
+            load_snapshot(loaded, path)
+        
+        assert loaded.inorder() == avl_tree.inorder()
+        assert list(loaded.saved_data) == list(avl_tree.saved_data)
+        assert loaded.select(3) == avl_tree.select(3)
+        print(f"   ✅ AVL ({storage}) cargado con {loaded.size()} valores")
+
+
+def test_bst_snapshot_keeps_shape_and_kids():
+    tree = BinarySearchTree()
+    for kid_id in [50, 30, 70, 20, 40, 60, 80]:
+        tree.insert(kid_id, "Ñandú" if kid_id % 20 else "Ana", kid_id // 10)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tree.snapshot")
+        save_snapshot(tree, path)
+        loaded = BinarySearchTree()
+        load_snapshot(loaded, path)
+        
+        # Un snapshot del BST no se puede cargar en un AVL
+        try:
+            load_snapshot(create_avl_tree(), path)
+            assert False, "Loading a BST snapshot into an AVL tree should fail"
+        except ValueError:
+            pass
+    
+    assert loaded.get_structure() == tree.get_structure()
+    assert list(loaded.saved_data) == list(tree.saved_data)
+    print(f"   ✅ BST cargado con la misma forma ({len(loaded.saved_data)} Kids)")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DEL SNAPSHOT BINARIO")
+    print("=" * 60)
+    test_avl_snapshot_roundtrip()
+    test_bst_snapshot_keeps_shape_and_kids()
+    print("\n✅ Todas las pruebas del snapshot pasaron")
@@ -0,0 +1,161 @@
+"""Prueba de split y join del árbol AVL, y de la poda por rango construida con ellos
+
+No necesita el servidor corriendo: parte y une árboles aleatorios y revisa
+que los resultados sigan siendo AVL válidos (alturas, balance y tamaños).
+"""
+import random
+import tempfile
+
+from app.services.avl_service import AVLTree, create_avl_tree
+from app.services.wal import attach_wal
+
+
+def check_avl(avl_tree):
+    """Revisa alturas, balance y tamaños de cada nodo y retorna el inorden"""
+    def visit(node):
+        if node is None:
+            return 0, 0
+        left_height, left_size = visit(node.children[0])
+        right_height, right_size = visit(node.children[1])
+        assert abs(left_height - right_height) <= 1, f"Node {node.value} is unbalanced"
+        assert node.height == 1 + max(left_height, right_height), f"Wrong height at {node.value}"
+        assert node.size == 1 + left_size + right_size, f"Wrong size at {node.value}"
+        return node.height, node.size
+    
+    visit(avl_tree.root)
+    values = avl_tree.inorder()
+    assert values == sorted(avl_tree.saved_data)
+    return values
+
+
+def test_split():
+    rng = random.Random(18)
+    for persistent in (False, True):
+        for _ in range(30):
+            values = rng.sample(range(10_000), rng.randint(0, 400))
+            avl_tree = AVLTree(persistent)
+            avl_tree.insert_many(values)
+            published = avl_tree.inorder()
+            key = rng.randint(-10, 10_010)
+            
+            left, right = avl_tree.split(key)
+            assert check_avl(left) == sorted(value for value in values if value < key)
+            assert check_avl(right) == sorted(value for value in values if value >= key)
+            assert list(left.saved_data) == [value for value in values if value < key]
+            assert avl_tree.size() == 0
+            if persistent:
+                # Las versiones publicadas antes del split no cambian
+                assert avl_tree.snapshot(avl_tree.version - 1).inorder() == published
+    print("   ✅ split: dos árboles AVL válidos con los valores correctos")
+
+
+def test_join():
+    rng = random.Random(19)
+    for persistent in (False, True):
+        for _ in range(30):
+            # Tamaños muy distintos para que las alturas difieran mucho
+            sizes = [rng.randint(0, 500), rng.randint(0, 20)]
+            rng.shuffle(sizes)
+            left = AVLTree(persistent)
+            left.insert_many(rng.sample(range(0, 5_000), sizes[0]))
+            right = AVLTree(persistent)
+            right.insert_many(rng.sample(range(5_001, 10_000), sizes[1]))
+            expected = left.inorder() + [5_000] + right.inorder()
+            expected_order = list(left.saved_data) + [5_000] + list(right.saved_data)
+            
+            joined = AVLTree.join(left, 5_000, right)
+            assert check_avl(joined) == expected
+            assert list(joined.saved_data) == expected_order
+            assert left.size() == right.size() == 0
+    print("   ✅ join: árbol AVL válido con la altura correcta")
+
+
+def test_join_rejects_overlap_and_arena_matches():
+    left, right = AVLTree(), AVLTree()
+    left.insert_many([1, 2, 30])
+    right.insert_many([10, 20])
+    try:
+        AVLTree.join(left, 5, right)
+        assert False, "Overlapping trees should be rejected"
+    except ValueError:
+        pass
+    
+    arena = create_avl_tree("arena")
+    arena.insert_many(range(100))
+    low, high = arena.split(40)
+    assert low.inorder() == list(range(40)) and high.inorder() == list(range(40, 100))
+    high.prune(40)
+    assert type(low).join(low, 40, high).inorder() == list(range(100))
+    print("   ✅ join rechaza árboles solapados; split y join también en arena")
+
+
+def test_prune_range():
+    rng = random.Random(20)
+    for storage, persistent in (("objects", False), ("objects", True), ("arena", False)):
+        for _ in range(30):
+            values = rng.sample(range(10_000), rng.randint(0, 400))
+            avl_tree = create_avl_tree(storage, persistent)
+            avl_tree.insert_many(values)
+            lo = rng.randint(-10, 10_000)
+            hi = lo + rng.choice([0, 10, 500, 20_000])
+            
+            expected = [value for value in values if not lo <= value <= hi]
+            assert avl_tree.prune_range(lo, hi) == len(values) - len(expected)
+            assert list(avl_tree.saved_data) == expected
+            if storage == "objects":
+                assert check_avl(avl_tree) == sorted(expected)
+            else:
+                assert avl_tree.inorder() == sorted(expected)
+            # El árbol sigue funcionando después de la poda
+            avl_tree.insert(lo)
+            assert avl_tree.rank(lo) == sum(1 for value in expected if value < lo)
+    print("   ✅ prune_range: valores del intervalo podados con un solo rebalanceo")
+
+
+def test_prune_range_delta_in_arena():
+    # Pocos valores: la arena los poda uno por uno y el delta no debe
+    # incluir los slots que quedaron libres
+    avl_tree = create_avl_tree("arena")
+    avl_tree.insert_many(range(1, 21))
+    avl_tree.begin_delta()
+    assert avl_tree.prune_range(10, 12) == 3
+    delta = avl_tree.end_delta()
+    
+    assert not delta["rebuilt"] and delta["changed_nodes"]
+    changed = [node["value"] for node in delta["changed_nodes"]]
+    assert not set(changed) & {10, 11, 12}
+    assert set(changed) <= set(avl_tree.inorder())
+    
+    # Muchos valores: se reconstruye y el delta lo indica
+    avl_tree.begin_delta()
+    avl_tree.prune_range(1, 15)
+    delta = avl_tree.end_delta()
+    assert delta["rebuilt"] and delta["changed_nodes"] == []
+    print("   ✅ prune_range en arena: el delta no incluye slots liberados")
+
+
+def test_prune_range_is_logged():
+    with tempfile.TemporaryDirectory() as directory:
+        avl_tree = AVLTree()
+        wal = attach_wal(avl_tree, directory, "avl")
+        avl_tree.insert_many(range(100))
+        avl_tree.prune_range(20, 79)
+        wal.close()
+        
+        recovered = AVLTree()
+        attach_wal(recovered, directory, "avl").close()
+        assert recovered.inorder() == list(range(20)) + list(range(80, 100))
+    print("   ✅ prune_range se recupera desde el WAL")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DE SPLIT, JOIN Y PODA POR RANGO")
+    print("=" * 60)
+    test_split()
+    test_join()
+    test_join_rejects_overlap_and_arena_matches()
+    test_prune_range()
+    test_prune_range_delta_in_arena()
+    test_prune_range_is_logged()
+    print("\n✅ Todas las pruebas de split, join y poda por rango pasaron")
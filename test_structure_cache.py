@@ -0,0 +1,75 @@
+"""Prueba de los diccionarios de estructura guardados en cada nodo (node.cache)
+
+No necesita el servidor corriendo: después de cada escritura se pide la
+estructura (que usa los diccionarios guardados) y se compara con la que se
+arma desde cero borrando todos los cachés. Si alguna escritura olvidara
+invalidar un nodo, la estructura guardada quedaría desactualizada.
+"""
+import random
+
+from app.services.avl_arena_service import ArenaAVLTree
+from app.services.avl_service import AVLTree
+from app.services.scapegoat_service import ScapegoatTree
+from app.services.tree_service import BinarySearchTree
+
+
+def uncached_structure(tree):
+    """Borra el caché de todos los nodos y retorna la estructura armada de cero"""
+    if isinstance(tree, ArenaAVLTree):
+        tree._cache = [None] * len(tree._cache)
+    else:
+        stack = [tree.root] if tree.root is not None else []
+        while stack:
+            node = stack.pop()
+            node.cache = None
+            stack.extend(child for child in node.children if child is not None)
+    return tree.get_structure()
+
+
+def test_avl_structure_stays_up_to_date():
+    rng = random.Random(9)
+    for avl_tree in (AVLTree(), ArenaAVLTree(), AVLTree(persistent=True)):
+        for step in range(1500):
+            value = rng.randrange(400)
+            choice = rng.random()
+            if choice < 0.55:
+                avl_tree.insert(value)
+            elif choice < 0.95:
+                avl_tree.prune(value)
+            elif choice < 0.98:
+                avl_tree.insert_many(rng.sample(range(400), 30))
+            else:
+                avl_tree.prune_range(value, value + 20)
+            structure = avl_tree.get_structure()
+            if step % 50 == 0:
+                assert structure == uncached_structure(avl_tree), f"Stale structure at step {step}"
+        if avl_tree.persistent:
+            # Las versiones viejas comparten nodos con la actual: su caché
+            # tampoco debe cambiar con las escrituras posteriores
+            old = avl_tree.snapshot(avl_tree.version - 10)
+            assert old.get_structure() == uncached_structure(old)
+    print("   ✅ AVL, arena y persistente: la estructura guardada sigue al día")
+
+
+def test_bst_structure_stays_up_to_date():
+    rng = random.Random(9)
+    for tree in (BinarySearchTree(), ScapegoatTree()):
+        for step in range(1500):
+            kid_id = rng.randrange(400)
+            if rng.random() < 0.6:
+                tree.insert(kid_id, f"Kid {kid_id}", kid_id % 15)
+            else:
+                tree.prune(kid_id)
+            structure = tree.get_structure()
+            if step % 50 == 0:
+                assert structure == uncached_structure(tree), f"Stale structure at step {step}"
+    print("   ✅ ABB y scapegoat: la estructura guardada sigue al día")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DEL CACHÉ DE ESTRUCTURA")
+    print("=" * 60)
+    test_avl_structure_stays_up_to_date()
+    test_bst_structure_stays_up_to_date()
+    print("\n✅ Todas las pruebas del caché de estructura pasaron")
@@ -0,0 +1,98 @@
+"""Prueba del registro de escrituras (WAL): los árboles se recuperan tras un reinicio
+
+No necesita el servidor corriendo: simula el reinicio creando árboles nuevos
+y conectándolos al mismo directorio de log.
+"""
+import os
+import tempfile
+
+from app.services.avl_service import AVLTree
+from app.services.tree_service import BinarySearchTree
+from app.services.wal import attach_wal
+
+
+def test_avl_recovery():
+    with tempfile.TemporaryDirectory() as directory:
+        avl_tree = AVLTree()
+        wal = attach_wal(avl_tree, directory, "avl", fsync_every=8, snapshot_every=50)
+        for value in range(120):
+            avl_tree.insert(value)
+        avl_tree.insert_many([500, 400, 300])
+        for value in range(0, 120, 3):
+            avl_tree.prune(value)
+        wal.close()
+        
+        # "Reinicio": un árbol nuevo recuperado del snapshot y del log
+        recovered = AVLTree()
+        recovered_wal = attach_wal(recovered, directory, "avl")
+        assert recovered.inorder() == avl_tree.inorder()
+        assert list(recovered.saved_data) == list(avl_tree.saved_data)
+        assert os.path.getsize(recovered_wal.path) == 0, "Recovery should compact the log"
+        
+        recovered.clear()
+        recovered_wal.close()
+        emptied = AVLTree()
+        attach_wal(emptied, directory, "avl").close()
+        assert emptied.inorder() == []
+        print(f"   ✅ AVL recuperado con {len(avl_tree.saved_data)} valores")
+
+
+def test_bst_recovery_keeps_shape():
+    with tempfile.TemporaryDirectory() as directory:
+        tree = BinarySearchTree()
+        wal = attach_wal(tree, directory, "tree", snapshot_every=10)
+        for kid_id in [50, 30, 70, 20, 40, 60, 80, 10, 25, 35, 45, 55, 65]:
+            tree.insert(kid_id, f"Kid {kid_id}", kid_id % 12)
+        tree.prune(30)
+        wal.close()
+        
+        recovered = BinarySearchTree()
+        attach_wal(recovered, directory, "tree").close()
+        assert recovered.get_structure() == tree.get_structure()
+        assert list(recovered.saved_data) == list(tree.saved_data)
+        print(f"   ✅ BST recuperado con la misma forma ({len(tree.saved_data)} Kids)")
+
+
+def test_insert_many_is_logged_after_it_is_applied():
+    with tempfile.TemporaryDirectory() as directory:
+        avl_tree = AVLTree()
+        # Compactar en cada registro: el snapshot se toma justo al escribir el lote
+        wal = attach_wal(avl_tree, directory, "avl", snapshot_every=1)
+        avl_tree.insert(10)
+        avl_tree.insert_many([30, 20, 10, 40])
+        wal.close()
+        
+        recovered = AVLTree()
+        attach_wal(recovered, directory, "avl").close()
+        assert recovered.inorder() == avl_tree.inorder() == [10, 20, 30, 40]
+        assert list(recovered.saved_data) == [10, 30, 20, 40]
+        print("   ✅ El lote de insert_many se registra después de aplicarlo")
+
+
+def test_torn_record_is_dropped():
+    with tempfile.TemporaryDirectory() as directory:
+        avl_tree = AVLTree()
+        wal = attach_wal(avl_tree, directory, "avl")
+        avl_tree.insert(1)
+        avl_tree.insert(2)
+        wal.close()
+        
+        # Simular una caída a mitad de la escritura de un registro
+        with open(wal.path, "ab") as file:
+            file.write(b'["insert",3')
+        
+        recovered = AVLTree()
+        attach_wal(recovered, directory, "avl").close()
+        assert recovered.inorder() == [1, 2]
+        print("   ✅ Registro incompleto descartado")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DEL REGISTRO DE ESCRITURAS (WAL)")
+    print("=" * 60)
+    test_avl_recovery()
+    test_bst_recovery_keeps_shape()
+    test_insert_many_is_logged_after_it_is_applied()
+    test_torn_record_is_dropped()
+    print("\n✅ Todas las pruebas del WAL pasaron")
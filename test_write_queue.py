@@ -0,0 +1,149 @@
+"""Prueba de la cola que agrupa escrituras concurrentes (group commit)
+
+No necesita el servidor corriendo: llama a los endpoints de inserción y poda
+desde varios hilos a la vez con una cola conectada al árbol y revisa que cada
+petición reciba su propio resultado y que el árbol quede igual que con
+escrituras de a una.
+"""
+import tempfile
+import threading
+from functools import partial
+
+from app.controllers import avl_controller, tree_controller
+from app.controllers.write_responses import apply_write_batch
+from app.services.avl_service import AVLTree, create_avl_tree
+from app.services.tree_service import BinarySearchTree
+from app.services.wal import attach_wal
+from app.services.write_queue import WriteQueue
+
+
+def run_together(calls):
+    """Ejecuta cada función en su propio hilo, todas a la vez; retorna sus resultados"""
+    results = [None] * len(calls)
+    barrier = threading.Barrier(len(calls))
+    
+    def run(index):
+        barrier.wait()
+        results[index] = calls[index]()
+    
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(len(calls))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def attach_queue(tree, window=0.05):
+    """Conecta al árbol una cola con ventana de window segundos"""
+    tree.write_queue = WriteQueue(partial(apply_write_batch, tree), window, 256)
+    return tree.write_queue
+
+
+def test_queue_groups_writes():
+    batches = []
+    
+    def apply_batch(entries):
+        batches.append(list(entries))
+        return [ValueError("odd") if entry % 2 else entry * 10 for entry in entries]
+    
+    queue = WriteQueue(apply_batch, 0.05, 256)
+    
+    def submit(entry):
+        try:
+            return queue.submit(entry)
+        except ValueError as error:
+            return str(error)
+    
+    results = run_together([partial(submit, entry) for entry in range(20)])
+    assert results == [entry * 10 if entry % 2 == 0 else "odd" for entry in range(20)]
+    assert len(batches) < 20 and sorted(sum(batches, [])) == list(range(20))
+    assert queue.batches == len(batches) and queue.writes == 20
+    print(f"   ✅ 20 escrituras concurrentes aplicadas en {len(batches)} lotes")
+
+
+def test_avl_endpoints_answer_each_caller():
+    for storage in ("objects", "arena"):
+        avl_tree = create_avl_tree(storage)
+        avl_tree.insert_many([1, 2, 3])
+        queue = attach_queue(avl_tree)
+        values = [3, 4, 5, 4, 6, 2 ** 70, 7, 8] * 2
+        
+        calls = [partial(avl_controller.insert_value, value, "summary", avl_tree) for value in values]
+        responses = run_together(calls)
+        inserted = {}
+        for value, response in zip(values, responses):
+            if not isinstance(response, dict):
+                assert value not in inserted
+                inserted[value] = True
+            elif value == 2 ** 70 and storage == "arena":
+                assert response["message"] == f"Value {value} is outside the 64-bit integer range"
+            else:
+                assert response["message"].endswith("already exists in the tree")
+        expected = {1, 2, 3, 4, 5, 6, 7, 8} | ({2 ** 70} if storage == "objects" else set())
+        assert set(inserted) == expected - {1, 2, 3}
+        assert avl_tree.inorder() == sorted(expected)
+        
+        calls = [partial(avl_controller.prune_value, value, "none", avl_tree) for value in (4, 4, 9, 5)]
+        responses = run_together(calls)
+        assert sum(not isinstance(response, dict) for response in responses) == 2
+        assert avl_tree.inorder() == sorted(expected - {4, 5})
+        assert queue.batches < queue.writes
+        print(f"   ✅ {storage}: cada petición recibe su resultado ({queue.writes} escrituras, {queue.batches} lotes)")
+
+
+def test_batch_responses_show_the_whole_batch():
+    # Cada escritura de un lote recibe el árbol como quedó después del lote
+    avl_tree = AVLTree()
+    results = apply_write_batch(avl_tree, [("insert", (1,), "summary"), ("insert", (2,), "full"),
+                                           ("prune", (1,), "summary"), ("insert", (3,), "summary")])
+    assert [success for success, _ in results] == [True, True, True, True]
+    assert all(results[index][1]["summary"]["size"] == 2 for index in (0, 2, 3))
+    assert results[1][1]["structure"] == avl_tree.get_structure()
+    print("   ✅ summary y full muestran el árbol después de todo el lote")
+
+
+def test_bst_keeps_arrival_order_and_duplicates():
+    tree = BinarySearchTree()
+    attach_queue(tree)
+    calls = [partial(tree_controller.insert_kid, kid_id, f"kid{kid_id}", 5, "none", tree)
+             for kid_id in (50, 20, 70, 20, 60)]
+    responses = run_together(calls)
+    assert sum(isinstance(response, dict) for response in responses) == 1
+    assert sorted(tree.inorder()) == [20, 50, 60, 70]
+    
+    responses = run_together([partial(tree_controller.prune_kid, kid_id, "none", tree) for kid_id in (20, 99)])
+    assert sum(isinstance(response, dict) for response in responses) == 1
+    assert sorted(tree.inorder()) == [50, 60, 70]
+    print("   ✅ BST: repetidos y podas resueltos por petición")
+
+
+def test_batch_is_logged_once_and_recovered():
+    with tempfile.TemporaryDirectory() as directory:
+        avl_tree = AVLTree()
+        wal = attach_wal(avl_tree, directory, "avl", fsync_every=1)
+        attach_queue(avl_tree)
+        syncs = []
+        sync = wal.sync
+        wal.sync = lambda: syncs.append(1) or sync()
+        
+        run_together([partial(avl_controller.insert_value, value, "none", avl_tree) for value in range(30)])
+        assert len(syncs) < 30
+        wal.close()
+        
+        recovered = AVLTree()
+        attach_wal(recovered, directory, "avl").close()
+        assert recovered.inorder() == list(range(30))
+    print(f"   ✅ 30 inserciones con {len(syncs)} fsync, recuperadas desde el WAL")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PRUEBAS DE LA COLA DE ESCRITURAS")
+    print("=" * 60)
+    test_queue_groups_writes()
+    test_avl_endpoints_answer_each_caller()
+    test_batch_responses_show_the_whole_batch()
+    test_bst_keeps_arrival_order_and_duplicates()
+    test_batch_is_logged_once_and_recovered()
+    print("\n✅ Todas las pruebas de la cola de escrituras pasaron")